@@ -0,0 +1,53 @@
+"""Compares trying an action on a clone of the board with applying it and undoing it
+
+    python -m benchmarks.clone_vs_undo
+"""
+from __future__ import annotations
+
+from copy import deepcopy
+from timeit import timeit
+from typing import Dict, List
+
+from kraken_attack.game import Action, Astrid, Elena, GameBoard
+
+
+def search_board() -> GameBoard:
+    board = GameBoard({Astrid(): 2, Elena(): 0})
+    board.determine_board_after_kraken_move([0, 0, 1, 4, 4, 5])
+    return board
+
+
+def candidate_actions(board: GameBoard) -> List[Action]:
+    return [action for pirate in board.pirates for action in board.legal_actions(pirate)]
+
+
+def deepcopy_and_apply(board: GameBoard, actions: List[Action]):
+    for action in actions:
+        deepcopy(board).apply(action)
+
+
+def clone_and_apply(board: GameBoard, actions: List[Action]):
+    for action in actions:
+        board.clone().apply(action)
+
+
+def apply_and_undo(board: GameBoard, actions: List[Action]):
+    for action in actions:
+        board.apply(action)
+        board.undo()
+
+
+def run(number: int=2000) -> Dict[str, float]:
+    """seconds per tried action of each approach"""
+    board = search_board()
+    actions = candidate_actions(board)
+    result = {}
+    for approach in (deepcopy_and_apply, clone_and_apply, apply_and_undo):
+        seconds = timeit(lambda: approach(board, actions), number=number)
+        result[approach.__name__] = seconds / (number * len(actions))
+    return result
+
+
+if __name__ == '__main__':
+    for name, seconds in run().items():
+        print(f'{name:20} {seconds * 1e6:8.2f} us per action')
@@ -0,0 +1,434 @@
+"""Micro and macro benchmarks of the game engine, and the memory a board takes
+
+Micro benchmarks time single `GameBoard` calls, macro benchmarks time whole random games
+and batches of games and memory benchmarks measure the bytes a board allocates (tracemalloc).
+Results are written as JSON and compared with a baseline, a benchmark that got slower (or bigger)
+than the baseline by more than the threshold is a regression and fails the run
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from benchmarks.clone_vs_undo import apply_and_undo, candidate_actions, clone_and_apply, deepcopy_and_apply, search_board
+from kraken_attack import kernels
+from kraken_attack.game import Action, Astrid, Billy, Elena, GameBoard, PackedBoard
+from kraken_attack.instrumentation import Instrumentation
+from kraken_attack.play import play_game, random_strategy
+from kraken_attack.tournament import run_tournament
+from kraken_attack.worker import Worker
+
+CONFIGS = ({Elena(): 0, Billy(): 3}, {Astrid(): 2}, {Astrid(): 1, Elena(): 2})
+UNITS = {'micro': 's', 'macro': 's', 'memory': 'bytes'}
+
+
+class Benchmark(NamedTuple):
+    name: str
+    kind: str
+    # gets the number of operations to run and returns the seconds (or bytes) per operation
+    run: Callable[[int], float]
+    # the part of the requested number of operations the benchmark runs
+    scale: float
+
+
+class Regression(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(kind: str, name: Optional[str]=None, scale: float=1.0):
+    def register(run: Callable[[int], float]) -> Callable[[int], float]:
+        BENCHMARKS.append(Benchmark(f'{kind}.{name or run.__name__}', kind, run, scale))
+        return run
+    return register
+
+
+def _per_call(call: Callable[[], object], number: int) -> float:
+    started = perf_counter()
+    for _ in range(number):
+        call()
+    return (perf_counter() - started) / number
+
+
+def _per_board(method: Callable[[GameBoard], object], number: int, board: Optional[GameBoard]=None) -> float:
+    """times a mutating method on fresh clones of the board, the clones are made before timing"""
+    board = search_board() if board is None else board
+    boards = [board.clone() for _ in range(number)]
+    started = perf_counter()
+    for board in boards:
+        method(board)
+    return (perf_counter() - started) / number
+
+
+def _kraken_on_board() -> GameBoard:
+    board = search_board()
+    [board.annoy_kraken(4) for _ in range(9)]
+    return board
+
+
+# micro benchmarks
+
+@benchmark('micro')
+def roll_dice(number: int) -> float:
+    return _per_call(search_board().roll_dice, number)
+
+
+@benchmark('micro')
+def determine_kraken_moves(number: int) -> float:
+    board = search_board()
+    roll_outcome = [('red', 0), ('red', 4), ('blue', 2)]
+    return _per_call(lambda: board.determine_kraken_moves(roll_outcome), number)
+
+
+@benchmark('micro')
+def determine_board_after_kraken_move(number: int) -> float:
+    return _per_board(lambda board: board.determine_board_after_kraken_move([0, 0, 1, 4, 5, 6]), number)
+
+
+@benchmark('micro')
+def move_pirate(number: int) -> float:
+    return _per_board(lambda board: board.move_pirate(Astrid(), 0), number)
+
+
+@benchmark('micro')
+def perform_pirate_attack(number: int) -> float:
+    return _per_board(lambda board: board.perform_pirate_attack(Astrid(), 'pistol', 4), number, _kraken_on_board())
+
+
+@benchmark('micro')
+def perform_repair(number: int) -> float:
+    return _per_board(lambda board: board.perform_repair(Elena(), 0), number)
+
+
+@benchmark('micro')
+def annoy_kraken(number: int) -> float:
+    return _per_board(lambda board: board.annoy_kraken(), number)
+
+
+@benchmark('micro')
+def undo(number: int) -> float:
+    board = search_board()
+    boards = [board.clone() for _ in range(number)]
+    for board in boards:
+        board.determine_board_after_kraken_move([0, 0, 1, 4, 5, 6])
+    started = perf_counter()
+    for board in boards:
+        board.undo()
+    return (perf_counter() - started) / number
+
+
+@benchmark('micro')
+def draw(number: int) -> float:
+    board = search_board()
+    return _per_call(board.draw, number)
+
+
+@benchmark('micro')
+def draw_uncached(number: int) -> float:
+    board = search_board()
+
+    def call():
+        board.invalidate_drawing()
+        board.draw()
+    return _per_call(call, number)
+
+
+@benchmark('micro')
+def game_outcome(number: int) -> float:
+    return _per_call(search_board().game_outcome, number)
+
+
+@benchmark('micro')
+def dice_counts(number: int) -> float:
+    board = search_board()
+    return _per_call(lambda: board.dice_counts, number)
+
+
+@benchmark('micro')
+def legal_actions(number: int) -> float:
+    board = search_board()
+    return _per_call(lambda: candidate_actions(board), number)
+
+
+@benchmark('micro')
+def clone(number: int) -> float:
+    return _per_call(search_board().clone, number)
+
+
+@benchmark('micro')
+def to_packed(number: int) -> float:
+    return _per_call(search_board().to_packed, number)
+
+
+@benchmark('micro')
+def from_packed(number: int) -> float:
+    packed = search_board().to_packed()
+    return _per_call(lambda: GameBoard.from_packed(packed), number)
+
+
+@benchmark('micro')
+def after_kraken_moves(number: int) -> float:
+    state = PackedBoard.from_board(search_board())
+    return _per_call(lambda: state.after_kraken_moves((0, 0, 1, 4, 5, 6)), number)
+
+
+@benchmark('micro')
+def pirate_hash(number: int) -> float:
+    pirate = Elena()
+    return _per_call(lambda: hash(pirate), number)
+
+
+@benchmark('micro')
+def pirate_quadrant_lookup(number: int) -> float:
+    pirate_quadrants = search_board().pirate_quadrants
+    pirate = Elena()
+    return _per_call(lambda: pirate_quadrants[pirate], number)
+
+
+# instrumentation, a detached board must run as fast as one that was never attached
+
+def _kraken_turns(instrumentation: Optional[Instrumentation], detach: bool, number: int) -> float:
+    board = search_board()
+    boards = [board.clone() for _ in range(number)]
+    if instrumentation is not None:
+        for board in boards:
+            instrumentation.attach(board)
+            if detach:
+                instrumentation.detach(board)
+    started = perf_counter()
+    for board in boards:
+        board.determine_board_after_kraken_move(board.determine_kraken_moves(board.roll_dice()))
+    return (perf_counter() - started) / number
+
+
+@benchmark('micro')
+def kraken_turn(number: int) -> float:
+    return _kraken_turns(None, False, number)
+
+
+@benchmark('micro')
+def kraken_turn_instrumented(number: int) -> float:
+    return _kraken_turns(Instrumentation(), False, number)
+
+
+@benchmark('micro')
+def kraken_turn_instrumentation_off(number: int) -> float:
+    return _kraken_turns(Instrumentation(), True, number)
+
+
+@benchmark('micro')
+def kraken_turn_kernel(number: int) -> float:
+    return _per_board(kernels.kraken_turn, number)
+
+
+# trying every candidate action, the approaches of `benchmarks.clone_vs_undo`
+
+def _per_action(approach: Callable[[GameBoard, List[Action]], None], number: int) -> float:
+    board = search_board()
+    actions = candidate_actions(board)
+    rounds = max(1, number // len(actions))
+    return _per_call(lambda: approach(board, actions), rounds) / len(actions)
+
+
+@benchmark('micro', scale=0.1)
+def deepcopy_and_apply_action(number: int) -> float:
+    return _per_action(deepcopy_and_apply, number)
+
+
+@benchmark('micro')
+def clone_and_apply_action(number: int) -> float:
+    return _per_action(clone_and_apply, number)
+
+
+@benchmark('micro')
+def apply_and_undo_action(number: int) -> float:
+    return _per_action(apply_and_undo, number)
+
+
+# macro benchmarks
+
+@benchmark('macro', scale=0.01)
+def random_game(number: int) -> float:
+    started = perf_counter()
+    for game in range(number):
+        play_game(random_strategy, CONFIGS[game % len(CONFIGS)], seed=game)
+    return (perf_counter() - started) / number
+
+
+@benchmark('macro', name='batch_of_100_games', scale=0.001)
+def batch_of_games(number: int, games: int=100) -> float:
+    started = perf_counter()
+    for batch in range(number):
+        for _ in run_tournament({'random': random_strategy}, CONFIGS[:1], games, seed=batch, max_workers=0):
+            pass
+    return (perf_counter() - started) / number
+
+
+
+@benchmark('macro', scale=0.005)
+def import_game(number: int) -> float:
+    """a fresh interpreter importing the engine, as a short-lived tool or pool worker does"""
+    started = perf_counter()
+    for _ in range(number):
+        subprocess.run([sys.executable, '-c', 'import kraken_attack.game'], check=True)
+    return (perf_counter() - started) / number
+
+
+@benchmark('macro', scale=0.01)
+def worker_game(number: int) -> float:
+    """a game played by a persistent worker, the worker is started before timing"""
+    jobs = [{'id': game, 'pirates': {str(p): q for p, q in CONFIGS[game % len(CONFIGS)].items()}, 'seed': game}
+            for game in range(number)]
+    with Worker() as worker:
+        worker.play(jobs[0])
+        started = perf_counter()
+        for _ in worker.map(jobs):
+            pass
+        return (perf_counter() - started) / number
+
+
+# memory benchmarks, the number of boards is capped since the allocations do not vary
+
+def _bytes_per_board(make: Callable[[], object], number: int) -> float:
+    number = min(number, 1000)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        boards = [make() for _ in range(number)]
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del boards
+    return allocated / number
+
+
+@benchmark('memory')
+def board(number: int) -> float:
+    return _bytes_per_board(lambda: GameBoard({Elena(): 0, Billy(): 3}), number)
+
+
+@benchmark('memory', name='clone')
+def board_clone(number: int) -> float:
+    board = search_board()
+    board.draw()
+    return _bytes_per_board(board.clone, number)
+
+
+@benchmark('memory')
+def packed_board(number: int) -> float:
+    board = search_board()
+    return _bytes_per_board(lambda: PackedBoard.from_board(board), number)
+
+
+@benchmark('memory')
+def board_after_game(number: int) -> float:
+    """a board with the undo history of a played game"""
+    def make() -> GameBoard:
+        board = GameBoard({Elena(): 0, Billy(): 3})
+        for _ in range(20):
+            board.determine_board_after_kraken_move(board.determine_kraken_moves(board.roll_dice()))
+            board.annoy_kraken(0)
+        return board
+    return _bytes_per_board(make, number // 10)
+
+
+def run(number: int=1000, repeat: int=5, select: Sequence[str]=()) -> Dict:
+    """runs the benchmarks whose names contain any of the select strings (all of them by default),
+    timings are the best of `repeat` runs"""
+    results = {}
+    for bench in BENCHMARKS:
+        if select and not any(s in bench.name for s in select):
+            continue
+        count = max(1, int(number * bench.scale))
+        repeats = 1 if bench.kind == 'memory' else repeat
+        value = min(bench.run(count) for _ in range(repeats))
+        results[bench.name] = {'kind': bench.kind, 'value': value, 'unit': UNITS[bench.kind], 'number': count}
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'repeat': repeat,
+        'benchmarks': results,
+        }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float=0.1) -> List[Regression]:
+    """the benchmarks that are slower (or bigger) than the baseline by more than threshold"""
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None or base['value'] <= 0:
+            continue
+        if result['value'] > base['value'] * (1 + threshold):
+            regressions.append(Regression(name, base['value'], result['value']))
+    return regressions
+
+
+def _format(value: float, unit: str) -> str:
+    if unit == 'bytes':
+        return f'{value:10.0f} B '
+    return f'{value * 1e6:10.2f} us'
+
+
+def report(results: Dict, baseline: Optional[Dict]=None) -> str:
+    lines = []
+    for name, result in results['benchmarks'].items():
+        line = f"{name:45} {_format(result['value'], result['unit'])}"
+        base = None if baseline is None else baseline['benchmarks'].get(name)
+        if base is not None and base['value'] > 0:
+            line += f"  {_format(base['value'], base['unit'])}  x{result['value'] / base['value']:.2f}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description='benchmarks the game engine')
+    parser.add_argument('--output', help='the JSON file to write the results to')
+    parser.add_argument('--baseline', help='a JSON results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='the relative slowdown that counts as a regression')
+    parser.add_argument('--number', type=int, default=1000, help='operations per micro benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-k', '--select', action='append', default=[],
+                        help='only run benchmarks whose names contain this, can be repeated')
+    parser.add_argument('--list', action='store_true', help='lists the benchmarks')
+    args = parser.parse_args(argv)
+    if args.list:
+        print('\n'.join(bench.name for bench in BENCHMARKS))
+        return 0
+
+    results = run(args.number, args.repeat, args.select)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(report(results, baseline))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f'regression: {regression.name} is x{regression.ratio:.2f} the baseline')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Kraken Attack, the board game engine
+
+The public API is importable from the package, `from kraken_attack import GameBoard, play_game`.
+Names and submodules are imported lazily, on first access, so importing the package (or just
+`kraken_attack.game`) does not pay for NumPy, sqlite, asyncio or the solver until they are used
+"""
+from importlib import import_module
+
+# the submodule that defines each name of the package API
+# (not annotated, typing would be imported by every process that imports the package)
+_API = {
+    **dict.fromkeys(('GameBoard', 'PackedBoard', 'Action', 'IllegalMove', 'Pirate', 'PIRATES',
+                     'Samuel', 'Astrid', 'Billy', 'Elena'), 'game'),
+    **dict.fromkeys(('RuleSet', 'STANDARD_RULES', 'rule_set'), 'rules'),
+    **dict.fromkeys(('DiceSource', 'RandomDice', 'CounterDice', 'BufferedDice'), 'dice'),
+    **dict.fromkeys(('Strategy', 'play_game', 'random_strategy', 'kraken_turn'), 'play'),
+    **dict.fromkeys(('run_tournament', 'tally'), 'tournament'),
+    **dict.fromkeys(('Solver', 'TranspositionTable'), 'solver'),
+    **dict.fromkeys(('SolvedTable', 'build_table'), 'tablebase'),
+    **dict.fromkeys(('GameRecorder', 'GameLog'), 'recording'),
+    **dict.fromkeys(('canonicalize',), 'symmetry'),
+    **dict.fromkeys(('Instrumentation',), 'instrumentation'),
+    **dict.fromkeys(('Estimate', 'win_rate', 'win_rate_difference'), 'estimate'),
+    **dict.fromkeys(('EvaluationCache', 'memoize'), 'cache'),
+    **dict.fromkeys(('BatchGameBoard',), 'batch'),
+    **dict.fromkeys(('VectorEnv', 'encode_boards'), 'features'),
+    **dict.fromkeys(('SessionManager',), 'server'),
+    **dict.fromkeys(('serve', 'Worker'), 'worker'),
+    }
+
+_SUBMODULES = (
+    'batch', 'cache', 'dice', 'estimate', 'features', 'game', 'instrumentation', 'kernels', 'play',
+    'recording', 'rules', 'server', 'solver', 'symmetry', 'tablebase', 'tournament', 'worker',
+    )
+
+__all__ = list(_API)
+
+
+def __getattr__(name):
+    if name in _API:
+        value = getattr(import_module(f'{__name__}.{_API[name]}'), name)
+    elif name in _SUBMODULES:
+        value = import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # later lookups find it in the module without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_API, *_SUBMODULES})
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from kraken_attack.dice import CounterDice, MASK64, splitmix64
+from kraken_attack.game import ATTACK_HITS, GameBoard, IllegalMove, Pirate, PIRATES
+from kraken_attack.rules import STANDARD_RULES
+
+# the dice array holds 3 red dice followed by 3 blue dice, dice that are not
+# rolled at the current kraken location are set to the blank facet
+MAX_DICE = 3
+EYE = 4
+BLANK = 5
+
+# dice counts (red, blue) for every kraken location, see `GameBoard.dice_counts`
+DICE_COUNTS = np.array(
+    [(counts['red'], counts['blue']) for counts in STANDARD_RULES.dice_counts], dtype=np.int8)
+
+INITIAL_ARM_LOCATIONS = np.array(STANDARD_RULES.initial_arm_locations, dtype=np.int8)
+
+# the powers of 6 that pick the dice of a turn out of its 64 bit draw, see `CounterDice.roll_turn`
+DIGITS = np.array([6 ** k for k in range(2 * MAX_DICE)], dtype=np.uint64)
+
+
+def splitmix64_array(x: np.ndarray) -> np.ndarray:
+    """`splitmix64` of every element of a uint64 array, the products wrap around like the masked ints"""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+# game outcome codes, indices into `OUTCOMES`
+ONGOING = 0
+KRAKEN_DROWNS_SHIP = 1
+KRAKEN_RETREATS = 2
+OUTCOMES: Tuple[Optional[str], ...] = (None, 'Kraken drowns ship', 'Kraken retreats')
+
+
+class BatchGameBoard:
+    """N game boards held as NumPy arrays and played in lockstep
+
+    arm_locations     - (N, 8) int8
+    shield_status     - (N, 8) bool
+    ship_holes        - (N, 4) int8, the number of holes per quadrant
+    kraken_location   - (N,) int8
+    kraken_lane       - (N,) int8, -1 while the kraken is not on the board
+    kraken_damage     - (N,) int8
+    pirate_quadrants  - (N, 4) int8 indexed by the pirate's position in `PIRATES`, -1 when absent
+    games, turns      - (N,) uint64, the game ids and the number of rolls of every game
+
+    The rules are the same as `GameBoard`'s, the only difference is that holes are
+    counted per quadrant so their order is not kept.
+    Game i rolls the dice of `CounterDice(seed, games[i])`, so it plays exactly like a `GameBoard`
+    rolling them, `board(i)` returns one that goes on from where the batch is.
+    Every method that changes the boards takes an optional boolean `mask` of the games to change.
+    """
+
+    def __init__(self, n: int, pirate_quadrants: Dict[Pirate, int], seed: int=42,
+                 games: Optional[Sequence[int]]=None):
+        assert n > 0, f"there needs to be at least 1 game"
+        assert len(pirate_quadrants) > 0, f"there needs to be at least 1 pirate"
+        self.n = n
+        self.arm_locations = np.tile(INITIAL_ARM_LOCATIONS, (n, 1))
+        self.shield_status = np.ones((n, 8), dtype=bool)
+        self.ship_holes = np.zeros((n, 4), dtype=np.int8)
+        self.kraken_location = np.zeros(n, dtype=np.int8)
+        self.kraken_lane = np.full(n, -1, dtype=np.int8)
+        self.kraken_damage = np.zeros(n, dtype=np.int8)
+        self.pirate_quadrants = np.full((n, len(PIRATES)), -1, dtype=np.int8)
+        for p, q in pirate_quadrants.items():
+            assert 0 <= q <= 3, f"the pirate {p} is in an illegal quadrant {q}"
+            self.pirate_quadrants[:, p.id] = q
+        self.seed = seed
+        self.games = np.arange(n, dtype=np.uint64) if games is None else np.array(
+            [game & MASK64 for game in games], dtype=np.uint64)
+        assert self.games.shape == (n,), f"there needs to be a game id for every game"
+        self.turns = np.zeros(n, dtype=np.uint64)
+        # the keys of `CounterDice(seed, game)`
+        self.keys = splitmix64_array(np.uint64(splitmix64(seed & MASK64)) ^ self.games)
+
+    @classmethod
+    def from_boards(cls, boards: Sequence[GameBoard], seed: int=42,
+                    games: Optional[Sequence[int]]=None) -> BatchGameBoard:
+        """the batch of the boards, whose dice are rolled from the first turn of their games"""
+        batch = cls(len(boards), boards[0].pirate_quadrants, seed=seed, games=games)
+        batch.pirate_quadrants[:] = -1
+        for i, board in enumerate(boards):
+            for lane in range(8):
+                batch.arm_locations[i, lane] = board.arm_locations[lane]
+                batch.shield_status[i, lane] = board.shield_status[lane]
+            for quadrant in board.ship_hole_positions:
+                batch.ship_holes[i, quadrant] += 1
+            batch.kraken_location[i] = board.kraken_location
+            batch.kraken_lane[i] = -1 if board.kraken_lane is None else board.kraken_lane
+            batch.kraken_damage[i] = board.kraken_damage
+            for p, q in board.pirate_quadrants.items():
+                batch.pirate_quadrants[i, p.id] = q
+        return batch
+
+    def board(self, i: int) -> GameBoard:
+        """returns game i as a `GameBoard` that rolls the game's next dice, holes are ordered by quadrant"""
+        dice = CounterDice(self.seed, int(self.games[i]), int(self.turns[i]))
+        board = GameBoard(self.pirate_quadrants[i], dice=dice)
+        board.arm_locations = {lane: int(self.arm_locations[i, lane]) for lane in range(8)}
+        board.shield_status = {lane: bool(self.shield_status[i, lane]) for lane in range(8)}
+        board.ship_hole_positions = tuple(
+            q for q in range(4) for _ in range(self.ship_holes[i, q]))
+        board.kraken_location = int(self.kraken_location[i])
+        board.kraken_lane = None if self.kraken_lane[i] < 0 else int(self.kraken_lane[i])
+        board.kraken_damage = int(self.kraken_damage[i])
+        return board
+
+    def _mask(self, mask: Optional[np.ndarray]) -> np.ndarray:
+        if mask is None:
+            return np.ones(self.n, dtype=bool)
+        assert mask.shape == (self.n,)
+        return mask
+
+    @property
+    def dice_counts(self) -> np.ndarray:
+        """(N, 2) array of the number of red and blue dice of every game"""
+        return DICE_COUNTS[self.kraken_location]
+
+    def roll_dice(self, mask: Optional[np.ndarray]=None) -> np.ndarray:
+        """rolls the dice of the masked games at once, returns an (N, 6) int8 array
+        of 3 red dice followed by 3 blue dice, with the facets of `GameBoard.roll_dice`.
+        The dice are those `CounterDice.roll_turn` rolls for the game's turn, dice that are
+        not in play at the game's kraken location and the dice of unmasked games show the blank facet"""
+        mask = self._mask(mask)
+        # the base 6 digits of every game's draw, in the order `CounterDice` rolls them: red first
+        digits = (splitmix64_array(self.keys ^ self.turns)[:, None] // DIGITS % np.uint64(6)).astype(np.int8)
+        counts = self.dice_counts
+        blue_digits = np.minimum(counts[:, :1] + np.arange(MAX_DICE)[None, :], 2*MAX_DICE - 1)
+        dice = np.concatenate([digits[:, :MAX_DICE], np.take_along_axis(digits, blue_digits, axis=1)], axis=1)
+        in_play = (np.arange(MAX_DICE)[None, :] < counts[:, :, None]) & mask[:, None, None]
+        dice[~in_play.reshape(self.n, 2*MAX_DICE)] = BLANK
+        self.turns[mask] += np.uint64(1)
+        return dice
+
+    def roll_outcome(self, dice: np.ndarray, i: int) -> List[Tuple[str, int]]:
+        """the dice of game i in the form returned by `GameBoard.roll_dice`"""
+        red, blue = self.dice_counts[i]
+        return [
+            *[('red', int(d)) for d in dice[i, :red]],
+            *[('blue', int(d)) for d in dice[i, MAX_DICE:MAX_DICE + blue]]
+            ]
+
+    def determine_kraken_moves(self, dice: np.ndarray) -> np.ndarray:
+        """returns an (N, 8) array of the number of kraken moves in every lane"""
+        red = dice[:, :MAX_DICE]
+        blue = dice[:, MAX_DICE:]
+        moves = np.empty((self.n, 8), dtype=np.int8)
+        for facet in range(4):
+            moves[:, facet] = (blue == facet).sum(axis=1)
+            moves[:, facet + 4] = (red == facet).sum(axis=1)
+        moves[:, :4] += (blue == EYE).sum(axis=1, dtype=np.int8)[:, None]
+        moves[:, 4:] += (red == EYE).sum(axis=1, dtype=np.int8)[:, None]
+        return moves
+
+    def determine_board_after_kraken_move(self, kraken_moves: np.ndarray, mask: Optional[np.ndarray]=None):
+        """every move advances the arm until it reaches the ship,
+        then breaks the shield and then adds a hole in the lane's quadrant"""
+        moves = np.where(self._mask(mask)[:, None], kraken_moves, 0).astype(np.int8)
+        advances = np.minimum(moves, 3 - self.arm_locations)
+        self.arm_locations += advances
+        remaining = moves - advances
+        breaks = (remaining > 0) & self.shield_status
+        self.shield_status &= ~breaks
+        holes = remaining - breaks
+        self.ship_holes += holes.reshape(self.n, 4, 2).sum(axis=2, dtype=np.int8)
+
+    def kraken_turn(self, mask: Optional[np.ndarray]=None) -> np.ndarray:
+        """rolls the dice and moves the kraken in the masked games, returns the dice"""
+        dice = self.roll_dice(mask)
+        self.determine_board_after_kraken_move(self.determine_kraken_moves(dice), mask)
+        return dice
+
+    def game_outcome(self) -> np.ndarray:
+        """(N,) array of outcome codes, see `OUTCOMES`"""
+        outcome = np.full(self.n, ONGOING, dtype=np.int8)
+        outcome[self.kraken_damage == 3] = KRAKEN_RETREATS
+        outcome[self.ship_holes.sum(axis=1) >= 4] = KRAKEN_DROWNS_SHIP
+        return outcome
+
+    def _check_pirate(self, pirate: Pirate, lane: int, mask: np.ndarray, action: str) -> np.ndarray:
+        quadrants = self.pirate_quadrants[:, pirate.id]
+        if (mask & (quadrants < 0)).any():
+            raise IllegalMove(f'{pirate} is not on the board')
+        if (mask & (quadrants != lane // 2)).any():
+            raise IllegalMove(f'{pirate} cannot {action} lane {lane}')
+        return quadrants
+
+    def move_pirate(self, pirate: Pirate, to: int, mask: Optional[np.ndarray]=None):
+        mask = self._mask(mask)
+        column = pirate.id
+        quadrants = self.pirate_quadrants[:, column]
+        if (mask & (quadrants < 0)).any():
+            raise IllegalMove(f'{pirate} is not on the board')
+        # quadrants are adjacent when they differ in exactly one bit, see `GameBoard.legal_pirate_moves`
+        adjacent = (quadrants ^ to == 1) | (quadrants ^ to == 2)
+        if (mask & ~adjacent).any():
+            raise IllegalMove(f'{pirate} cannot go to quadrant {to}')
+        self.pirate_quadrants[mask, column] = to
+
+    def perform_pirate_attack(self, pirate: Pirate, attack: str, lane: int, mask: Optional[np.ndarray]=None):
+        mask = self._mask(mask)
+        self._check_pirate(pirate, lane, mask, 'attack')
+        hit = mask & (self.arm_locations[:, lane] == ATTACK_HITS.get(attack, -1))
+        self.arm_locations[hit, lane] -= 1
+        self.kraken_damage[hit & (self.kraken_lane == lane)] += 1
+
+    def perform_repair(self, pirate: Pirate, lane: int, mask: Optional[np.ndarray]=None):
+        mask = self._mask(mask)
+        self._check_pirate(pirate, lane, mask, 'repair')
+        self.shield_status[mask, lane] = True
+
+    def annoy_kraken(self, lane: Optional[int]=None, mask: Optional[np.ndarray]=None):
+        mask = self._mask(mask)
+        arriving = mask & (self.kraken_location == 8)
+        if arriving.any() and lane is None:
+            raise IllegalMove('must specify to which lane the Kraken will go')
+        self.kraken_location[mask & (self.kraken_location < 9)] += 1
+        self.kraken_lane[arriving] = -1 if lane is None else lane
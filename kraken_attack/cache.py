@@ -0,0 +1,198 @@
+"""Memoization of position evaluations
+
+Boards are keyed by `state_key`, their packed state without the dice.
+`EvaluationCache` keeps evaluations in an in-memory LRU (`TranspositionTable`) backed
+by an optional sqlite file that survives restarts and can be shared by many worker
+processes, `memoize` caches any `f(board)` evaluator in one.
+Evaluations that are None are not cached.
+
+Every process opens its own connection to the file the first time it uses it, so caches made
+before forking a process pool can be used by its workers. Puts are kept in memory and written
+in one short transaction every `commit_every` puts, by `flush` and `close`, and when the process
+exits (including pool workers). No process holds the file's write lock between writes,
+other processes see the evaluations once they are written.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+from functools import wraps
+from multiprocessing.util import Finalize
+from typing import Callable, Dict, Optional, TypeVar, Union
+
+from kraken_attack.game import GameBoard, PackedBoard
+from kraken_attack.solver import TranspositionTable
+
+T = TypeVar('T')
+
+
+def state_key(board: Union[GameBoard, PackedBoard]) -> int:
+    """the packed state of the board, equal for boards that differ only in their dice or history"""
+    return board.state if isinstance(board, PackedBoard) else board.to_packed()
+
+
+def _key_bytes(key: int) -> bytes:
+    return key.to_bytes((key.bit_length() + 7) // 8 or 1, 'little')
+
+
+def _write(connection: sqlite3.Connection, namespace: str, pending: Dict[bytes, bytes]):
+    if pending:
+        with connection:
+            connection.executemany('INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?)',
+                                   ((namespace, key, value) for key, value in pending.items()))
+        pending.clear()
+
+
+def _write_at_exit(connection: sqlite3.Connection, pid: int, namespace: str, pending: Dict[bytes, bytes]):
+    if pid != os.getpid(): # a forked copy of another process' connection
+        return
+    try:
+        _write(connection, namespace, pending)
+    except sqlite3.ProgrammingError: # already closed
+        pass
+
+
+class DiskCache:
+    """Evaluations in a sqlite file, puts are written every `commit_every` puts, on `flush`
+    and when the process exits. The file is opened by every process the first time it uses the cache"""
+
+    def __init__(self, path: str, namespace: str='default', commit_every: int=32, timeout: float=30.0):
+        self.path = path
+        self.namespace = namespace
+        self.commit_every = commit_every
+        self.timeout = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # key -> pickled value of the puts of this process that are not written yet
+        self.pending: Dict[bytes, bytes] = {}
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """this process' connection, a connection cannot be used across a fork"""
+        if self._pid != os.getpid():
+            self._open()
+        return self._connection
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        # readers do not block the writer, so workers can share the file
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS evaluations '
+            '(namespace TEXT NOT NULL, key BLOB NOT NULL, value BLOB NOT NULL, PRIMARY KEY (namespace, key))'
+            )
+        connection.commit()
+        # the puts of a parent process are its own to write
+        pending: Dict[bytes, bytes] = {}
+        # writes the puts when the cache is collected or the process exits, pool workers included
+        Finalize(self, _write_at_exit, args=(connection, os.getpid(), self.namespace, pending), exitpriority=0)
+        # a connection inherited from the parent is left alone, not even closed
+        self._connection, self._pid, self.pending = connection, os.getpid(), pending
+
+    def __len__(self):
+        self.flush()
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM evaluations WHERE namespace = ?', (self.namespace,)).fetchone()[0]
+
+    def get(self, key: int):
+        connection = self.connection
+        value = self.pending.get(_key_bytes(key))
+        if value is None:
+            row = connection.execute(
+                'SELECT value FROM evaluations WHERE namespace = ? AND key = ?',
+                (self.namespace, _key_bytes(key))).fetchone()
+            value = None if row is None else row[0]
+        return None if value is None else pickle.loads(value)
+
+    def put(self, key: int, value):
+        connection = self.connection
+        self.pending[_key_bytes(key)] = pickle.dumps(value)
+        if len(self.pending) >= self.commit_every:
+            _write(connection, self.namespace, self.pending)
+
+    def flush(self):
+        _write(self.connection, self.namespace, self.pending)
+
+    def close(self):
+        if self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+            self._pid = None
+
+
+class EvaluationCache:
+    """A two level cache, an LRU in memory over an optional `DiskCache`"""
+
+    def __init__(self, max_size: int=2**16, path: Optional[str]=None, namespace: str='default',
+                 commit_every: int=32):
+        self.memory = TranspositionTable(max_size)
+        self.disk = None if path is None else DiskCache(path, namespace, commit_every)
+        self.disk_hits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.memory)
+
+    def get(self, key: int):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.put(key, value)
+        return value
+
+    def put(self, key: int, value):
+        if value is None:
+            return
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'lookups': self.memory.lookups,
+            'memory_hits': self.memory.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.memory.lookups - self.memory.hits - self.disk_hits,
+            'evictions': self.memory.evictions,
+            'size': len(self.memory),
+            }
+
+    def flush(self):
+        if self.disk is not None:
+            self.disk.flush()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+
+def memoize(cache: Optional[EvaluationCache]=None, max_size: int=2**16, path: Optional[str]=None):
+    """caches the results of an evaluator `f(board)` by the board's `state_key`.
+    Without a cache one is made, its disk tier is keyed by the evaluator's qualified name,
+    the cache is the `cache` attribute of the memoized function
+
+        @memoize(path='evaluations.sqlite')
+        def evaluate(board): ...
+    """
+    def decorator(f: Callable[..., T]) -> Callable[..., T]:
+        memo = cache if cache is not None else EvaluationCache(max_size, path, f'{f.__module__}.{f.__qualname__}')
+
+        @wraps(f)
+        def wrapper(board: Union[GameBoard, PackedBoard]) -> T:
+            key = state_key(board)
+            value = memo.get(key)
+            if value is None:
+                value = f(board)
+                memo.put(key, value)
+            return value
+        wrapper.cache = memo
+        return wrapper
+    return decorator
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from array import array
+from copy import copy
+from random import Random
+from typing import Hashable, List, Mapping, Sequence, Tuple
+
+MASK64 = (1 << 64) - 1
+
+
+def splitmix64(x: int) -> int:
+    """the SplitMix64 mixing function, a bijection of 64 bit ints"""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+class DiceSource(ABC):
+    """Rolls the dice of `GameBoard.roll_dice`
+
+    Every die is an int between 0 and 5, see `GameBoard.roll_dice` for their meaning.
+    `position` identifies where the source is in its stream with a small hashable value,
+    boards compare their dice by it
+    """
+
+    @abstractmethod
+    def roll(self, dice_counts: Mapping[str, int]) -> List[Tuple[str, int]]:
+        pass
+
+    @abstractmethod
+    def position(self) -> Hashable:
+        pass
+
+    def copy(self) -> DiceSource:
+        """an independent source at the same position"""
+        return copy(self)
+
+
+class RandomDice(DiceSource):
+    """The default dice, a `Random(seed).randint(0, 5)` per die, as boards have always rolled them"""
+
+    def __init__(self, seed: int=42):
+        self.seed = seed
+        self.rng = Random(seed)
+        self.draws = 0
+
+    def roll(self, dice_counts: Mapping[str, int]) -> List[Tuple[str, int]]:
+        roll_outcome = []
+        for color, num in dice_counts.items():
+            for _ in range(num):
+                roll_outcome.append((color, self.rng.randint(0,5)))
+        self.draws += len(roll_outcome)
+        return roll_outcome
+
+    def position(self) -> Hashable:
+        return ('random', self.seed, self.draws)
+
+    def copy(self) -> RandomDice:
+        dice = copy(self)
+        dice.rng = copy(self.rng)
+        return dice
+
+
+class CounterDice(DiceSource):
+    """Counter based dice, the dice of a turn are a pure function of (seed, game, turn)
+
+    `roll_turn` computes the dice of any turn directly, without rolling the turns before it,
+    and the whole state of the source is its (seed, game, turn)
+    """
+
+    def __init__(self, seed: int=42, game: int=0, turn: int=0):
+        self.seed = seed
+        self.game = game
+        self.turn = turn
+        self.key = splitmix64(splitmix64(seed & MASK64) ^ (game & MASK64))
+
+    def roll_turn(self, turn: int, dice_counts: Mapping[str, int]) -> List[Tuple[str, int]]:
+        # a turn has at most 6 dice, they are the base 6 digits of a single 64 bit draw
+        bits = splitmix64(self.key ^ (turn & MASK64))
+        roll_outcome = []
+        for color, num in dice_counts.items():
+            for _ in range(num):
+                bits, dice_roll = divmod(bits, 6)
+                roll_outcome.append((color, dice_roll))
+        return roll_outcome
+
+    def roll(self, dice_counts: Mapping[str, int]) -> List[Tuple[str, int]]:
+        roll_outcome = self.roll_turn(self.turn, dice_counts)
+        self.turn += 1
+        return roll_outcome
+
+    def position(self) -> Hashable:
+        return ('counter', self.seed, self.game, self.turn)
+
+
+class BufferedDice(DiceSource):
+    """Serves dice from a preallocated array, copies share the array"""
+
+    def __init__(self, dice: Sequence[int], start: int=0):
+        self.dice = dice if isinstance(dice, array) else array('B', dice)
+        self.next = start
+
+    @classmethod
+    def draw(cls, count: int, seed: int=42) -> BufferedDice:
+        """a buffer of `count` pre-drawn dice"""
+        return cls(array('B', Random(seed).choices(range(6), k=count)))
+
+    def roll(self, dice_counts: Mapping[str, int]) -> List[Tuple[str, int]]:
+        roll_outcome = []
+        for color, num in dice_counts.items():
+            if self.next + num > len(self.dice):
+                raise IndexError('the dice buffer is exhausted')
+            for dice_roll in self.dice[self.next:self.next + num]:
+                roll_outcome.append((color, dice_roll))
+            self.next += num
+        return roll_outcome
+
+    def position(self) -> Hashable:
+        return ('buffer', id(self.dice), self.next)
+
@@ -0,0 +1,112 @@
+"""Win rate estimates from rollouts, with confidence intervals and early stopping
+
+Rollouts are played in batches until the confidence interval of the estimate is narrower
+than the requested width. Win rates get a Wilson score interval and differences of win rates
+the adjusted interval of Bonett and Price for paired proportions, so samples that are all equal
+(a position that is almost always lost) do not stop the estimate with a zero width.
+Rollouts use common random numbers: rollout i of every strategy rolls the dice of
+`CounterDice(seed, i)` and gives the strategy a `Random` seeded by (seed, i), so strategies
+that are compared face the same dice and their difference has a much smaller variance than either rate
+"""
+from __future__ import annotations
+
+from math import sqrt
+from random import Random
+from statistics import NormalDist
+from typing import Callable, NamedTuple, Tuple
+
+from kraken_attack.dice import CounterDice
+from kraken_attack.game import GameBoard
+from kraken_attack.play import Strategy, kraken_turn
+
+WIN = 'Kraken retreats'
+
+
+class Estimate(NamedTuple):
+    value: float
+    low: float
+    high: float
+    # the number of samples (a difference is one sample) and of games played
+    samples: int
+    rollouts: int
+
+    @property
+    def width(self) -> float:
+        return self.high - self.low
+
+
+def rollout(board: GameBoard, strategy: Strategy, seed: int, game: int, max_turns: int=200) -> float:
+    """plays the game on from the board, 1.0 when the pirates win and 0.0 otherwise.
+    The board is not changed"""
+    board = GameBoard.from_packed(board.to_packed(), dice=CounterDice(seed, game))
+    rng = Random(f'{seed}:{game}:strategy')
+    outcome = board.game_outcome()
+    for _ in range(max_turns):
+        if outcome is not None:
+            break
+        board.apply(strategy(board, rng))
+        outcome = board.game_outcome()
+        if outcome is not None:
+            break
+        kraken_turn(board)
+        outcome = board.game_outcome()
+    return 1.0 if outcome == WIN else 0.0
+
+
+def wilson_interval(total: float, n: int, z: float) -> Tuple[float, float]:
+    """the Wilson score interval of a proportion from n samples of 0.0 or 1.0 that add up to total"""
+    p = total / n
+    scale = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / scale
+    half_width = z / scale * sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    # the bounds are exact when every sample is equal
+    low = 0.0 if total == 0 else max(0.0, center - half_width)
+    high = 1.0 if total == n else min(1.0, center + half_width)
+    return low, high
+
+
+def paired_interval(total: float, total_squares: float, n: int, z: float) -> Tuple[float, float]:
+    """the adjusted Wald interval of Bonett and Price of a difference of paired proportions
+    from n samples of -1.0, 0.0 or 1.0, a sample of 1.0 and one of -1.0 are added"""
+    mean = total / (n + 2)
+    variance = max(0.0, (total_squares + 2) / (n + 2) - mean * mean)
+    half_width = z * sqrt(variance / (n + 2))
+    return max(-1.0, mean - half_width), min(1.0, mean + half_width)
+
+
+def estimate(sample: Callable[[int], float], width: float, confidence: float=0.95, batch_size: int=64,
+             min_samples: int=100, max_samples: int=100_000, rollouts_per_sample: int=1,
+             paired: bool=False) -> Estimate:
+    """the mean of sample(0), sample(1), ... with its confidence interval, samples are drawn in batches
+    until the interval is at most width wide or max_samples are drawn.
+    Samples are 0.0 or 1.0 (see `wilson_interval`), or with paired the differences
+    -1.0, 0.0 or 1.0 of two paired samples (see `paired_interval`)"""
+    assert 0 < confidence < 1 and batch_size > 0 and max_samples > 0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n, total, total_squares = 0, 0.0, 0.0
+    while n < max_samples:
+        for i in range(n, min(n + batch_size, max_samples)):
+            x = sample(i)
+            total += x
+            total_squares += x * x
+        n = min(n + batch_size, max_samples)
+        low, high = paired_interval(total, total_squares, n, z) if paired else wilson_interval(total, n, z)
+        if n >= min_samples and high - low <= width:
+            break
+    return Estimate(total / n, low, high, n, n * rollouts_per_sample)
+
+
+def win_rate(board: GameBoard, strategy: Strategy, width: float=0.05, confidence: float=0.95,
+             seed: int=42, max_turns: int=200, **kwargs) -> Estimate:
+    """the probability that the pirates win from the board playing the strategy"""
+    def sample(i: int) -> float:
+        return rollout(board, strategy, seed, i, max_turns)
+    return estimate(sample, width, confidence, **kwargs)
+
+
+def win_rate_difference(board: GameBoard, strategy: Strategy, other: Strategy, width: float=0.05,
+                        confidence: float=0.95, seed: int=42, max_turns: int=200, **kwargs) -> Estimate:
+    """the win rate of strategy minus the win rate of other, both play every rollout with the same dice"""
+    def sample(i: int) -> float:
+        return rollout(board, strategy, seed, i, max_turns) - rollout(board, other, seed, i, max_turns)
+    return estimate(sample, width, confidence, rollouts_per_sample=2, paired=True, **kwargs)
@@ -0,0 +1,206 @@
+"""Fixed shape NumPy encodings of boards and their legal actions, for models that score many boards at once
+
+A board is encoded as `N_FEATURES` float32 features, see `FEATURES` for their layout.
+Every possible pirate action has an index in `ACTIONS`, so a board's legal actions are a
+boolean mask of `N_ACTIONS`. `VectorEnv` steps K games together with actions given by index.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from kraken_attack.batch import BatchGameBoard, DICE_COUNTS
+from kraken_attack.game import ATTACKS, Action, GameBoard, Pirate, PIRATES
+from kraken_attack.play import game_seed, kraken_turn
+
+# name -> slice of the encoding
+FEATURES: Dict[str, slice] = {}
+
+
+def _feature(name: str, size: int):
+    start = FEATURES[next(reversed(FEATURES))].stop if FEATURES else 0
+    FEATURES[name] = slice(start, start + size)
+
+
+_feature('arm_locations', 8 * 4)       # one-hot per lane
+_feature('shield_status', 8)
+_feature('ship_holes', 4)              # the number of holes per quadrant
+_feature('kraken_location', 10)        # one-hot
+_feature('kraken_lane', 8)             # one-hot, all zero while the kraken is not on the board
+_feature('kraken_damage', 1)
+_feature('dice_tier', 5)               # one-hot, see `DICE_TIERS`
+_feature('pirate_quadrants', len(PIRATES) * 4) # one-hot per pirate, all zero for absent pirates
+
+N_FEATURES = FEATURES['pirate_quadrants'].stop
+
+# the dice counts tiers in the order the kraken reaches them, and the tier of every kraken location
+DICE_TIERS: Tuple[Tuple[int, int], ...] = tuple(dict.fromkeys(map(tuple, DICE_COUNTS.tolist())))
+DICE_TIER = np.array([DICE_TIERS.index(tuple(counts)) for counts in DICE_COUNTS.tolist()], dtype=np.int64)
+
+# every pirate's moves, attacks and repairs by pirate id, then annoying the kraken without
+# and with a lane, which any pirate can do. Move targets are quadrants, the other targets lanes
+ACTIONS: Tuple[Tuple[str, int, Optional[int], Optional[str]], ...] = (
+    *((kind, pirate, target, attack)
+      for pirate in range(len(PIRATES))
+      for kind, target, attack in (
+          *(('move', q, None) for q in range(4)),
+          *(('attack', lane, attack) for lane in range(8) for attack in ATTACKS),
+          *(('repair', lane, None) for lane in range(8)),
+          )),
+    ('annoy', None, None, None),
+    *(('annoy', None, lane, None) for lane in range(8)),
+    )
+N_ACTIONS = len(ACTIONS)
+ACTION_INDEX: Dict[Tuple[str, Optional[int], Optional[int], Optional[str]], int] = {
+    action: i for i, action in enumerate(ACTIONS)
+    }
+
+REWARDS: Dict[Optional[str], float] = {None: 0.0, 'Kraken drowns ship': -1.0, 'Kraken retreats': 1.0}
+
+
+def action_index(action: Action) -> int:
+    if action.kind == 'annoy':
+        return ACTION_INDEX[('annoy', None, action.target, None)]
+    return ACTION_INDEX[(action.kind, action.pirate.id, action.target, action.attack)]
+
+
+def index_action(board: GameBoard, index: int) -> Action:
+    """the action of an index, the kraken is annoyed by the board's first pirate"""
+    kind, pirate, target, attack = ACTIONS[index]
+    return Action(kind, board.pirates[0] if pirate is None else PIRATES[pirate](), target, attack)
+
+
+def _output(out: Optional[np.ndarray], shape: Tuple[int, int], dtype) -> np.ndarray:
+    if out is None:
+        return np.zeros(shape, dtype=dtype)
+    assert out.shape == shape and out.dtype == dtype, f"expected a {dtype} array of shape {shape}"
+    out.fill(0)
+    return out
+
+
+def _encode(arm_locations: np.ndarray, shield_status: np.ndarray, ship_holes: np.ndarray,
+            kraken_location: np.ndarray, kraken_lane: np.ndarray, kraken_damage: np.ndarray,
+            pirate_quadrants: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    n = len(arm_locations)
+    out = _output(out, (n, N_FEATURES), np.float32)
+    rows = np.arange(n)[:, None]
+    out[rows, FEATURES['arm_locations'].start + np.arange(8) * 4 + arm_locations] = 1
+    out[:, FEATURES['shield_status']] = shield_status
+    out[:, FEATURES['ship_holes']] = ship_holes
+    rows = np.arange(n)
+    out[rows, FEATURES['kraken_location'].start + kraken_location] = 1
+    on_board = kraken_lane >= 0
+    out[rows[on_board], FEATURES['kraken_lane'].start + kraken_lane[on_board]] = 1
+    out[:, FEATURES['kraken_damage'].start] = kraken_damage
+    out[rows, FEATURES['dice_tier'].start + DICE_TIER[kraken_location]] = 1
+    games, pirates = np.nonzero(pirate_quadrants >= 0)
+    out[games, FEATURES['pirate_quadrants'].start + pirates * 4 + pirate_quadrants[games, pirates]] = 1
+    return out
+
+
+def encode_boards(boards: Sequence[GameBoard], out: Optional[np.ndarray]=None) -> np.ndarray:
+    """(N, N_FEATURES) float32 encoding of the boards, written into out when it is given"""
+    n = len(boards)
+    arm_locations = np.empty((n, 8), dtype=np.int64)
+    shield_status = np.empty((n, 8), dtype=bool)
+    ship_holes = np.zeros((n, 4), dtype=np.int64)
+    kraken_location = np.empty(n, dtype=np.int64)
+    kraken_lane = np.empty(n, dtype=np.int64)
+    kraken_damage = np.empty(n, dtype=np.int64)
+    pirate_quadrants = np.full((n, len(PIRATES)), -1, dtype=np.int64)
+    for i, board in enumerate(boards):
+        arm_locations[i] = [board.arm_locations[lane] for lane in range(8)]
+        shield_status[i] = [board.shield_status[lane] for lane in range(8)]
+        for quadrant in board.ship_hole_positions:
+            ship_holes[i, quadrant] += 1
+        kraken_location[i] = board.kraken_location
+        kraken_lane[i] = -1 if board.kraken_lane is None else board.kraken_lane
+        kraken_damage[i] = board.kraken_damage
+        for pirate, quadrant in board.pirate_quadrants.items():
+            pirate_quadrants[i, pirate.id] = quadrant
+    return _encode(arm_locations, shield_status, ship_holes, kraken_location, kraken_lane,
+                   kraken_damage, pirate_quadrants, out)
+
+
+def encode_batch(batch: BatchGameBoard, out: Optional[np.ndarray]=None) -> np.ndarray:
+    """the same encoding as `encode_boards` for the games of a `BatchGameBoard`"""
+    return _encode(batch.arm_locations, batch.shield_status, batch.ship_holes,
+                   batch.kraken_location.astype(np.int64), batch.kraken_lane.astype(np.int64),
+                   batch.kraken_damage, batch.pirate_quadrants.astype(np.int64), out)
+
+
+def legal_action_masks(boards: Sequence[GameBoard], out: Optional[np.ndarray]=None,
+                       useful_only: bool=False) -> np.ndarray:
+    """(N, N_ACTIONS) bool mask of every board's legal actions, see `GameBoard.legal_actions`"""
+    out = _output(out, (len(boards), N_ACTIONS), np.bool_)
+    for i, board in enumerate(boards):
+        for pirate in board.pirates:
+            for action in board.legal_actions(pirate, useful_only):
+                out[i, action_index(action)] = True
+    return out
+
+
+class VectorEnv:
+    """K games stepped together, gym style
+
+    `step` takes an action index per game, plays it and the kraken's turn, and returns
+    the observations, the rewards (see `REWARDS`) and the done flags of the games.
+    Games that end are started again, the observation returned for them is of the new game
+    and the info of the ended game has its outcome and number of turns.
+    Games that reach max_turns end with no reward and 'truncated' in their info.
+    Observations and masks are written into arrays that are reused by the next call
+    """
+
+    def __init__(self, configs: Sequence[Dict[Pirate, int]], seed: int=42, max_turns: int=200,
+                 useful_only: bool=True):
+        assert len(configs) > 0
+        self.configs = configs
+        self.seed = seed
+        self.max_turns = max_turns
+        self.useful_only = useful_only
+        self.games = [0] * len(configs)
+        self.turns = [0] * len(configs)
+        self.boards: List[GameBoard] = [self._new_board(k) for k in range(len(configs))]
+        self.observations = np.zeros((len(configs), N_FEATURES), dtype=np.float32)
+        self.masks = np.zeros((len(configs), N_ACTIONS), dtype=np.bool_)
+
+    def __len__(self):
+        return len(self.boards)
+
+    def _new_board(self, k: int) -> GameBoard:
+        self.turns[k] = 0
+        return GameBoard(dict(self.configs[k]), seed=game_seed(self.seed, 'env', k, self.games[k]))
+
+    def reset(self) -> np.ndarray:
+        for k in range(len(self)):
+            self.games[k] += 1
+            self.boards[k] = self._new_board(k)
+        return encode_boards(self.boards, self.observations)
+
+    def action_masks(self) -> np.ndarray:
+        return legal_action_masks(self.boards, self.masks, self.useful_only)
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict]]:
+        """actions must be legal, illegal ones raise `IllegalMove`"""
+        assert len(actions) == len(self)
+        rewards = np.zeros(len(self), dtype=np.float32)
+        dones = np.zeros(len(self), dtype=np.bool_)
+        infos: List[Dict] = [{} for _ in range(len(self))]
+        for k, index in enumerate(actions):
+            board = self.boards[k]
+            board.apply(index_action(board, int(index)))
+            outcome = board.game_outcome()
+            if outcome is None:
+                kraken_turn(board)
+                outcome = board.game_outcome()
+            # the environment never undoes
+            board.clear_history()
+            self.turns[k] += 1
+            if outcome is not None or self.turns[k] >= self.max_turns:
+                rewards[k] = REWARDS[outcome]
+                dones[k] = True
+                infos[k] = {'outcome': outcome, 'turns': self.turns[k], 'truncated': outcome is None}
+                self.games[k] += 1
+                self.boards[k] = self._new_board(k)
+        return encode_boards(self.boards, self.observations), rewards, dones, infos
@@ -1,10 +1,39 @@
 from __future__ import annotations
 
-from typing import Dict, Optional, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterator, NamedTuple, Optional, List, Sequence, Tuple, Union
 from abc import ABC
+from collections import Counter
+from functools import lru_cache
+from itertools import product
 from random import Random
 
+from kraken_attack.dice import DiceSource, RandomDice
+from kraken_attack.kernels import LANE_TRANSITION, tier_kernel
+from kraken_attack.rules import RuleSet, STANDARD_RULES
+
+if TYPE_CHECKING:
+    from fractions import Fraction
+
 class Pirate(ABC):
+    """Pirates are interned, `Elena() is Elena()`, so they hash and compare by identity.
+    `id` is the pirate's index in `PIRATES`"""
+    id: int = -1
+
+    def __new__(cls):
+        instance = cls.__dict__.get('_instance')
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instance = instance
+        return instance
+
+    def __reduce__(self):
+        return (type(self), ())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
     
     def __str__(self):
         return self.__class__.__name__
@@ -13,30 +42,167 @@ class Pirate(ABC):
         return f"<Pirate: {self.__str__()}>"
     
     def __hash__(self):
-        return self.__str__().__hash__()
-    
-    def __eq__(self, value):
-        if isinstance(value, Pirate):
-            return self.__repr__() == value.__repr__()
-        else:
-            return False
+        return self.id
 
 
 class Samuel(Pirate):
-    pass
+    id = 0
 
 class Astrid(Pirate):
-    pass
+    id = 1
 
 class Billy(Pirate):
-    pass
+    id = 2
 
 class Elena(Pirate):
-    pass
+    id = 3
+
+PIRATES: Tuple[type, ...] = (Samuel, Astrid, Billy, Elena)
+
+def pirate_quadrants_from_array(quadrants: Sequence[Optional[int]]) -> Dict[Pirate, int]:
+    """pirate -> quadrant from an array indexed by pirate id, None (or a negative quadrant) for absent pirates"""
+    assert len(quadrants) == len(PIRATES), f"expected a quadrant for each of the {len(PIRATES)} pirates"
+    return {PIRATES[i](): int(q) for i, q in enumerate(quadrants) if q is not None and q >= 0}
+
+# The packed board layout, from the least significant bit up:
+# 8 bits of shield mask, 2 bits per lane of arm location, 4 bits of kraken location,
+# 4 bits of kraken lane (0 means the kraken is not on the board, otherwise lane + 1),
+# 2 bits of kraken damage, 3 bits per pirate in `PIRATES` order (0 means the pirate
+# is not on the board, otherwise quadrant + 1) and finally the ship holes sorted by quadrant,
+# 2 bits each, behind a sentinel bit so that the number of holes is not bounded.
+# Holes are sorted so that a state does not depend on the order its holes were made in
+ARM_SHIFT = 8
+KRAKEN_LOCATION_SHIFT = 24
+KRAKEN_LANE_SHIFT = 28
+KRAKEN_DAMAGE_SHIFT = 32
+PIRATE_SHIFT = 34
+HOLES_SHIFT = 46
+
+def _pack_holes(hole_counts: Sequence[int]) -> int:
+    """the sorted holes field (with its sentinel) of the number of holes in each quadrant"""
+    holes = 1
+    for quadrant in (3, 2, 1, 0):
+        for _ in range(hole_counts[quadrant]):
+            holes = (holes << 2) | quadrant
+    return holes
+
+def pack_state(pirate_quadrants: Dict[Pirate, int], shield_status: Sequence[bool], arm_locations: Sequence[int],
+               kraken_location: int, kraken_lane: Optional[int], kraken_damage: int,
+               ship_hole_positions: Sequence[int]) -> int:
+    """packs a board state into a single int, shields and arms are indexed by lane, holes are sorted"""
+    assert 0 <= kraken_damage <= 3, f"cannot pack kraken damage {kraken_damage}"
+    packed = 0
+    for lane in range(8):
+        if shield_status[lane]:
+            packed |= 1 << lane
+        packed |= arm_locations[lane] << (ARM_SHIFT + lane*2)
+    packed |= kraken_location << KRAKEN_LOCATION_SHIFT
+    if kraken_lane is not None:
+        packed |= (kraken_lane + 1) << KRAKEN_LANE_SHIFT
+    packed |= kraken_damage << KRAKEN_DAMAGE_SHIFT
+    for pirate, quadrant in pirate_quadrants.items():
+        packed |= (quadrant + 1) << (PIRATE_SHIFT + pirate.id*3)
+    hole_counts = [0, 0, 0, 0]
+    for quadrant in ship_hole_positions:
+        hole_counts[quadrant] += 1
+    return packed | (_pack_holes(hole_counts) << HOLES_SHIFT)
+
+# the standard rules, see `kraken_attack.rules`
+
+# the lanes a pirate can attack and repair from each quadrant
+QUADRANT_LANES: Dict[int, Tuple[int, int]] = dict(enumerate(STANDARD_RULES.quadrant_lanes))
+
+# the quadrants a pirate can move to from each quadrant
+LEGAL_PIRATE_MOVES: Dict[int, Tuple[int, int]] = dict(enumerate(STANDARD_RULES.pirate_moves))
+
+ATTACKS: Tuple[str, ...] = STANDARD_RULES.attacks
+
+# the arm location each attack hits
+ATTACK_HITS: Dict[str, int] = dict(STANDARD_RULES.attack_hits)
+
+# the attack that hits an arm in each location, an arm in location 0 cannot be hit
+HITTING_ATTACK: Dict[int, Optional[str]] = dict(enumerate(STANDARD_RULES.hitting_attack))
+
+# drawing templates, arms are marked with ARM_MARKER while the kraken is not on the board,
+# after that only the arm in the kraken's lane is marked, with KRAKEN_MARKER
+ARM_MARKER = '𝛿'
+KRAKEN_MARKER = '🐙'
+
+# the kraken's track marks the locations where a color rolls one more die
+COLOR_SQUARES: Dict[str, str] = {'red': '🟥', 'blue': '🟦', 'green': '🟩', 'yellow': '🟨'}
+
+def _draw_lane(arm_location: int, marker: Optional[str], right_side: bool, arm_slots: int=4) -> str:
+    result = "|" + " |" * arm_slots
+    if marker is not None:
+        arm_index = arm_location*2 + 1
+        result = result[:arm_index] + marker + result[arm_index+1:]
+    return result[::-1] if right_side else result
+
+def _draw_ship_lane(shield: bool, right_side: bool) -> str:
+    result = ('🛡️' if shield else '.') + "|__"
+    return result[::-1] if right_side else result
+
+def _kraken_track(rules: RuleSet) -> str:
+    result = "| |"
+    for location in range(1, rules.board_location):
+        before, after = rules.dice_counts[location - 1], rules.dice_counts[location]
+        grown = [color for color in after if after[color] > before[color]]
+        result += (COLOR_SQUARES.get(grown[0], '⬜') if grown else ' ') + '|'
+    return result
+
+def _draw_kraken_location(kraken_location: int, track: str="| | |🟥| |🟦| |🟥| |🟦|") -> str:
+    result = track
+    if kraken_location <= len(track) // 2 - 1:
+        result = result[:kraken_location*2 + 1] + KRAKEN_MARKER + result[kraken_location*2 + 2:]
+    for i in range(kraken_location):
+        result = result[:i*2 + 1] + ' ' + result[i*2 + 2:]
+    return result
+
+LANE_DRAWINGS: Dict[Tuple[int, Optional[str], bool], str] = {
+    (arm_location, marker, right_side): _draw_lane(arm_location, marker, right_side)
+    for arm_location in range(4)
+    for marker in (ARM_MARKER, KRAKEN_MARKER, None)
+    for right_side in (False, True)
+    }
+
+SHIP_LANE_DRAWINGS: Dict[Tuple[bool, bool], str] = {
+    (shield, right_side): _draw_ship_lane(shield, right_side)
+    for shield in (True, False)
+    for right_side in (False, True)
+    }
+
+KRAKEN_LOCATION_DRAWINGS: Tuple[str, ...] = tuple(_draw_kraken_location(_) for _ in range(10))
+
+@lru_cache(maxsize=None)
+def _rule_drawings(rules: RuleSet) -> Tuple[Dict[Tuple[int, Optional[str], bool], str], Tuple[str, ...]]:
+    """the lane and kraken location drawings of the rules"""
+    if rules is STANDARD_RULES:
+        return LANE_DRAWINGS, KRAKEN_LOCATION_DRAWINGS
+    lane_drawings = {
+        (arm_location, marker, right_side): _draw_lane(arm_location, marker, right_side, rules.max_arm_location + 1)
+        for arm_location in range(rules.max_arm_location + 1)
+        for marker in (ARM_MARKER, KRAKEN_MARKER, None)
+        for right_side in (False, True)
+        }
+    track = _kraken_track(rules)
+    return lane_drawings, tuple(_draw_kraken_location(_, track) for _ in range(rules.track_length))
 
 class IllegalMove(Exception):
     pass
 
+class Action(NamedTuple):
+    """A pirate action
+
+    kind is one of 'move', 'attack', 'repair' or 'annoy'
+    target is the quadrant to move to, the lane to attack or repair,
+    or the lane the kraken goes to when annoyed onto the board
+    attack is one of 'sword', 'pistol' or 'cannon'
+    """
+    kind: str
+    pirate: Pirate
+    target: Optional[int] = None
+    attack: Optional[str] = None
+
 class GameBoard:
     """
     The Angry Kraken's Game Board
@@ -53,41 +219,132 @@ class GameBoard:
     the arms are positioned in lanes, the lanes have the same indices as the shields
 
     ship holes are a tuple of ints and can be repeated, the ints need to be like the quadrants
+
+    every change by the mutating methods is recorded as a compact delta, so it can be
+    reverted with `undo` and performed again with `redo`.
+    The changes and dice rolls are also passed to the board's `recorder` when it has one
+    (see `kraken_attack.recording.GameRecorder`)
+
+    dice are rolled by a `DiceSource`, `RandomDice(seed)` by default
+
+    pirate_quadrants can also be given as an array of quadrants indexed by pirate id,
+    see `pirate_quadrants_from_array`
+
+    the geometry, dice and thresholds above are those of `STANDARD_RULES`,
+    boards of house-rule variants are given their `RuleSet` (see `kraken_attack.rules`).
+    Packed states and the modules built on them only hold boards of the standard rules
     """
 
-    def __init__(self, pirate_quadrants: Dict[Pirate, int], seed: int=42):
+    def __init__(self, pirate_quadrants: Union[Dict[Pirate, int], Sequence[Optional[int]]], seed: int=42,
+                 dice: Optional[DiceSource]=None, rules: RuleSet=STANDARD_RULES):
+        if not isinstance(pirate_quadrants, dict):
+            pirate_quadrants = pirate_quadrants_from_array(pirate_quadrants)
         assert len(pirate_quadrants) > 0, f"there needs to be at least 1 pirate"
         for p, q in pirate_quadrants.items():
-            assert 0 <= q <= 3, f"the pirate {p} is in an illegal quadrant {q}"
+            assert 0 <= q < rules.quadrants, f"the pirate {p} is in an illegal quadrant {q}"
+        self.rules: RuleSet = rules
         self.pirate_quadrants: Dict[Pirate, int] = pirate_quadrants
-        self.shield_status: Dict[int, bool] = {_: True for _ in range(8)}
-        self.arm_locations: Dict[int, int] = {
-            0: 2,
-            1: 1,
-            2: 1,
-            3: 0,
-            4: 2,
-            5: 1,
-            6: 1,
-            7: 0
-            }
+        self.shield_status: Dict[int, bool] = {_: True for _ in range(rules.lanes)}
+        self.arm_locations: Dict[int, int] = dict(enumerate(rules.initial_arm_locations))
         self.kraken_location: int = 0
         self.kraken_lane: Optional[int] = None
         self.kraken_damage: int = 0
         self.ship_hole_positions: Tuple[int,...] = ()
-        self.rng = Random(seed)
-    
+        self.dice: DiceSource = RandomDice(seed) if dice is None else dice
+        self.undo_stack: List[Tuple[str, tuple, tuple]] = []
+        self.redo_stack: List[Tuple[str, tuple, tuple]] = []
+        self._drawn_rows: List[Optional[str]] = [None] * rules.rows
+        self.recorder = None
+
+    def clone(self, share_rng: bool=False) -> GameBoard:
+        """copies the state containers of the board, the undo history is not copied.
+        With share_rng the clone rolls from the same dice source, otherwise from a copy of it"""
+        board = GameBoard.__new__(GameBoard)
+        board.rules = self.rules
+        board.pirate_quadrants = self.pirate_quadrants.copy()
+        board.shield_status = self.shield_status.copy()
+        board.arm_locations = self.arm_locations.copy()
+        board.kraken_location = self.kraken_location
+        board.kraken_lane = self.kraken_lane
+        board.kraken_damage = self.kraken_damage
+        board.ship_hole_positions = self.ship_hole_positions
+        board.dice = self.dice if share_rng else self.dice.copy()
+        board.undo_stack = []
+        board.redo_stack = []
+        board._drawn_rows = self._drawn_rows.copy()
+        board.recorder = None
+        return board
+
+    def apply(self, action: Action):
+        """performs a pirate action"""
+        if action.kind == 'move':
+            self.move_pirate(action.pirate, action.target)
+        elif action.kind == 'attack':
+            self.perform_pirate_attack(action.pirate, action.attack, action.target)
+        elif action.kind == 'repair':
+            self.perform_repair(action.pirate, action.target)
+        elif action.kind == 'annoy':
+            self.annoy_kraken(action.target)
+        else:
+            raise ValueError(f'unknown action {action.kind}')
+
+    def _record(self, method: str, args: tuple, delta: tuple):
+        self.undo_stack.append((method, args, delta))
+        self.redo_stack.clear()
+        if self.recorder is not None:
+            self.recorder.on_change(self, method, args)
+
+    def undo(self):
+        """reverts the last change made by a mutating method"""
+        if not self.undo_stack:
+            raise IndexError('nothing to undo')
+        method, args, delta = self.undo_stack.pop()
+        if method == 'determine_board_after_kraken_move':
+            lanes, self.ship_hole_positions = delta
+            for lane, arm_location, shield in lanes:
+                self.arm_locations[lane] = arm_location
+                self.shield_status[lane] = shield
+                self._drawn_rows[self.rules.lane_row[lane]] = None
+        elif method == 'perform_pirate_attack':
+            lane, arm_location, self.kraken_damage = delta
+            self.arm_locations[lane] = arm_location
+            self._drawn_rows[self.rules.lane_row[lane]] = None
+        elif method == 'perform_repair':
+            lane, self.shield_status[lane] = delta
+            self._drawn_rows[self.rules.lane_row[lane]] = None
+        elif method == 'move_pirate':
+            pirate, self.pirate_quadrants[pirate] = delta
+        elif method == 'annoy_kraken':
+            self.kraken_location, self.kraken_lane = delta
+            self.invalidate_drawing()
+        self.redo_stack.append((method, args, delta))
+        if self.recorder is not None:
+            self.recorder.on_undo(self, method)
+
+    def redo(self):
+        """performs the last undone change again"""
+        if not self.redo_stack:
+            raise IndexError('nothing to redo')
+        method, args, _ = self.redo_stack.pop()
+        redo_stack, self.redo_stack = self.redo_stack, []
+        getattr(self, method)(*args)
+        self.redo_stack = redo_stack
+
+    def clear_history(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
     def __eq__(self, value):
         if isinstance(value, GameBoard):
-            result = True
+            result = self.rules is value.rules
             result &= self.pirate_quadrants == value.pirate_quadrants
             result &= self.shield_status == value.shield_status
             result &= self.arm_locations == value.arm_locations
             result &= self.kraken_location == value.kraken_location
             result &= self.kraken_lane == value.kraken_lane
             result &= self.kraken_damage == value.kraken_damage
-            result &= self.ship_hole_positions == self.ship_hole_positions
-            result &= self.rng == value.rng
+            result &= self.ship_hole_positions == value.ship_hole_positions
+            result &= self.dice.position() == value.dice.position()
             return result
         else:
             return False
@@ -95,88 +352,123 @@ class GameBoard:
     def __ne__(self, value):
         return not self.__eq__(value)
 
+    def to_packed(self) -> int:
+        """returns the state of the board as a single int, the dice are not included"""
+        assert self.rules is STANDARD_RULES, f"only boards of the standard rules can be packed"
+        return pack_state(self.pirate_quadrants, self.shield_status, self.arm_locations, self.kraken_location,
+                          self.kraken_lane, self.kraken_damage, self.ship_hole_positions)
+
+    @classmethod
+    def from_packed(cls, packed: int, seed: int=42, dice: Optional[DiceSource]=None) -> GameBoard:
+        """the inverse of `to_packed`, pirates are ordered as in `PIRATES`"""
+        state = PackedBoard(packed)
+        board = cls(state.pirate_quadrants, seed=seed, dice=dice)
+        board.shield_status = {lane: state.shield_status(lane) for lane in range(8)}
+        board.arm_locations = {lane: state.arm_location(lane) for lane in range(8)}
+        board.kraken_location = state.kraken_location
+        board.kraken_lane = state.kraken_lane
+        board.kraken_damage = state.kraken_damage
+        board.ship_hole_positions = state.ship_hole_positions
+        return board
+
+    def lookup_value(self, table) -> Optional[float]:
+        """the pirates' win probability under optimal play from a solved table
+        (see `kraken_attack.tablebase.SolvedTable`), None if the board is not in the table"""
+        return table.value(PackedBoard(self.to_packed()))
+
     def draw_lane(self, lane: int) -> str:
-        assert 0 <= lane <= 7
-        result = "| | | | |"
-        arm_index = self.arm_locations[lane]*2 + 1
-        if self.kraken_lane is not None:
-            if self.kraken_lane == lane:
-                result = result[:arm_index] + '🐙' + result[arm_index+1:]
+        assert 0 <= lane < self.rules.lanes
+        if self.kraken_lane is None:
+            marker = ARM_MARKER
+        elif self.kraken_lane == lane:
+            marker = KRAKEN_MARKER
         else:
-            result = result[:arm_index] + '𝛿' + result[arm_index+1:]
-        if lane >= 4:
-            result = result[::-1]
-        return result
+            marker = None
+        return _rule_drawings(self.rules)[0][self.arm_locations[lane], marker, self.rules.lane_right_side[lane]]
     
     def draw_ship_lane(self, lane: int) -> str:
-        assert 0 <= lane <= 7
-        result = "|__"
-        if self.shield_status[lane]:
-            result = '🛡️' + result
-        else:
-            result = '.' + result
-        if lane >= 4:
-            result = result[::-1]
-        return result
+        assert 0 <= lane < self.rules.lanes
+        return SHIP_LANE_DRAWINGS[self.shield_status[lane], self.rules.lane_right_side[lane]]
     
     def draw_kraken_location(self) -> str:
-        result = "| | |🟥| |🟦| |🟥| |🟦|"
-        if self.kraken_location <= 8:
-            result = result[:self.kraken_location*2 + 1] + '🐙' + result[self.kraken_location*2 + 2:]
-        for i in range(self.kraken_location):
-            result = result[:i*2 + 1] + ' ' + result[i*2 + 2:]
+        return _rule_drawings(self.rules)[1][self.kraken_location]
+
+    def draw_row(self, row: int) -> str:
+        """draws lanes row and row + 4 (row + rules.rows) with their shields, rows are cached until
+        one of their lanes is changed by a mutating method"""
+        result = self._drawn_rows[row]
+        if result is None:
+            other = row + self.rules.rows
+            result = (self.draw_lane(row) + self.draw_ship_lane(row)
+                      + self.draw_ship_lane(other) + self.draw_lane(other))
+            self._drawn_rows[row] = result
         return result
+
+    def invalidate_drawing(self, lanes: Optional[Sequence[int]]=None):
+        """drops the cached rows of the lanes (all of them by default),
+        needed after changing `arm_locations` or `shield_status` directly"""
+        if lanes is None:
+            self._drawn_rows = [None] * self.rules.rows
+        else:
+            for lane in lanes:
+                self._drawn_rows[self.rules.lane_row[lane]] = None
     
     def draw(self) -> str:
-        result = '      KRAKEN ATTACK\n\n'
-        result += self.draw_kraken_location()
-        result += '\n\n'
-        for left, right in [(0,4),(1,5),(2,6),(3,7)]:
-            result += self.draw_lane(left)
-            result += self.draw_ship_lane(left)
-            result += self.draw_ship_lane(right)
-            result += self.draw_lane(right)
-            result += '\n'
-        result += '\n'
-        result += f'Ship damage: {len(self.ship_hole_positions)}\n'
-        result += f'Kraken damage: {self.kraken_damage}\n'
-        result += f'Pirates: {', '.join([str(_) for _ in self.pirates])}'
-        return result
+        return ''.join((
+            '      KRAKEN ATTACK\n\n',
+            self.draw_kraken_location(),
+            '\n\n',
+            *(self.draw_row(row) + '\n' for row in range(self.rules.rows)),
+            '\n',
+            f'Ship damage: {len(self.ship_hole_positions)}\n',
+            f'Kraken damage: {self.kraken_damage}\n',
+            f'Pirates: {', '.join([str(_) for _ in self.pirates])}'
+            ))
+
+    @property
+    def rng(self) -> Optional[Random]:
+        """the `Random` of the default dice, None for other dice sources"""
+        return getattr(self.dice, 'rng', None)
+
+    @property
+    def pirate_quadrant_array(self) -> List[Optional[int]]:
+        """the quadrant of every pirate indexed by pirate id, None for absent pirates"""
+        quadrants = [None] * len(PIRATES)
+        for pirate, quadrant in self.pirate_quadrants.items():
+            quadrants[pirate.id] = quadrant
+        return quadrants
 
     @property
     def pirates(self) -> List[Pirate]:
         return list(self.pirate_quadrants.keys())
 
     @property
-    def dice_counts(self):
-        """Dice counts grow according to the location of the Kraken"""
-        if self.kraken_location < 2:
-            return {'red': 1, 'blue': 1}
-        elif self.kraken_location < 4:
-            return {'red': 2, 'blue': 1}
-        elif self.kraken_location < 6:
-            return {'red': 2, 'blue': 2}
-        elif self.kraken_location < 8:
-            return {'red': 3, 'blue': 2}
-        elif self.kraken_location < 10:
-            return {'red': 3, 'blue': 3}
+    def dice_counts(self) -> Dict[str, int]:
+        """Dice counts grow according to the location of the Kraken, a copy of the rules' counts"""
+        return dict(self.rules.dice_counts[self.kraken_location])
 
     def game_outcome(self) -> Optional[str]:
         """The game is concluded when either
         The kraken recieves 3 points of damage
         Or
-        When there are 4 holes in the ship
+        When there are 4 holes in the ship (a single kraken turn can make more)
         Otherwise, the game outcome is None
+        (the thresholds are those of the board's rules)
         """
         outcome = None
-        if len(self.ship_hole_positions) == 4:
+        if len(self.ship_hole_positions) >= self.rules.holes_to_sink:
             outcome = 'Kraken drowns ship'
-        elif self.kraken_damage == 3:
+        elif self.kraken_damage == self.rules.damage_to_retreat:
             outcome = 'Kraken retreats'
         else:
             pass
         return outcome
 
+    def kraken_turn_distribution(self) -> Tuple[Tuple[PackedBoard, Fraction], ...]:
+        """every distinct board the kraken's next turn can lead to, with its exact probability,
+        see `PackedBoard.kraken_turn_distribution`"""
+        return PackedBoard(self.to_packed()).kraken_turn_distribution()
+
     def roll_dice(self) -> List[Tuple[str, int]]:
         """returns a list of (dice color, dice outcome)
         dice outcomes are:
@@ -184,10 +476,9 @@ class GameBoard:
         4 - depicts the "eye" facet, meaning that the kraken advances all arms for that color
         5 - depicts a blank facet, meaning no movement by the Kraken
         """
-        roll_outcome = []
-        for color, num in self.dice_counts.items():
-            for _ in range(num):
-                roll_outcome.append((color, self.rng.randint(0,5)))
+        roll_outcome = self.dice.roll(self.rules.dice_counts[self.kraken_location])
+        if self.recorder is not None:
+            self.recorder.on_roll(self, roll_outcome)
         return roll_outcome
 
     def determine_kraken_moves(self, roll_outcome: List[Tuple[str, int]]) -> List[int]:
@@ -195,42 +486,105 @@ class GameBoard:
         returns a list of ints, each int points to a lane that 
         will perform an advance or an attack by the Kraken"""
         
-        assert set(('red', 'blue')) == {t[0] for t in roll_outcome}
+        assert set(self.rules.colors) == {t[0] for t in roll_outcome}
         assert all(0 <= t[1] <= 5 for t in roll_outcome)
+        # a single lane, the eye (every lane of the color) or the blank facet (no move)
+        roll_moves = self.rules.roll_moves
         moves = []
         for color, dice_roll in roll_outcome:
-            if dice_roll == 5: # blank facet
-                pass 
-            elif 0 <= dice_roll <= 3: # single lane
-                move = dice_roll + (4 if color == 'red' else 0)
-                moves.append(move)
-            else: # the eye!
-                if color == 'blue':
-                    moves = [*moves, *[0,1,2,3]]
-                else:
-                    moves = [*moves, *[4,5,6,7]]
+            moves.extend(roll_moves[color, dice_roll])
         return moves
     
     def determine_board_after_kraken_move(self, kraken_moves: List[int]):
+        delta = (
+            tuple((lane, self.arm_locations[lane], self.shield_status[lane]) for lane in set(kraken_moves)),
+            self.ship_hole_positions
+            )
+        rules = self.rules
         for lane in kraken_moves:
-            if self.arm_locations[lane] < 3:
+            if self.arm_locations[lane] < rules.max_arm_location:
                 self.arm_locations[lane] += 1
-            elif self.arm_locations[lane] == 3:
+            elif self.arm_locations[lane] == rules.max_arm_location:
                 if self.shield_status[lane]: # break a shield
                     self.shield_status[lane] = False 
                 else: # add a hole to the ship
-                    self.ship_hole_positions = (*self.ship_hole_positions, lane // 2)
+                    self.ship_hole_positions = (*self.ship_hole_positions, rules.lane_quadrant[lane])
             else:
                 raise Exception(f"illegal lane, got {lane}")
+            self._drawn_rows[rules.lane_row[lane]] = None
+        self._record('determine_board_after_kraken_move', (kraken_moves,), delta)
+
+    def apply_kraken_kernel(self, index: int) -> List[int]:
+        """moves the kraken by the roll with this index in the kernel of the board's dice counts
+        (see `kraken_attack.kernels`) with a table lookup per moved lane, returns the kraken moves.
+        The change is the one `determine_board_after_kraken_move` makes with those moves,
+        and it is recorded as such"""
+        assert self.rules is STANDARD_RULES, f"the kernels hold the rolls of the standard rules"
+        dice_counts = self.rules.dice_counts[self.kraken_location]
+        kernel = tier_kernel(dice_counts['red'], dice_counts['blue'])
+        kraken_moves = list(kernel.moves[index])
+        arm_locations, shield_status, drawn_rows = self.arm_locations, self.shield_status, self._drawn_rows
+        lane_row = self.rules.lane_row
+        lanes = []
+        hole_lanes = {} # lane -> its moves that do not add a hole
+        for lane, moves in kernel.lane_moves[index]:
+            arm_location, shield = arm_locations[lane], shield_status[lane]
+            lanes.append((lane, arm_location, shield))
+            state, holes = LANE_TRANSITION[arm_location | (shield << 2)][moves]
+            arm_locations[lane] = state & 3
+            shield_status[lane] = bool(state >> 2)
+            drawn_rows[lane_row[lane]] = None
+            if holes:
+                hole_lanes[lane] = moves - holes
+        delta = (tuple(lanes), self.ship_hole_positions)
+        if hole_lanes:
+            # holes are added in the order of the moves that make them
+            lane_quadrant = self.rules.lane_quadrant
+            holes = []
+            for lane in kraken_moves:
+                if lane in hole_lanes:
+                    if hole_lanes[lane]:
+                        hole_lanes[lane] -= 1
+                    else:
+                        holes.append(lane_quadrant[lane])
+            self.ship_hole_positions = (*self.ship_hole_positions, *holes)
+        self._record('determine_board_after_kraken_move', (kraken_moves,), delta)
+        return kraken_moves
 
     @property
     def legal_pirate_moves(self):
-        return {
-            0: (1,2),
-            1: (0,3),
-            2: (0,3),
-            3: (1,2)
-        }
+        return self.rules.pirate_moves
+
+    def legal_actions(self, pirate: Pirate, useful_only: bool=False) -> Iterator[Action]:
+        """yields every legal action of the pirate, without trying them
+
+        with useful_only, attacks that cannot hit, repairs of intact shields
+        and annoying a kraken that is already on the board are left out
+        """
+        quadrant = self.pirate_quadrants.get(pirate)
+        if quadrant is None:
+            return
+        rules = self.rules
+        for to in rules.pirate_moves[quadrant]:
+            yield Action('move', pirate, to)
+        for lane in rules.quadrant_lanes[quadrant]:
+            if useful_only:
+                attack = rules.hitting_attack[self.arm_locations[lane]]
+                if attack is not None:
+                    yield Action('attack', pirate, lane, attack)
+                if not self.shield_status[lane]:
+                    yield Action('repair', pirate, lane)
+            else:
+                for attack in rules.attacks:
+                    yield Action('attack', pirate, lane, attack)
+                yield Action('repair', pirate, lane)
+        if self.kraken_location < rules.entry_location:
+            yield Action('annoy', pirate)
+        elif self.kraken_location == rules.entry_location:
+            for lane in range(rules.lanes):
+                yield Action('annoy', pirate, lane)
+        elif not useful_only:
+            yield Action('annoy', pirate)
 
     def move_pirate(self, pirate: Pirate, to: int):
         """checks for the legality of the move and updates the board"""
@@ -240,28 +594,21 @@ class GameBoard:
         legal_moves = self.legal_pirate_moves[pirate_quadrant]
         if to in (legal_moves):
             self.pirate_quadrants[pirate] = to
+            self._record('move_pirate', (pirate, to), (pirate, pirate_quadrant))
         else:
             raise IllegalMove(f'can only go to quadrants {legal_moves} from quadrant {pirate_quadrant}')
         
     def perform_pirate_attack(self, pirate: Pirate, attack: str, lane: int):
-        hit = False
         pirate_quadrant = self.pirate_quadrants.get(pirate)
         if pirate_quadrant is None:
             raise IllegalMove(f'{pirate} is not on the board')
-        if lane // 2 != pirate_quadrant:
+        if lane not in self.rules.quadrant_lanes[pirate_quadrant]:
             raise IllegalMove(f'{pirate} cannot attack lane {lane} from quadrant {pirate_quadrant}')
-        else:
-            match attack, self.arm_locations[lane]:
-                case 'sword', 3:
-                    hit = True
-                case 'pistol', 2:
-                    hit = True
-                case 'cannon', 1:
-                    hit = True
-                case _:
-                    pass
-        if hit:
+        self._record('perform_pirate_attack', (pirate, attack, lane),
+                     (lane, self.arm_locations[lane], self.kraken_damage))
+        if self.rules.attack_hits.get(attack) == self.arm_locations[lane]:
             self.arm_locations[lane] -= 1
+            self._drawn_rows[self.rules.lane_row[lane]] = None
             if self.kraken_lane is not None:
                 if self.kraken_lane == lane:
                     self.kraken_damage += 1
@@ -271,27 +618,213 @@ class GameBoard:
         pirate_quadrant = self.pirate_quadrants.get(pirate)
         if pirate_quadrant is None:
             raise IllegalMove(f'{pirate} is not on the board')
-        if lane // 2 != pirate_quadrant:
+        if lane not in self.rules.quadrant_lanes[pirate_quadrant]:
             raise IllegalMove(f'{pirate} cannot repair lane {lane} from quadrant {pirate_quadrant}')
         else:
+            self._record('perform_repair', (pirate, lane), (lane, self.shield_status[lane]))
             if self.shield_status[lane] == False:
                 self.shield_status[lane] = True
+                self._drawn_rows[self.rules.lane_row[lane]] = None
             else:
                 pass
 
     def annoy_kraken(self, lane: Optional[int]=None):
-        if self.kraken_location > 8:
+        delta = (self.kraken_location, self.kraken_lane)
+        if self.kraken_location > self.rules.entry_location:
             pass # Kraken is already on the board
-        elif self.kraken_location == 8:
+        elif self.kraken_location == self.rules.entry_location:
             if lane is None:
                 raise IllegalMove('must specify to which lane the Kraken will go')
+            elif lane not in range(self.rules.lanes):
+                raise IllegalMove(f'the Kraken cannot go to lane {lane}, there are {self.rules.lanes} lanes')
             else:
-                self.kraken_location = 9
+                self.kraken_location = self.rules.board_location
                 self.kraken_lane = lane
+                self.invalidate_drawing()
         else:
             self.kraken_location += 1
+        self._record('annoy_kraken', (lane,), delta)
+
+    @property
+    def is_kraken_on_board(self) -> bool:
+        return (self.kraken_location == self.rules.board_location) and (self.kraken_lane is not None)
+            
+
+def dice_counts_at(kraken_location: int) -> Optional[Dict[str, int]]:
+    """Dice counts grow according to the location of the Kraken, by the standard rules"""
+    if 0 <= kraken_location < STANDARD_RULES.track_length:
+        return dict(STANDARD_RULES.dice_counts[kraken_location])
+
+
+@lru_cache(maxsize=None)
+def color_move_distribution(num: int) -> Tuple[Tuple[Tuple[int, ...], int], ...]:
+    """the number of ways `num` dice of one color move the kraken's arms in that color's 4 lanes,
+    as (moves per lane, number of rolls) pairs, equal outcomes are collapsed"""
+    counts = Counter()
+    for roll in product(range(6), repeat=num):
+        moves = [0, 0, 0, 0]
+        for dice_roll in roll:
+            if dice_roll == 5: # blank facet
+                pass
+            elif 0 <= dice_roll <= 3: # single lane
+                moves[dice_roll] += 1
+            else: # the eye!
+                moves = [m + 1 for m in moves]
+        counts[tuple(moves)] += 1
+    return tuple(counts.items())
+
+
+@lru_cache(maxsize=None)
+def kraken_move_distribution(red: int, blue: int) -> Tuple[Tuple[Tuple[int, ...], Fraction], ...]:
+    """the exact distribution of the number of kraken moves per lane (0 to 7)
+    when rolling `red` red dice and `blue` blue dice"""
+    # imported here, most games never need exact probabilities
+    from fractions import Fraction
+    total = 6 ** (red + blue)
+    return tuple(
+        ((*blue_moves, *red_moves), Fraction(blue_count * red_count, total))
+        for red_moves, red_count in color_move_distribution(red)
+        for blue_moves, blue_count in color_move_distribution(blue)
+        )
+
+
+class PackedBoard:
+    """A game board state packed into a single int (see `GameBoard.to_packed`)
+
+    Copying, hashing and comparing a state are single int operations,
+    which makes it suitable for holding many states in search and self-play
+    """
+    __slots__ = ('state',)
+
+    def __init__(self, state: int):
+        self.state = state
+
+    @classmethod
+    def from_board(cls, board: GameBoard) -> PackedBoard:
+        return cls(board.to_packed())
+
+    def to_board(self, seed: int=42) -> GameBoard:
+        return GameBoard.from_packed(self.state, seed=seed)
+
+    def copy(self) -> PackedBoard:
+        return PackedBoard(self.state)
+
+    def __hash__(self):
+        return self.state.__hash__()
+
+    def __eq__(self, value):
+        if isinstance(value, PackedBoard):
+            return self.state == value.state
+        else:
+            return False
+
+    def __repr__(self):
+        return f"<PackedBoard: {self.state:#x}>"
+
+    @property
+    def shield_mask(self) -> int:
+        return self.state & 0xFF
+
+    def shield_status(self, lane: int) -> bool:
+        return bool((self.state >> lane) & 1)
+
+    def arm_location(self, lane: int) -> int:
+        return (self.state >> (ARM_SHIFT + lane*2)) & 3
+
+    @property
+    def arm_locations(self) -> Tuple[int, ...]:
+        return tuple(self.arm_location(lane) for lane in range(8))
+
+    @property
+    def kraken_location(self) -> int:
+        return (self.state >> KRAKEN_LOCATION_SHIFT) & 0xF
+
+    @property
+    def kraken_lane(self) -> Optional[int]:
+        lane = (self.state >> KRAKEN_LANE_SHIFT) & 0xF
+        return None if lane == 0 else lane - 1
+
+    @property
+    def kraken_damage(self) -> int:
+        return (self.state >> KRAKEN_DAMAGE_SHIFT) & 3
+
+    @property
+    def pirate_quadrants(self) -> Dict[Pirate, int]:
+        result = {}
+        for i, pirate_class in enumerate(PIRATES):
+            quadrant = (self.state >> (PIRATE_SHIFT + i*3)) & 7
+            if quadrant:
+                result[pirate_class()] = quadrant - 1
+        return result
+
+    @property
+    def ship_hole_positions(self) -> Tuple[int, ...]:
+        holes = self.state >> HOLES_SHIFT
+        result = []
+        while holes > 1:
+            result.append(holes & 3)
+            holes >>= 2
+        return tuple(result)
+
+    @property
+    def hole_count(self) -> int:
+        return ((self.state >> HOLES_SHIFT).bit_length() - 1) // 2
 
     @property
     def is_kraken_on_board(self) -> bool:
         return (self.kraken_location == 9) and (self.kraken_lane is not None)
-            
\ No newline at end of file
+
+    @property
+    def dice_counts(self) -> Dict[str, int]:
+        return dice_counts_at(self.kraken_location)
+
+    def after_kraken_moves(self, moves: Sequence[int]) -> PackedBoard:
+        """the state after the given number of kraken moves per lane,
+        see `GameBoard.determine_board_after_kraken_move`.
+        The holes stay sorted, as in `pack_state`"""
+        state = self.state
+        hole_counts = None
+        for lane, count in enumerate(moves):
+            if count == 0:
+                continue
+            shift = ARM_SHIFT + lane*2
+            advance = min(count, 3 - ((state >> shift) & 3))
+            state += advance << shift
+            count -= advance
+            if count and (state >> lane) & 1: # break a shield
+                state ^= 1 << lane
+                count -= 1
+            if count: # add holes to the ship
+                if hole_counts is None:
+                    hole_counts = [0, 0, 0, 0]
+                    for quadrant in self.ship_hole_positions:
+                        hole_counts[quadrant] += 1
+                hole_counts[lane // 2] += count
+        if hole_counts is None:
+            return PackedBoard(state)
+        return PackedBoard((state & ((1 << HOLES_SHIFT) - 1)) | (_pack_holes(hole_counts) << HOLES_SHIFT))
+
+    def kraken_turn_distribution(self) -> Tuple[Tuple[PackedBoard, Fraction], ...]:
+        """every distinct state the kraken's next turn can lead to, with its exact probability.
+        Rolls that end in the same state are collapsed, results are cached per state"""
+        return _kraken_turn_distribution(self.state)
+
+    def game_outcome(self) -> Optional[str]:
+        """same as `GameBoard.game_outcome`"""
+        outcome = None
+        if self.hole_count >= 4:
+            outcome = 'Kraken drowns ship'
+        elif self.kraken_damage == 3:
+            outcome = 'Kraken retreats'
+        return outcome
+
+
+@lru_cache(maxsize=2**16)
+def _kraken_turn_distribution(state: int) -> Tuple[Tuple[PackedBoard, Fraction], ...]:
+    board = PackedBoard(state)
+    dice_counts = board.dice_counts
+    result: Dict[PackedBoard, Fraction] = {}
+    for moves, probability in kraken_move_distribution(dice_counts['red'], dice_counts['blue']):
+        after = board.after_kraken_moves(moves)
+        result[after] = result.get(after, 0) + probability
+    return tuple(result.items())
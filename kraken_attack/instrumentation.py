@@ -0,0 +1,115 @@
+"""Opt-in call counts, timings and game event counters for boards
+
+`Instrumentation.attach` wraps the hot methods of a single board by setting instance attributes
+that shadow the class's methods, `detach` deletes them. Boards that are not attached run the
+class's methods directly, so instrumentation costs nothing while it is off.
+One instrumentation can be attached to many boards, it sums their counters.
+Clones of an attached board are not attached.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from functools import wraps
+from time import perf_counter_ns
+from typing import Callable, Dict
+
+from kraken_attack.game import GameBoard, IllegalMove
+
+METHODS = (
+    'roll_dice', 'determine_kraken_moves', 'determine_board_after_kraken_move', 'apply_kraken_kernel',
+    'move_pirate', 'perform_pirate_attack', 'perform_repair', 'annoy_kraken', 'undo'
+    )
+EVENTS = ('shields_broken', 'holes_created', 'kraken_hits', 'illegal_moves')
+
+
+class Instrumentation:
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.nanoseconds: Counter = Counter()
+        self.events: Counter = Counter()
+        self.boards: Dict[int, GameBoard] = {} # id(board) -> board
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        for board in list(self.boards.values()):
+            self.detach(board)
+
+    def reset(self):
+        self.calls.clear()
+        self.nanoseconds.clear()
+        self.events.clear()
+
+    def attach(self, board: GameBoard) -> GameBoard:
+        """starts counting the board's calls and events, returns the board"""
+        assert not any(method in vars(board) for method in METHODS), f"the board is already instrumented"
+        for method in METHODS:
+            setattr(board, method, self._wrap(board, method, getattr(board, method)))
+        self.boards[id(board)] = board
+        return board
+
+    def detach(self, board: GameBoard):
+        for method in METHODS:
+            delattr(board, method)
+        del self.boards[id(board)]
+
+    def _wrap(self, board: GameBoard, method: str, call: Callable) -> Callable:
+        calls, nanoseconds, events = self.calls, self.nanoseconds, self.events
+
+        @wraps(call)
+        def timed(*args, **kwargs):
+            started = perf_counter_ns()
+            try:
+                return call(*args, **kwargs)
+            except IllegalMove:
+                events['illegal_moves'] += 1
+                raise
+            finally:
+                nanoseconds[method] += perf_counter_ns() - started
+                calls[method] += 1
+
+        if method in ('determine_board_after_kraken_move', 'apply_kraken_kernel'):
+            @wraps(call)
+            def wrapper(*args, **kwargs):
+                shields = board.shield_status.copy()
+                holes = len(board.ship_hole_positions)
+                result = timed(*args, **kwargs)
+                events['shields_broken'] += sum(shields[lane] and not board.shield_status[lane] for lane in shields)
+                events['holes_created'] += len(board.ship_hole_positions) - holes
+                return result
+            return wrapper
+        if method == 'perform_pirate_attack':
+            @wraps(call)
+            def wrapper(*args, **kwargs):
+                damage = board.kraken_damage
+                result = timed(*args, **kwargs)
+                events['kraken_hits'] += board.kraken_damage - damage
+                return result
+            return wrapper
+        return timed
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """call counts and cumulative seconds per method, and the event counts"""
+        return {
+            'calls': {method: self.calls[method] for method in METHODS},
+            'seconds': {method: self.nanoseconds[method] / 1e9 for method in METHODS},
+            'events': {event: self.events[event] for event in EVENTS},
+            }
+
+    def prometheus(self, prefix: str='kraken') -> str:
+        """the snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f'# HELP {prefix}_calls_total GameBoard method calls',
+            f'# TYPE {prefix}_calls_total counter',
+            *(f'{prefix}_calls_total{{method="{m}"}} {n}' for m, n in snapshot['calls'].items()),
+            f'# HELP {prefix}_seconds_total time spent in GameBoard methods',
+            f'# TYPE {prefix}_seconds_total counter',
+            *(f'{prefix}_seconds_total{{method="{m}"}} {s:.9f}' for m, s in snapshot['seconds'].items()),
+            f'# HELP {prefix}_events_total game events',
+            f'# TYPE {prefix}_events_total counter',
+            *(f'{prefix}_events_total{{event="{e}"}} {n}' for e, n in snapshot['events'].items()),
+            ]
+        return '\n'.join(lines) + '\n'
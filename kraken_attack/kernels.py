@@ -0,0 +1,115 @@
+"""Precomputed kraken turn transitions
+
+A lane's state is its arm location and shield, `lane_state(arm, shield)`, and the effect
+of k kraken moves on a lane is `LANE_TRANSITION[state][k]`: the lane's new state and the
+number of holes it adds to the ship.
+The dice counts have five tiers, for every tier a `TierKernel` holds the kraken moves of every
+possible roll, indexed by `roll_index`, as the list `GameBoard.determine_kraken_moves` returns,
+and the lanes the roll moves with their number of moves. Kernels are built the first time their
+tier is asked for and kept, the largest tier has 6**6 rolls.
+
+`GameBoard.apply_kraken_kernel` moves the board by a roll's index with these tables,
+`kraken_turn` (also `kraken_attack.play.kraken_turn`) rolls the dice and applies the roll's kernel.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import product
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+from kraken_attack.rules import STANDARD_RULES
+
+if TYPE_CHECKING:
+    from kraken_attack.game import GameBoard
+
+# the most moves a roll gives a single lane, every die of the lane's color can move it once
+MAX_LANE_MOVES = 3
+
+
+def lane_state(arm_location: int, shield: bool) -> int:
+    return arm_location | (shield << 2)
+
+
+def _lane_transition(state: int, moves: int) -> Tuple[int, int]:
+    arm_location, shield, holes = state & 3, bool(state >> 2), 0
+    for _ in range(moves):
+        if arm_location < 3:
+            arm_location += 1
+        elif shield: # break a shield
+            shield = False
+        else: # add a hole to the ship
+            holes += 1
+    return lane_state(arm_location, shield), holes
+
+
+# lane state -> number of moves -> (lane state, holes added)
+LANE_TRANSITION: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(
+    tuple(_lane_transition(state, moves) for moves in range(MAX_LANE_MOVES + 1)) for state in range(8)
+    )
+
+
+class TierKernel(NamedTuple):
+    """the kraken moves of every roll of `red` red dice followed by `blue` blue dice, by roll index,
+    and the (lane, number of moves) pairs of the lanes the roll moves, by lane"""
+    red: int
+    blue: int
+    moves: Tuple[Tuple[int, ...], ...]
+    lane_moves: Tuple[Tuple[Tuple[int, int], ...], ...]
+
+
+def _roll_moves(colors: Tuple[str, ...], roll: Tuple[int, ...]) -> Tuple[int, ...]:
+    moves: List[int] = []
+    for color, dice_roll in zip(colors, roll):
+        offset = 4 if color == 'red' else 0
+        if dice_roll <= 3: # single lane
+            moves.append(dice_roll + offset)
+        elif dice_roll == 4: # the eye!
+            moves.extend(range(offset, offset + 4))
+    return tuple(moves)
+
+
+@lru_cache(maxsize=None)
+def tier_kernel(red: int, blue: int) -> TierKernel:
+    colors = ('red',) * red + ('blue',) * blue
+    moves, lane_moves = [], []
+    for roll in product(range(6), repeat=red + blue):
+        roll_moves = _roll_moves(colors, roll)
+        counts = [0] * 8
+        for lane in roll_moves:
+            counts[lane] += 1
+        moves.append(roll_moves)
+        lane_moves.append(tuple((lane, count) for lane, count in enumerate(counts) if count))
+    return TierKernel(red, blue, tuple(moves), tuple(lane_moves))
+
+
+def roll_index(roll_outcome: List[Tuple[str, int]]) -> Optional[Tuple[int, int, int]]:
+    """(red dice, blue dice, index) of a roll whose red dice come before its blue dice,
+    as `GameBoard.roll_dice` rolls them, None for rolls in any other order"""
+    red = blue = index = 0
+    for color, dice_roll in roll_outcome:
+        if color == 'red':
+            if blue:
+                return None
+            red += 1
+        else:
+            blue += 1
+        index = index * 6 + dice_roll
+    return red, blue, index
+
+
+def kraken_turn(board: GameBoard, roll_outcome: Optional[List[Tuple[str, int]]]=None) -> List[int]:
+    """rolls the dice (unless a roll is given) and moves the kraken, returns the kraken moves.
+    The same as `determine_board_after_kraken_move(determine_kraken_moves(roll_outcome))`,
+    rolls that are not in the kernel of the board's dice counts and boards of other rules
+    are played by those methods"""
+    if roll_outcome is None:
+        roll_outcome = board.roll_dice()
+    indexed = roll_index(roll_outcome) if board.rules is STANDARD_RULES else None
+    if indexed is not None:
+        red, blue, index = indexed
+        dice_counts = board.rules.dice_counts[board.kraken_location]
+        if red == dice_counts['red'] and blue == dice_counts['blue']:
+            return board.apply_kraken_kernel(index)
+    kraken_moves = board.determine_kraken_moves(roll_outcome)
+    board.determine_board_after_kraken_move(kraken_moves)
+    return kraken_moves
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from hashlib import blake2b
+from random import Random
+from typing import Callable, Dict, Optional, Tuple
+
+from kraken_attack.game import Action, GameBoard, Pirate
+# the kraken's turn by the precomputed kernels, `kraken_turn(board)` rolls the dice and moves the kraken
+from kraken_attack.kernels import kraken_turn
+
+# a strategy chooses the pirates' action for a turn, it gets its own rng
+# so that its choices do not change the dice of the game.
+# Strategies that are sent to worker processes need to be module level functions
+Strategy = Callable[[GameBoard, Random], Action]
+
+
+def random_strategy(board: GameBoard, rng: Random) -> Action:
+    """a uniformly random useful action of a random pirate"""
+    actions = [action for pirate in board.pirates for action in board.legal_actions(pirate, useful_only=True)]
+    return rng.choice(actions)
+
+
+def game_seed(seed: int, strategy: str, config: int, game: int) -> int:
+    """the seed of a single game depends only on the tournament seed and the game itself,
+    so results do not depend on how the games are spread over workers"""
+    digest = blake2b(f'{seed}:{strategy}:{config}:{game}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def play_game(strategy: Strategy, pirate_quadrants: Dict[Pirate, int],
+              seed: int=42, max_turns: int=200) -> Tuple[Optional[str], int]:
+    """plays a game where every turn is one pirate action followed by the kraken's turn,
+    returns the game outcome (None if the game did not end in max_turns) and the number of turns"""
+    board = GameBoard(dict(pirate_quadrants), seed=seed)
+    rng = Random(f'{seed}:strategy')
+    for turn in range(1, max_turns + 1):
+        board.apply(strategy(board, rng))
+        outcome = board.game_outcome()
+        if outcome is not None:
+            return outcome, turn
+        kraken_turn(board)
+        outcome = board.game_outcome()
+        if outcome is not None:
+            return outcome, turn
+    return None, max_turns
@@ -0,0 +1,274 @@
+"""A compact binary log of games
+
+A log is a sequence of fixed width records (see `RECORD`):
+kind, three small arguments, the game id, the turn and a 128 bit payload.
+Every game starts with a GAME record followed by a SNAPSHOT of its initial board,
+the board is snapshotted again every `snapshot_every` turns and after every undo (RESET),
+so any turn can be rebuilt by replaying the records that follow the last snapshot.
+Undoing a kraken move takes the game back to the turn of the move, so the records that follow
+are stamped with the turns they are played in again.
+Records of games that are recorded at the same time are interleaved.
+The offset of every game's GAME record is kept in an index file next to the log
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from kraken_attack.game import ATTACKS, GameBoard, PIRATES
+
+# kind, a, b, c, game, turn, payload low 64 bits, payload high 64 bits, 28 bytes without padding
+RECORD = struct.Struct('<BBBBIIQQ')
+# game, offset of its GAME record
+INDEX_RECORD = struct.Struct('<QQ')
+
+GAME = 1            # payload: the seed (mod 2**64)
+SNAPSHOT = 2        # payload: the packed board at the start of the turn
+RESET = 3           # payload: the packed board after an undo
+ROLL = 4            # a, b: red and blue dice counts, payload: the dice, 3 bits each, red first
+KRAKEN_MOVE = 5     # a: the number of moves, payload: the lanes, 3 bits each
+MOVE = 6            # a: pirate, b: quadrant
+ATTACK = 7          # a: pirate, b: index in `ATTACKS` (its length for unknown attacks), c: lane
+REPAIR = 8          # a: pirate, b: lane
+ANNOY = 9           # a: lane + 1, 0 when no lane was given
+END = 10            # a: outcome, see `OUTCOMES`
+
+OUTCOMES: Tuple[Optional[str], ...] = (None, 'Kraken drowns ship', 'Kraken retreats')
+
+MAX_PAYLOAD_BITS = 128
+
+
+class Record(NamedTuple):
+    kind: int
+    a: int
+    b: int
+    c: int
+    game: int
+    turn: int
+    low: int
+    high: int
+
+    @property
+    def payload(self) -> int:
+        return self.low | (self.high << 64)
+
+
+def _pack_lanes(values) -> int:
+    payload = 0
+    for i, value in enumerate(values):
+        payload |= value << (i*3)
+    return payload
+
+
+def _unpack_lanes(payload: int, count: int) -> List[int]:
+    return [(payload >> (i*3)) & 7 for i in range(count)]
+
+
+class GameRecorder:
+    """Appends the dice rolls and board changes of attached boards to a log file
+
+    Writes are buffered, call `close` (or use the recorder as a context manager) to flush them
+    """
+
+    def __init__(self, path: str, snapshot_every: int=10, buffer_size: int=1 << 16):
+        assert snapshot_every > 0
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.file = open(path, 'ab', buffering=buffer_size)
+        self.index_file = open(index_path(path), 'ab')
+        self.games: Dict[int, Tuple[int, int]] = {} # id(board) -> (game, turn)
+        # games appended to an existing log continue its numbering
+        with open(index_path(path), 'rb') as f:
+            self.next_game = max((game + 1 for game, _ in INDEX_RECORD.iter_unpack(f.read())), default=0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self, kind: int, game: int, turn: int, a: int=0, b: int=0, c: int=0, payload: int=0):
+        assert payload.bit_length() <= MAX_PAYLOAD_BITS, f"payload is too large for a record"
+        self.file.write(RECORD.pack(kind, a, b, c, game, turn,
+                                    payload & 0xFFFFFFFFFFFFFFFF, payload >> 64))
+
+    def attach(self, board: GameBoard, seed: int=0, game: Optional[int]=None) -> int:
+        """starts recording a board, returns its game id"""
+        if game is None:
+            game = self.next_game
+        self.next_game = max(self.next_game, game + 1)
+        self.index_file.write(INDEX_RECORD.pack(game, self.file.tell()))
+        self._write(GAME, game, 0, payload=seed & 0xFFFFFFFFFFFFFFFF)
+        self._write(SNAPSHOT, game, 0, payload=board.to_packed())
+        self.games[id(board)] = (game, 0)
+        board.recorder = self
+        return game
+
+    def detach(self, board: GameBoard):
+        """stops recording a board and records its outcome"""
+        game, turn = self.games.pop(id(board))
+        self._write(END, game, turn, a=OUTCOMES.index(board.game_outcome()))
+        board.recorder = None
+
+    def on_roll(self, board: GameBoard, roll_outcome: List[Tuple[str, int]]):
+        game, turn = self.games[id(board)]
+        red = [dice_roll for color, dice_roll in roll_outcome if color == 'red']
+        blue = [dice_roll for color, dice_roll in roll_outcome if color == 'blue']
+        self._write(ROLL, game, turn, a=len(red), b=len(blue), payload=_pack_lanes(red + blue))
+
+    def on_change(self, board: GameBoard, method: str, args: tuple):
+        game, turn = self.games[id(board)]
+        if method == 'determine_board_after_kraken_move':
+            kraken_moves = args[0]
+            self._write(KRAKEN_MOVE, game, turn, a=len(kraken_moves), payload=_pack_lanes(kraken_moves))
+            # the kraken's move ends the turn
+            turn += 1
+            self.games[id(board)] = (game, turn)
+            if turn % self.snapshot_every == 0:
+                self._write(SNAPSHOT, game, turn, payload=board.to_packed())
+        elif method == 'move_pirate':
+            pirate, to = args
+            self._write(MOVE, game, turn, a=pirate.id, b=to)
+        elif method == 'perform_pirate_attack':
+            pirate, attack, lane = args
+            attack = ATTACKS.index(attack) if attack in ATTACKS else len(ATTACKS)
+            self._write(ATTACK, game, turn, a=pirate.id, b=attack, c=lane)
+        elif method == 'perform_repair':
+            pirate, lane = args
+            self._write(REPAIR, game, turn, a=pirate.id, b=lane)
+        elif method == 'annoy_kraken':
+            lane = args[0]
+            self._write(ANNOY, game, turn, a=0 if lane is None else lane + 1)
+
+    def on_undo(self, board: GameBoard, method: str):
+        game, turn = self.games[id(board)]
+        if method == 'determine_board_after_kraken_move':
+            # the turn the kraken's move ended is played again
+            turn -= 1
+            self.games[id(board)] = (game, turn)
+        self._write(RESET, game, turn, payload=board.to_packed())
+
+    def flush(self):
+        self.file.flush()
+        self.index_file.flush()
+
+    def close(self):
+        self.file.close()
+        self.index_file.close()
+
+
+def index_path(path: str) -> str:
+    return path + '.idx'
+
+
+def apply_record(board: GameBoard, record: Record) -> GameBoard:
+    """replays a record on a board, returns the board (a new one for snapshots)"""
+    if record.kind in (SNAPSHOT, RESET):
+        board = GameBoard.from_packed(record.payload)
+    elif record.kind == KRAKEN_MOVE:
+        board.determine_board_after_kraken_move(_unpack_lanes(record.payload, record.a))
+    elif record.kind == MOVE:
+        board.move_pirate(PIRATES[record.a](), record.b)
+    elif record.kind == ATTACK:
+        attack = ATTACKS[record.b] if record.b < len(ATTACKS) else None
+        board.perform_pirate_attack(PIRATES[record.a](), attack, record.c)
+    elif record.kind == REPAIR:
+        board.perform_repair(PIRATES[record.a](), record.b)
+    elif record.kind == ANNOY:
+        board.annoy_kraken(None if record.a == 0 else record.a - 1)
+    return board
+
+
+def roll_outcome(record: Record) -> List[Tuple[str, int]]:
+    """the dice of a ROLL record, as returned by `GameBoard.roll_dice`"""
+    assert record.kind == ROLL
+    dice = _unpack_lanes(record.payload, record.a + record.b)
+    return [*[('red', d) for d in dice[:record.a]], *[('blue', d) for d in dice[record.a:]]]
+
+
+class GameLog:
+    """Reads a game log through mmap, without loading it into memory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        assert size % RECORD.size == 0, f"{path} is not a game log"
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._index: Optional[Dict[int, int]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __len__(self):
+        return len(self.buffer) // RECORD.size
+
+    @property
+    def index(self) -> Dict[int, int]:
+        """game id -> offset of the game's first record, read from the index file
+        or rebuilt by scanning the log when there is none"""
+        if self._index is None:
+            if os.path.exists(index_path(self.path)):
+                with open(index_path(self.path), 'rb') as f:
+                    self._index = dict(INDEX_RECORD.iter_unpack(f.read()))
+            else:
+                self._index = {
+                    record.game: offset for offset, record in self.records() if record.kind == GAME
+                    }
+        return self._index
+
+    def records(self, offset: int=0) -> Iterator[Tuple[int, Record]]:
+        """yields (offset, record) from the offset to the end of the log"""
+        for position in range(offset, len(self.buffer), RECORD.size):
+            yield position, Record(*RECORD.unpack_from(self.buffer, position))
+
+    def game_records(self, game: int) -> Iterator[Record]:
+        """the records of a single game, up to its END record"""
+        for _, record in self.records(self.index[game]):
+            if record.game != game:
+                continue
+            yield record
+            if record.kind == END:
+                return
+
+    def games(self) -> Iterator[Tuple[int, List[Record]]]:
+        """streams (game id, records) for every game in the log, in the order the games end"""
+        open_games: Dict[int, List[Record]] = {}
+        for _, record in self.records():
+            open_games.setdefault(record.game, []).append(record)
+            if record.kind == END:
+                yield record.game, open_games.pop(record.game)
+        yield from open_games.items()
+
+    def board_at(self, game: int, turn: int) -> GameBoard:
+        """the board of a game after `turn` turns, rebuilt from the last snapshot before it.
+        Undone turns are played again later in the log, so the whole game is read"""
+        snapshot, records = None, []
+        for record in self.game_records(game):
+            if record.turn > turn:
+                continue
+            if record.kind == SNAPSHOT:
+                snapshot, records = record, []
+            elif record.turn < turn:
+                records.append(record)
+        assert snapshot is not None, f"game {game} has no snapshot"
+        board = apply_record(None, snapshot)
+        for record in records:
+            board = apply_record(board, record)
+        return board
+
+    def outcome(self, game: int) -> Optional[str]:
+        for record in self.game_records(game):
+            if record.kind == END:
+                return OUTCOMES[record.a]
+        return None
@@ -0,0 +1,141 @@
+"""The rules of the game as a single precompiled object
+
+A `RuleSet` holds the geometry of the ship (quadrants, their lanes and the lanes' colors),
+the quadrants a pirate can move to, the dice rolled at every kraken location, the arm
+locations attacks hit and the win thresholds, together with the lookup tables derived from them.
+`GameBoard` reads every rule from its `rules`, `STANDARD_RULES` by default.
+
+Every color has 4 lanes, one for each lane facet of its dice (the other two facets are the eye
+and the blank), house-rule variants with more lanes and quadrants add colors.
+`rule_set` returns the same instance for the same rules, so the boards of a variant share it.
+Rule sets are immutable, their mappings (`dice_counts`, `roll_moves`, `attack_hits`) are read-only,
+`GameBoard.dice_counts` returns a dict copy of the counts.
+"""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Dict, Tuple
+
+# lane facets per die, a die shows 0 to 3 for a lane of its color, 4 for the eye and 5 for a blank
+DIE_LANES = 4
+EYE = 4
+BLANK = 5
+
+
+class RuleSet:
+
+    __slots__ = (
+        'quadrant_lanes', 'pirate_moves', 'color_lanes', 'initial_arm_locations', 'location_dice',
+        'attack_hits', 'holes_to_sink', 'damage_to_retreat',
+        'lanes', 'quadrants', 'colors', 'lane_quadrant', 'lane_color', 'lane_row', 'lane_right_side', 'rows',
+        'roll_moves', 'max_arm_location', 'attacks', 'hitting_attack', 'dice_counts', 'track_length',
+        'entry_location', 'board_location',
+        )
+
+    def __init__(self, quadrant_lanes: Tuple[Tuple[int, ...], ...], pirate_moves: Tuple[Tuple[int, ...], ...],
+                 color_lanes: Tuple[Tuple[str, Tuple[int, ...]], ...], initial_arm_locations: Tuple[int, ...],
+                 location_dice: Tuple[Tuple[Tuple[str, int], ...], ...], attack_hits: Tuple[Tuple[str, int], ...],
+                 holes_to_sink: int, damage_to_retreat: int):
+        _set = object.__setattr__
+        lanes = sum(len(q) for q in quadrant_lanes)
+        assert sorted(lane for q in quadrant_lanes for lane in q) == list(range(lanes)), f"lanes must be 0 to {lanes - 1}"
+        assert sorted(lane for _, c in color_lanes for lane in c) == list(range(lanes)), f"every lane needs a color"
+        assert all(len(c) == DIE_LANES for _, c in color_lanes), f"every color has {DIE_LANES} lanes"
+        assert lanes % 2 == 0 and len(initial_arm_locations) == lanes
+        assert len(pirate_moves) == len(quadrant_lanes)
+        assert all(0 <= q < len(quadrant_lanes) for moves in pirate_moves for q in moves)
+        assert len(location_dice) >= 2, f"the kraken's track needs an entry and a board location"
+        assert all(sorted(color for color, _ in dice) == sorted(color for color, _ in color_lanes)
+                   for dice in location_dice), f"every location rolls the dice of every color"
+        _set(self, 'quadrant_lanes', quadrant_lanes)
+        _set(self, 'pirate_moves', pirate_moves)
+        _set(self, 'color_lanes', color_lanes)
+        _set(self, 'initial_arm_locations', initial_arm_locations)
+        _set(self, 'location_dice', location_dice)
+        _set(self, 'attack_hits', MappingProxyType(dict(attack_hits)))
+        _set(self, 'holes_to_sink', holes_to_sink)
+        _set(self, 'damage_to_retreat', damage_to_retreat)
+
+        # derived lookups
+        _set(self, 'lanes', lanes)
+        _set(self, 'quadrants', len(quadrant_lanes))
+        _set(self, 'colors', tuple(color for color, _ in color_lanes))
+        _set(self, 'lane_quadrant', tuple(
+            next(q for q, q_lanes in enumerate(quadrant_lanes) if lane in q_lanes) for lane in range(lanes)))
+        _set(self, 'lane_color', tuple(
+            next(color for color, c_lanes in color_lanes if lane in c_lanes) for lane in range(lanes)))
+        # the first half of the lanes is drawn on the left side, lane l and l + half share a row
+        _set(self, 'rows', lanes // 2)
+        _set(self, 'lane_row', tuple(lane % (lanes // 2) for lane in range(lanes)))
+        _set(self, 'lane_right_side', tuple(lane >= lanes // 2 for lane in range(lanes)))
+        # the lanes the kraken moves in for every (color, facet) rolled
+        roll_moves = {}
+        for color, c_lanes in color_lanes:
+            roll_moves.update({(color, facet): (lane,) for facet, lane in enumerate(c_lanes)})
+            roll_moves[color, EYE] = c_lanes
+            roll_moves[color, BLANK] = ()
+        _set(self, 'roll_moves', MappingProxyType(roll_moves))
+        _set(self, 'max_arm_location', max(hit for _, hit in attack_hits))
+        _set(self, 'attacks', tuple(attack for attack, _ in attack_hits))
+        _set(self, 'hitting_attack', tuple(
+            next((attack for attack, hit in attack_hits if hit == location), None)
+            for location in range(self.max_arm_location + 1)))
+        _set(self, 'dice_counts', tuple(MappingProxyType(dict(counts)) for counts in location_dice))
+        _set(self, 'track_length', len(location_dice))
+        # annoying the kraken at the entry location puts it on the board, in a lane
+        _set(self, 'board_location', len(location_dice) - 1)
+        _set(self, 'entry_location', len(location_dice) - 2)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('rule sets are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('rule sets are immutable')
+
+    def __repr__(self):
+        return f"<RuleSet: {self.lanes} lanes, {self.quadrants} quadrants, {self.track_length} kraken locations>"
+
+    def __reduce__(self):
+        return (rule_set, (self.quadrant_lanes, self.pirate_moves, self.color_lanes, self.initial_arm_locations,
+                           self.location_dice, tuple(self.attack_hits.items()), self.holes_to_sink,
+                           self.damage_to_retreat))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# every rule set made by `rule_set`, by its arguments
+_RULE_SETS: Dict[tuple, RuleSet] = {}
+
+
+def rule_set(quadrant_lanes: Tuple[Tuple[int, ...], ...], pirate_moves: Tuple[Tuple[int, ...], ...],
+             color_lanes: Tuple[Tuple[str, Tuple[int, ...]], ...], initial_arm_locations: Tuple[int, ...],
+             location_dice: Tuple[Tuple[Tuple[str, int], ...], ...],
+             attack_hits: Tuple[Tuple[str, int], ...]=(('sword', 3), ('pistol', 2), ('cannon', 1)),
+             holes_to_sink: int=4, damage_to_retreat: int=3) -> RuleSet:
+    """the shared `RuleSet` of these rules, all arguments are tuples so they can be looked up"""
+    key = (quadrant_lanes, pirate_moves, color_lanes, initial_arm_locations, location_dice,
+           attack_hits, holes_to_sink, damage_to_retreat)
+    rules = _RULE_SETS.get(key)
+    if rules is None:
+        rules = _RULE_SETS[key] = RuleSet(*key)
+    return rules
+
+
+STANDARD_RULES = rule_set(
+    quadrant_lanes=((0, 1), (2, 3), (4, 5), (6, 7)),
+    pirate_moves=((1, 2), (0, 3), (0, 3), (1, 2)),
+    color_lanes=(('blue', (0, 1, 2, 3)), ('red', (4, 5, 6, 7))),
+    initial_arm_locations=(2, 1, 1, 0, 2, 1, 1, 0),
+    # red dice are rolled first
+    location_dice=(
+        *((('red', 1), ('blue', 1)),) * 2,
+        *((('red', 2), ('blue', 1)),) * 2,
+        *((('red', 2), ('blue', 2)),) * 2,
+        *((('red', 3), ('blue', 2)),) * 2,
+        *((('red', 3), ('blue', 3)),) * 2,
+        ),
+    )
@@ -0,0 +1,252 @@
+"""Hosts many concurrent games in one asyncio event loop
+
+Every session owns a board and a queue of pirate actions. A session's task takes the actions
+one at a time, applies the action, yields to the other sessions and then plays the kraken's turn.
+After each turn it sends the session's clients a diff of the board through the `Transport`
+instead of a full drawing. `state_diff` computes the diffs and `apply_diff` applies them
+to a client's copy of the board.
+
+    python -m kraken_attack.server --sessions 1000 --actions 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from abc import ABC, abstractmethod
+from random import Random
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from kraken_attack.dice import DiceSource
+from kraken_attack.game import Action, Astrid, Billy, Elena, GameBoard, IllegalMove, PackedBoard, Pirate, PIRATES
+from kraken_attack.play import kraken_turn, random_strategy
+
+Message = Dict[str, object]
+
+
+def state_diff(old: Optional[PackedBoard], new: PackedBoard) -> Dict[str, object]:
+    """the fields of the board that changed, every field when there is no old state.
+    Shields and arms are given per lane, the ship's holes as a whole"""
+    changes: Dict[str, object] = {}
+    if old is None or old.pirate_quadrants != new.pirate_quadrants:
+        changes['pirates'] = {str(pirate): quadrant for pirate, quadrant in new.pirate_quadrants.items()}
+    shields = {lane: new.shield_status(lane) for lane in range(8)
+               if old is None or old.shield_status(lane) != new.shield_status(lane)}
+    if shields:
+        changes['shields'] = shields
+    arms = {lane: new.arm_location(lane) for lane in range(8)
+            if old is None or old.arm_location(lane) != new.arm_location(lane)}
+    if arms:
+        changes['arms'] = arms
+    for field in ('kraken_location', 'kraken_lane', 'kraken_damage'):
+        if old is None or getattr(old, field) != getattr(new, field):
+            changes[field] = getattr(new, field)
+    if old is None or old.ship_hole_positions != new.ship_hole_positions:
+        changes['ship_holes'] = new.ship_hole_positions
+    return changes
+
+
+def apply_diff(board: GameBoard, changes: Dict[str, object]):
+    """updates a client's copy of a board, the changes are not recorded for undo"""
+    if 'pirates' in changes:
+        pirate_classes = {pirate_class.__name__: pirate_class for pirate_class in PIRATES}
+        board.pirate_quadrants = {pirate_classes[name](): q for name, q in changes['pirates'].items()}
+    for lane, shield in changes.get('shields', {}).items():
+        board.shield_status[int(lane)] = shield
+    for lane, arm_location in changes.get('arms', {}).items():
+        board.arm_locations[int(lane)] = arm_location
+    for field in ('kraken_location', 'kraken_lane', 'kraken_damage'):
+        if field in changes:
+            setattr(board, field, changes[field])
+    if 'ship_holes' in changes:
+        board.ship_hole_positions = tuple(changes['ship_holes'])
+    board.invalidate_drawing()
+
+
+class Transport(ABC):
+    """Delivers the messages of a session to its clients"""
+
+    @abstractmethod
+    async def send(self, session: int, message: Message):
+        pass
+
+
+class LoopbackTransport(Transport):
+    """An in memory transport, clients in the same event loop `receive` the messages of a session"""
+
+    def __init__(self):
+        self.queues: Dict[int, asyncio.Queue] = {}
+
+    def _queue(self, session: int) -> asyncio.Queue:
+        queue = self.queues.get(session)
+        if queue is None:
+            queue = self.queues[session] = asyncio.Queue()
+        return queue
+
+    async def send(self, session: int, message: Message):
+        self._queue(session).put_nowait(message)
+
+    async def receive(self, session: int) -> Message:
+        return await self._queue(session).get()
+
+
+class Session:
+
+    def __init__(self, id: int, board: GameBoard):
+        self.id = id
+        self.board = board
+        self.turn = 0
+        self.state = PackedBoard.from_board(board)
+        self.outcome: Optional[str] = None
+        self.actions: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SessionManager:
+    """Runs game sessions in the current event loop
+
+    Every message has the session, its type and the turn:
+    'state' - sent when the session opens, its changes are the full board
+    'diff' - sent after every turn, the changes of the board (see `state_diff`),
+             the kraken's moves and the outcome of the game (None while it goes on)
+    'error' - an action that is not one of the board's legal actions or an action after the game ended,
+              the board did not change. A session goes on after an error
+    """
+
+    def __init__(self, transport: Transport, max_turns: int=200):
+        self.transport = transport
+        self.max_turns = max_turns
+        self.sessions: Dict[int, Session] = {}
+        self.next_id = 0
+
+    async def open_session(self, pirate_quadrants: Dict[Pirate, int], seed: int=42,
+                           dice: Optional[DiceSource]=None) -> int:
+        """starts a game, returns its session id"""
+        session = Session(self.next_id, GameBoard(dict(pirate_quadrants), seed=seed, dice=dice))
+        self.next_id += 1
+        self.sessions[session.id] = session
+        session.task = asyncio.create_task(self._run(session))
+        await self.transport.send(session.id, {
+            'session': session.id, 'type': 'state', 'turn': 0, 'changes': state_diff(None, session.state)
+            })
+        return session.id
+
+    def submit(self, session: int, action: Action):
+        """queues a pirate action, its result is sent to the session's clients"""
+        self.sessions[session].actions.put_nowait(action)
+
+    async def close_session(self, session: int):
+        """stops the session once its queued actions are played"""
+        session = self.sessions.pop(session)
+        session.actions.put_nowait(None)
+        await session.task
+
+    async def close(self):
+        await asyncio.gather(*(self.close_session(session) for session in list(self.sessions)))
+
+    async def _run(self, session: Session):
+        while True:
+            action = await session.actions.get()
+            if action is None:
+                return
+            await self.transport.send(session.id, await self._turn(session, action))
+
+    async def _turn(self, session: Session, action: Action) -> Message:
+        board = session.board
+        if session.outcome is not None or session.turn >= self.max_turns:
+            return {'session': session.id, 'type': 'error', 'turn': session.turn, 'error': 'the game is over'}
+        try:
+            # clients can send anything, only the board's own actions are applied
+            if not any(action == legal for pirate in board.pirates for legal in board.legal_actions(pirate)):
+                raise IllegalMove(f'{action} is not a legal action')
+            board.apply(action)
+            outcome = board.game_outcome()
+            kraken_moves: List[int] = []
+            if outcome is None:
+                await asyncio.sleep(0) # let the other sessions play between the pirates' and the kraken's turns
+                kraken_moves = kraken_turn(board)
+                outcome = board.game_outcome()
+            state = PackedBoard.from_board(board)
+            changes = state_diff(session.state, state)
+        except IllegalMove as e:
+            return {'session': session.id, 'type': 'error', 'turn': session.turn, 'error': str(e)}
+        except Exception as e: # the next diff carries any change the failed turn made
+            return {'session': session.id, 'type': 'error', 'turn': session.turn,
+                    'error': f'{type(e).__name__}: {e}'}
+        # sessions do not undo, the history would only grow
+        board.clear_history()
+        session.turn += 1
+        session.outcome = outcome
+        session.state = state
+        return {
+            'session': session.id, 'type': 'diff', 'turn': session.turn, 'changes': changes,
+            'kraken_moves': kraken_moves, 'outcome': outcome
+            }
+
+
+class LoadReport(NamedTuple):
+    sessions: int
+    actions: int
+    seconds: float
+    # seconds from submitting an action to receiving its diff
+    p50: float
+    p99: float
+
+    @property
+    def actions_per_second(self) -> float:
+        return self.actions / self.seconds
+
+
+CONFIGS: Tuple[Dict[Pirate, int], ...] = ({Elena(): 0, Billy(): 3}, {Astrid(): 2}, {Astrid(): 1, Elena(): 2})
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """the nearest rank percentile of sorted values"""
+    assert values, 'no values'
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+async def load_test(sessions: int=1000, actions: int=20, seed: int=42) -> LoadReport:
+    """every session gets a client that plays random actions on a copy of the board
+    it keeps with the diffs, until its game ends or it played `actions` actions"""
+    transport = LoopbackTransport()
+    manager = SessionManager(transport)
+    latencies: List[float] = []
+
+    async def client(i: int):
+        config = CONFIGS[i % len(CONFIGS)]
+        rng = Random(f'{seed}:{i}')
+        session = await manager.open_session(config, seed=rng.getrandbits(32))
+        board = GameBoard(dict(config))
+        apply_diff(board, (await transport.receive(session))['changes'])
+        for _ in range(actions):
+            started = perf_counter()
+            manager.submit(session, random_strategy(board, rng))
+            message = await transport.receive(session)
+            latencies.append(perf_counter() - started)
+            apply_diff(board, message['changes'])
+            if message['outcome'] is not None:
+                break
+
+    started = perf_counter()
+    await asyncio.gather(*(client(i) for i in range(sessions)))
+    seconds = perf_counter() - started
+    await manager.close()
+    latencies.sort()
+    return LoadReport(sessions, len(latencies), seconds, percentile(latencies, 50), percentile(latencies, 99))
+
+
+def main(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(description='load tests the session manager over the loopback transport')
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--actions', type=int, default=20, help='actions per session')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    report = asyncio.run(load_test(args.sessions, args.actions, args.seed))
+    print(f'{report.sessions} sessions, {report.actions} actions in {report.seconds:.2f}s '
+          f'({report.actions_per_second:.0f} actions/s)')
+    print(f'action latency p50 {report.p50 * 1e3:.2f} ms, p99 {report.p99 * 1e3:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from random import Random
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from kraken_attack.dice import BufferedDice
+from kraken_attack.game import Action, GameBoard, HOLES_SHIFT, PackedBoard
+
+# the value of a state is the pirates' probability of winning
+WIN = 1.0
+LOSS = 0.0
+
+
+def evaluate(state: PackedBoard) -> float:
+    """a rough estimate of the pirates' probability of winning from a state,
+    used where the search stops before the game is over"""
+    outcome = terminal_value(state)
+    if outcome is not None:
+        return outcome
+    broken_shields = 8 - state.shield_mask.bit_count()
+    advanced_arms = sum(state.arm_locations)
+    value = 0.5
+    value += 0.5 * state.kraken_damage / 3
+    value -= 0.4 * state.hole_count / 4
+    value -= 0.05 * broken_shields / 8
+    value -= 0.05 * advanced_arms / 24
+    return min(max(value, LOSS), WIN)
+
+
+def terminal_value(state: PackedBoard) -> Optional[float]:
+    """the value of a concluded game, None while the game goes on"""
+    if state.hole_count >= 4:
+        return LOSS
+    elif state.kraken_damage == 3:
+        return WIN
+    else:
+        return None
+
+
+def candidate_actions(board: GameBoard) -> List[Action]:
+    """the useful legal actions of all pirates (see `GameBoard.legal_actions`).
+    Annoying the kraken does not depend on the pirate so it is only offered once"""
+    actions = []
+    annoying = []
+    for i, pirate in enumerate(board.pirates):
+        for action in board.legal_actions(pirate, useful_only=True):
+            if action.kind != 'annoy':
+                actions.append(action)
+            elif i == 0:
+                annoying.append(action)
+    return actions + annoying
+
+
+def normalize(state: PackedBoard) -> PackedBoard:
+    """the state with its holes sorted, packed states are sorted unless made from an int directly"""
+    holes = state.ship_hole_positions
+    if all(a <= b for a, b in zip(holes, holes[1:])):
+        return state
+    field = 1
+    for quadrant in reversed(sorted(holes)):
+        field = (field << 2) | quadrant
+    return PackedBoard((state.state & ((1 << HOLES_SHIFT) - 1)) | (field << HOLES_SHIFT))
+
+
+# search boards never roll, they share empty dice instead of seeding a `Random` each
+_NO_DICE = BufferedDice(())
+
+
+def search_board(state: PackedBoard) -> GameBoard:
+    """the board of a state, to list and apply actions on, it cannot roll the dice"""
+    return GameBoard.from_packed(state.state, dice=_NO_DICE)
+
+
+def after_action(state: PackedBoard, action: Action) -> PackedBoard:
+    """the state after a pirate action"""
+    board = search_board(state)
+    board.apply(action)
+    return PackedBoard.from_board(board)
+
+
+class TranspositionTable:
+    """A bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, max_size: int):
+        assert max_size > 0
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: Hashable):
+        self.lookups += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+
+class SolverStats:
+
+    def __init__(self):
+        self.nodes = 0
+        self.table_lookups = 0
+        self.table_hits = 0
+        self.elapsed = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.table_hits / self.table_lookups if self.table_lookups > 0 else 0.0
+
+    def __repr__(self):
+        return (f"<SolverStats: {self.nodes} nodes, {self.nodes_per_second:.0f} nodes/sec, "
+                f"hit rate {self.hit_rate:.1%}>")
+
+
+class _Node:
+    __slots__ = ('actions', 'visits', 'action_visits', 'action_values')
+
+    def __init__(self, actions: List[Action]):
+        self.actions = actions
+        self.visits = 0
+        self.action_visits = [0] * len(actions)
+        self.action_values = [0.0] * len(actions)
+
+
+class Solver:
+    """Chooses the pirates' action for a turn, where a turn is one pirate action followed by the kraken's turn
+
+    `best_action` runs an expectimax search to a fixed depth of turns,
+    averaging over the exact kraken turn distribution at chance nodes.
+    `mcts` runs a Monte Carlo tree search (UCT) for a time budget, sampling the kraken's turns.
+    Both keep evaluated positions in a bounded transposition table keyed on the normalized packed state
+    (see `normalize`) and report their work in `stats`
+    """
+
+    def __init__(self, depth: int=2, table_size: int=2**18,
+                 evaluate: Callable[[PackedBoard], float]=evaluate, seed: int=42):
+        assert depth > 0, f"the search depth needs to be at least 1"
+        self.depth = depth
+        self.evaluate = evaluate
+        self.table = TranspositionTable(table_size)
+        self.tree = TranspositionTable(table_size)
+        self.rng = Random(seed)
+        self.stats = SolverStats()
+
+    def _update_stats(self, started: float):
+        self.stats.elapsed += time.perf_counter() - started
+        self.stats.table_lookups = self.table.lookups + self.tree.lookups
+        self.stats.table_hits = self.table.hits + self.tree.hits
+
+    def value(self, state: PackedBoard, depth: int) -> float:
+        """the expectimax value of a state with the pirates to act, searching `depth` turns"""
+        outcome = terminal_value(state)
+        if outcome is not None:
+            return outcome
+        if depth == 0:
+            self.stats.nodes += 1
+            return self.evaluate(state)
+        key = (normalize(state).state, depth)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+        self.stats.nodes += 1
+        board = search_board(state)
+        result = max(self.action_value(state, action, depth) for action in candidate_actions(board))
+        self.table.put(key, result)
+        return result
+
+    def action_value(self, state: PackedBoard, action: Action, depth: int) -> float:
+        after = after_action(state, action)
+        outcome = terminal_value(after)
+        if outcome is not None:
+            return outcome
+        return sum(
+            float(probability) * self.value(next_state, depth - 1)
+            for next_state, probability in after.kraken_turn_distribution()
+            )
+
+    def best_action(self, board: GameBoard, depth: Optional[int]=None) -> Action:
+        """the expectimax action for the pirates"""
+        depth = self.depth if depth is None else depth
+        started = time.perf_counter()
+        state = PackedBoard.from_board(board)
+        best, best_value = None, -math.inf
+        for action in candidate_actions(board):
+            action_value = self.action_value(state, action, depth)
+            if action_value > best_value:
+                best, best_value = action, action_value
+        self._update_stats(started)
+        return best
+
+    def _sample_kraken_turn(self, state: PackedBoard) -> PackedBoard:
+        distribution = state.kraken_turn_distribution()
+        states = [s for s, _ in distribution]
+        weights = [float(p) for _, p in distribution]
+        return self.rng.choices(states, weights)[0]
+
+    def _rollout(self, state: PackedBoard, turns: int) -> float:
+        for _ in range(turns):
+            outcome = terminal_value(state)
+            if outcome is not None:
+                return outcome
+            action = self.rng.choice(candidate_actions(search_board(state)))
+            state = after_action(state, action)
+            if terminal_value(state) is None:
+                state = self._sample_kraken_turn(state)
+        return self.evaluate(state)
+
+    def _mcts_iteration(self, root: PackedBoard, exploration: float, rollout_turns: int):
+        path: List[Tuple[_Node, int]] = []
+        state = root
+        while True:
+            value = terminal_value(state)
+            if value is not None:
+                break
+            key = normalize(state).state
+            node = self.tree.get(key)
+            if node is None:
+                self.stats.nodes += 1
+                self.tree.put(key, _Node(candidate_actions(search_board(state))))
+                value = self._rollout(state, rollout_turns)
+                break
+            index = self._select(node, exploration)
+            path.append((node, index))
+            state = after_action(state, node.actions[index])
+            if terminal_value(state) is None:
+                state = self._sample_kraken_turn(state)
+        for node, index in path:
+            node.visits += 1
+            node.action_visits[index] += 1
+            node.action_values[index] += value
+
+    def _select(self, node: _Node, exploration: float) -> int:
+        best, best_score = 0, -math.inf
+        log_visits = math.log(node.visits + 1)
+        for i, visits in enumerate(node.action_visits):
+            if visits == 0:
+                return i
+            score = node.action_values[i] / visits + exploration * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best, best_score = i, score
+        return best
+
+    def mcts(self, board: GameBoard, time_budget: float, exploration: float=1.4,
+             rollout_turns: int=10, max_iterations: Optional[int]=None) -> Optional[Action]:
+        """the most visited root action of a Monte Carlo tree search that runs
+        for `time_budget` seconds (or `max_iterations` iterations), always at least once.
+        None when the game on the board is concluded"""
+        started = time.perf_counter()
+        root = PackedBoard.from_board(board)
+        iterations = 0
+        while True:
+            self._mcts_iteration(root, exploration, rollout_turns)
+            iterations += 1
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            if time.perf_counter() - started >= time_budget:
+                break
+        node = self.tree.get(normalize(root).state)
+        self._update_stats(started)
+        if node is None: # the root is a concluded game
+            return None
+        return node.actions[max(range(len(node.actions)), key=node.action_visits.__getitem__)]
@@ -0,0 +1,114 @@
+"""Symmetries of the board
+
+The dice pick lanes within a color uniformly, so the two lanes of a quadrant can be swapped,
+and swapping quadrants 0 with 1 and 2 with 3 (lanes 0,1 with 2,3 and 4,5 with 6,7) keeps
+both the colors and `LEGAL_PIRATE_MOVES`. Together they make a group of 32 lane permutations.
+Blue and red lanes do not mirror each other, the kraken rolls more red dice than blue ones
+at some locations. Pirates are interchangeable, only the quadrants they are in matter,
+and so is the order of the ship's holes.
+"""
+from __future__ import annotations
+
+from typing import Dict, NamedTuple, Tuple, Union
+
+from kraken_attack.game import Action, GameBoard, PackedBoard, PIRATES, Pirate, pack_state
+
+
+class Transform(NamedTuple):
+    """A board symmetry
+
+    swaps - bit q swaps the two lanes of quadrant q
+    mirror - swaps quadrants 0 with 1 and 2 with 3
+    pirates - the pirate each pirate becomes, by index in `PIRATES`
+    """
+    swaps: int
+    mirror: bool
+    pirates: Tuple[int, ...]
+
+    def lane(self, lane: int) -> int:
+        if (self.swaps >> (lane // 2)) & 1:
+            lane ^= 1
+        if self.mirror:
+            lane ^= 2
+        return lane
+
+    def quadrant(self, quadrant: int) -> int:
+        return quadrant ^ 1 if self.mirror else quadrant
+
+    def pirate(self, pirate: Pirate) -> Pirate:
+        return PIRATES[self.pirates[pirate.id]]()
+
+    def inverse(self) -> Transform:
+        # the swaps are applied before the mirror, undoing the mirror moves them to the other quadrants
+        swaps = self.swaps
+        if self.mirror:
+            swaps = ((swaps & 0b0101) << 1) | ((swaps & 0b1010) >> 1)
+        pirates = [0] * len(self.pirates)
+        for i, j in enumerate(self.pirates):
+            pirates[j] = i
+        return Transform(swaps, self.mirror, tuple(pirates))
+
+
+IDENTITY = Transform(0, False, tuple(range(len(PIRATES))))
+
+LANE_TRANSFORMS: Tuple[Transform, ...] = tuple(
+    Transform(swaps, mirror, IDENTITY.pirates) for mirror in (False, True) for swaps in range(16)
+    )
+
+
+def transform_state(state: PackedBoard, transform: Transform) -> PackedBoard:
+    """the state as seen through a transform, holes are sorted"""
+    arm_locations = [0] * 8
+    shield_status = [False] * 8
+    for lane in range(8):
+        arm_locations[transform.lane(lane)] = state.arm_location(lane)
+        shield_status[transform.lane(lane)] = state.shield_status(lane)
+    kraken_lane = state.kraken_lane
+    return PackedBoard(pack_state(
+        {transform.pirate(p): transform.quadrant(q) for p, q in state.pirate_quadrants.items()},
+        shield_status, arm_locations, state.kraken_location,
+        None if kraken_lane is None else transform.lane(kraken_lane), state.kraken_damage,
+        sorted(transform.quadrant(q) for q in state.ship_hole_positions)
+        ))
+
+
+def _canonical_pirates(pirate_quadrants: Dict[Pirate, int], transform: Transform) -> Tuple[int, ...]:
+    """the pirate permutation that renames the present pirates, by their quadrants after the transform,
+    to the first pirates of `PIRATES`"""
+    present = sorted(p.id for p in pirate_quadrants)
+    by_quadrant = sorted(present, key=lambda i: (transform.quadrant(pirate_quadrants[PIRATES[i]()]), i))
+    absent = [i for i in range(len(PIRATES)) if i not in present]
+    pirates = [0] * len(PIRATES)
+    for j, i in enumerate(by_quadrant + absent):
+        pirates[i] = j
+    return tuple(pirates)
+
+
+def canonicalize(board: Union[GameBoard, PackedBoard]) -> Tuple[PackedBoard, Transform]:
+    """the canonical representative of the board's symmetry class (the smallest packed state)
+    and the transform that maps the board to it"""
+    state = board if isinstance(board, PackedBoard) else PackedBoard.from_board(board)
+    pirate_quadrants = state.pirate_quadrants
+    best = None
+    for lane_transform in LANE_TRANSFORMS:
+        transform = lane_transform._replace(pirates=_canonical_pirates(pirate_quadrants, lane_transform))
+        candidate = transform_state(state, transform)
+        if best is None or candidate.state < best[0].state:
+            best = (candidate, transform)
+    return best
+
+
+def transform_action(action: Action, transform: Transform) -> Action:
+    """the action as seen through a transform"""
+    if action.kind == 'move':
+        target = transform.quadrant(action.target)
+    elif action.target is None:
+        target = None
+    else:
+        target = transform.lane(action.target)
+    return action._replace(pirate=transform.pirate(action.pirate), target=target)
+
+
+def original_action(action: Action, transform: Transform) -> Action:
+    """maps an action chosen on the canonical board back to the board that was canonicalized"""
+    return transform_action(action, transform.inverse())
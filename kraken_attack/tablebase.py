@@ -0,0 +1,197 @@
+"""A solved position database
+
+`enumerate_states` walks every state reachable from a starting position (pirate actions
+followed by kraken turns), `solve` runs value iteration over the kraken's chance nodes
+to find each state's win probability under optimal pirate play, and `write_table`
+stores the values in an open addressing hash table on disk that `SolvedTable`
+memory maps for O(1) lookups (see `GameBoard.lookup_value`).
+
+The order of holes does not change the value of a state so holes are sorted.
+The state space of the full game is far too large to enumerate in Python, `max_states`
+stops the enumeration early, the states it did not reach are valued with
+`kraken_attack.solver.evaluate` and the table is then exact only for the states
+whose futures were fully enumerated.
+
+    python -m kraken_attack.tablebase table.kts Elena=0 Astrid=2 --max-states 10000
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from kraken_attack.dice import splitmix64
+from kraken_attack.game import GameBoard, PackedBoard, PIRATES, Pirate
+from kraken_attack.solver import after_action, candidate_actions, evaluate, normalize, search_board, terminal_value
+
+MAGIC = b'KRKNTB01'
+# magic, capacity, number of states
+HEADER = struct.Struct('<8sQQ')
+EMPTY = 0 # packed states always have the holes' sentinel bit set, so they are never 0
+
+# an action's value is its constant part (concluded games and states that were not enumerated)
+# plus the probability weighted values of the enumerated states it leads to
+Transition = Tuple[float, List[Tuple[int, float]]]
+
+
+def successors(state: PackedBoard) -> List[List[Tuple[PackedBoard, float]]]:
+    """for every candidate pirate action, the states it leads to after the kraken's turn
+    with their probabilities, an action that concludes the game leads to a single state"""
+    result = []
+    for action in candidate_actions(search_board(state)):
+        after = after_action(state, action)
+        if terminal_value(after) is not None:
+            result.append([(after, 1.0)])
+        else:
+            result.append([
+                (normalize(next_state), float(probability))
+                for next_state, probability in after.kraken_turn_distribution()
+                ])
+    return result
+
+
+def enumerate_states(start: PackedBoard, max_states: Optional[int]=None) -> Dict[int, int]:
+    """breadth first enumeration of the unconcluded states reachable from start,
+    returns packed state -> index"""
+    start = normalize(start)
+    index: Dict[int, int] = {}
+    if terminal_value(start) is not None:
+        return index
+    index[start.state] = 0
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        for outcomes in successors(state):
+            for next_state, _ in outcomes:
+                if next_state.state in index or terminal_value(next_state) is not None:
+                    continue
+                if max_states is not None and len(index) >= max_states:
+                    return index
+                index[next_state.state] = len(index)
+                queue.append(next_state)
+    return index
+
+
+def solve(index: Dict[int, int], tolerance: float=1e-6, max_iterations: int=10_000,
+          evaluate: Callable[[PackedBoard], float]=evaluate) -> array:
+    """value iteration, returns the value of every enumerated state by its index"""
+    transitions: List[List[Transition]] = [None] * len(index)
+    for packed, i in index.items():
+        actions = []
+        for outcomes in successors(PackedBoard(packed)):
+            constant, weighted = 0.0, []
+            for next_state, probability in outcomes:
+                j = index.get(next_state.state)
+                if j is not None:
+                    weighted.append((j, probability))
+                else:
+                    outcome = terminal_value(next_state)
+                    constant += probability * (evaluate(next_state) if outcome is None else outcome)
+            actions.append((constant, weighted))
+        transitions[i] = actions
+
+    values = array('d', [0.0]) * len(index)
+    for _ in range(max_iterations):
+        change = 0.0
+        for i, actions in enumerate(transitions):
+            value = max(constant + sum(p * values[j] for j, p in weighted) for constant, weighted in actions)
+            change = max(change, abs(value - values[i]))
+            values[i] = value
+        if change < tolerance:
+            break
+    return values
+
+
+def write_table(path: str, index: Dict[int, int], values: array):
+    """writes the values in an open addressing (linear probing) hash table keyed on the packed state"""
+    capacity = 1
+    while capacity < 2 * max(len(index), 1):
+        capacity <<= 1
+    keys = array('Q', [EMPTY]) * capacity
+    table_values = array('f', [0.0]) * capacity
+    for packed, i in index.items():
+        assert 0 < packed < 1 << 64, f"state {packed:#x} does not fit the table"
+        slot = splitmix64(packed) & (capacity - 1)
+        while keys[slot] != EMPTY:
+            slot = (slot + 1) & (capacity - 1)
+        keys[slot] = packed
+        table_values[slot] = values[i]
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, capacity, len(index)))
+        keys.tofile(f)
+        table_values.tofile(f)
+
+
+class SolvedTable:
+    """A memory mapped table of solved state values"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.capacity, self.count = HEADER.unpack_from(self.buffer)
+        assert magic == MAGIC, f"{path} is not a solved table"
+        keys_end = HEADER.size + self.capacity * 8
+        view = memoryview(self.buffer)
+        self.keys = view[HEADER.size:keys_end].cast('Q')
+        self.values = view[keys_end:keys_end + self.capacity * 4].cast('f')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.keys.release()
+        self.values.release()
+        self.buffer.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def value(self, state: PackedBoard) -> Optional[float]:
+        """the pirates' win probability with the pirates to act, None for states not in the table"""
+        outcome = terminal_value(state)
+        if outcome is not None:
+            return outcome
+        packed = normalize(state).state
+        slot = splitmix64(packed) & (self.capacity - 1)
+        while True:
+            key = self.keys[slot]
+            if key == packed:
+                return self.values[slot]
+            if key == EMPTY:
+                return None
+            slot = (slot + 1) & (self.capacity - 1)
+
+
+def build_table(path: str, start: GameBoard, max_states: Optional[int]=None,
+                tolerance: float=1e-6) -> SolvedTable:
+    index = enumerate_states(PackedBoard.from_board(start), max_states)
+    write_table(path, index, solve(index, tolerance))
+    return SolvedTable(path)
+
+
+def main(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(description='solves the positions reachable from a starting board')
+    parser.add_argument('path', help='the table file to write')
+    parser.add_argument('pirates', nargs='+', help='pirates and their quadrants, e.g. Elena=0')
+    parser.add_argument('--max-states', type=int, default=None)
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args(argv)
+    pirate_classes = {pirate_class.__name__: pirate_class for pirate_class in PIRATES}
+    pirate_quadrants: Dict[Pirate, int] = {}
+    for pirate in args.pirates:
+        name, quadrant = pirate.split('=')
+        pirate_quadrants[pirate_classes[name]()] = int(quadrant)
+    with build_table(args.path, GameBoard(pirate_quadrants), args.max_states, args.tolerance) as table:
+        print(f'{len(table)} states written to {args.path} ({os.path.getsize(args.path)} bytes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from kraken_attack.game import Pirate
+from kraken_attack.play import Strategy, game_seed, play_game
+
+
+class GameSpec(NamedTuple):
+    strategy: str
+    config: int
+    game: int
+    seed: int
+
+
+class GameResult(NamedTuple):
+    strategy: str
+    config: int
+    game: int
+    seed: int
+    outcome: Optional[str]
+    turns: int
+
+
+def game_specs(strategies: Iterable[str], configs: int, games: int, seed: int=42) -> List[GameSpec]:
+    """every strategy plays `games` games from every starting config"""
+    return [
+        GameSpec(strategy, config, game, game_seed(seed, strategy, config, game))
+        for strategy in strategies
+        for config in range(configs)
+        for game in range(games)
+        ]
+
+
+# the strategies and configs of a worker process, sent once when the worker starts
+_worker_state = {}
+
+
+def _init_worker(strategies: Dict[str, Strategy], configs: Sequence[Dict[Pirate, int]], max_turns: int):
+    _worker_state['strategies'] = strategies
+    _worker_state['configs'] = configs
+    _worker_state['max_turns'] = max_turns
+
+
+def _play_chunk(specs: List[GameSpec]) -> List[GameResult]:
+    strategies = _worker_state['strategies']
+    configs = _worker_state['configs']
+    max_turns = _worker_state['max_turns']
+    results = []
+    for spec in specs:
+        outcome, turns = play_game(strategies[spec.strategy], configs[spec.config], spec.seed, max_turns)
+        results.append(GameResult(*spec, outcome, turns))
+    return results
+
+
+def run_tournament(strategies: Dict[str, Strategy], configs: Sequence[Dict[Pirate, int]], games: int,
+                   seed: int=42, max_workers: Optional[int]=None, chunk_size: int=64,
+                   max_turns: int=200) -> Iterator[GameResult]:
+    """plays `games` seeded games of every strategy from every starting `pirate_quadrants` config
+    on a process pool and yields the results as their chunks finish.
+    With max_workers=0 the games are played in this process"""
+    assert games > 0 and chunk_size > 0
+    specs = game_specs(strategies, len(configs), games, seed)
+    chunks = [specs[i:i + chunk_size] for i in range(0, len(specs), chunk_size)]
+    if max_workers == 0:
+        _init_worker(strategies, configs, max_turns)
+        for chunk in chunks:
+            yield from _play_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers, initializer=_init_worker,
+                             initargs=(strategies, configs, max_turns)) as pool:
+        futures = [pool.submit(_play_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def tally(results: Iterable[GameResult]) -> Dict[str, Counter]:
+    """the number of games of each outcome per strategy, unfinished games are counted under None"""
+    table: Dict[str, Counter] = {}
+    for result in results:
+        table.setdefault(result.strategy, Counter())[result.outcome] += 1
+    return table
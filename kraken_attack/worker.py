@@ -0,0 +1,141 @@
+"""A persistent worker that plays many games
+
+Starting an interpreter and importing the engine can take longer than a short game, so a worker
+imports once and then plays jobs read from its input, one JSON line per job, and writes one JSON
+line per result, in the order of the jobs
+
+    {"id": 1, "pirates": {"Elena": 0, "Billy": 3}, "seed": 7}
+    {"id": 1, "outcome": "Kraken retreats", "turns": 23}
+
+pirates are pirate name -> quadrant or an array of quadrants indexed by pirate id,
+strategy is a "module:function" path (`random_strategy` by default) and max_turns is 200 by default.
+A job that fails is answered with its error and the worker goes on.
+`Worker` runs a worker in a subprocess and plays jobs on it over its pipes
+
+    python -m kraken_attack.worker < jobs.jsonl > results.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from importlib import import_module
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from kraken_attack.game import PIRATES, pirate_quadrants_from_array
+from kraken_attack.play import Strategy, play_game
+
+DEFAULT_STRATEGY = 'kraken_attack.play:random_strategy'
+
+PIRATE_NAMES = {pirate.__name__: pirate for pirate in PIRATES}
+
+# strategies are imported once per worker
+_strategies: Dict[str, Strategy] = {}
+
+
+def resolve_strategy(path: str) -> Strategy:
+    """the strategy at a "module:function" path"""
+    strategy = _strategies.get(path)
+    if strategy is None:
+        module, _, name = path.partition(':')
+        strategy = _strategies[path] = getattr(import_module(module), name)
+    return strategy
+
+
+def play_job(job: Dict) -> Dict:
+    """plays the game of a job and returns its result"""
+    pirates = job['pirates']
+    if isinstance(pirates, dict):
+        pirate_quadrants = {PIRATE_NAMES[name](): quadrant for name, quadrant in pirates.items()}
+    else:
+        pirate_quadrants = pirate_quadrants_from_array(pirates)
+    strategy = resolve_strategy(job.get('strategy', DEFAULT_STRATEGY))
+    outcome, turns = play_game(strategy, pirate_quadrants, job.get('seed', 42), job.get('max_turns', 200))
+    return {'id': job.get('id'), 'outcome': outcome, 'turns': turns}
+
+
+def serve(input: TextIO, output: TextIO) -> int:
+    """plays the jobs read from input until it ends, returns the number of jobs"""
+    jobs = 0
+    for line in input:
+        if not line.strip():
+            continue
+        job = None
+        try:
+            job = json.loads(line)
+            result = play_job(job)
+        except Exception as e:
+            result = {'id': job.get('id') if isinstance(job, dict) else None, 'error': f'{type(e).__name__}: {e}'}
+        output.write(json.dumps(result) + '\n')
+        # the caller waits for every result
+        output.flush()
+        jobs += 1
+    return jobs
+
+
+class Worker:
+    """A worker subprocess, started once and reused for many jobs
+
+        with Worker() as worker:
+            results = list(worker.map(jobs))
+    """
+
+    def __init__(self, python: str=sys.executable):
+        # the worker imports this package from wherever it was imported here
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+        self.process = subprocess.Popen([python, '-m', 'kraken_attack.worker'], stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True, bufsize=1, env=env)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _send(self, job: Dict):
+        self.process.stdin.write(json.dumps(job) + '\n')
+        self.process.stdin.flush()
+
+    def _receive(self) -> Dict:
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f'the worker exited with {self.process.wait()}')
+        return json.loads(line)
+
+    def play(self, job: Dict) -> Dict:
+        self._send(job)
+        return self._receive()
+
+    def map(self, jobs: Iterable[Dict], window: int=64) -> Iterator[Dict]:
+        """yields the results of the jobs in order, keeping up to window jobs in the pipe"""
+        assert window > 0
+        pending = 0
+        for job in jobs:
+            if pending == window:
+                yield self._receive()
+                pending -= 1
+            self._send(job)
+            pending += 1
+        for _ in range(pending):
+            yield self._receive()
+
+    def close(self, timeout: Optional[float]=10.0) -> int:
+        """ends the worker's input and waits for it to exit, returns its exit code"""
+        if self.process.stdin and not self.process.stdin.closed:
+            self.process.stdin.close()
+        code = self.process.wait(timeout)
+        self.process.stdout.close()
+        return code
+
+
+def main(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(description='plays the JSON line jobs of stdin, one JSON line result per job')
+    parser.parse_args(argv)
+    serve(sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
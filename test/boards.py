@@ -0,0 +1,17 @@
+"""Boards shared by the tests"""
+from random import Random
+from typing import List
+
+from kraken_attack.game import Billy, Elena, GameBoard
+
+
+def random_boards(n: int, seed: int) -> List[GameBoard]:
+    rng = Random(seed)
+    boards = []
+    for i in range(n):
+        board = GameBoard({Elena(): rng.randint(0, 3), Billy(): rng.randint(0, 3)}, seed=i)
+        for _ in range(rng.randint(0, 9)):
+            board.annoy_kraken(rng.randint(0, 7))
+        board.determine_board_after_kraken_move([rng.randint(0, 7) for _ in range(rng.randint(0, 12))])
+        boards.append(board)
+    return boards
@@ -0,0 +1,112 @@
+from unittest import TestCase
+
+import numpy as np
+
+from kraken_attack.dice import CounterDice
+from kraken_attack.game import *
+from kraken_attack.batch import *
+from test.boards import random_boards
+
+
+class TestBatchGameBoard(TestCase):
+
+    def assertSameGame(self, board: GameBoard, expected: GameBoard):
+        self.assertDictEqual(board.arm_locations, expected.arm_locations)
+        self.assertDictEqual(board.shield_status, expected.shield_status)
+        self.assertDictEqual(board.pirate_quadrants, expected.pirate_quadrants)
+        self.assertEqual(board.ship_hole_positions, tuple(sorted(expected.ship_hole_positions)))
+        self.assertEqual(board.kraken_location, expected.kraken_location)
+        self.assertEqual(board.kraken_lane, expected.kraken_lane)
+        self.assertEqual(board.kraken_damage, expected.kraken_damage)
+        self.assertEqual(board.game_outcome(), expected.game_outcome())
+
+    def test_round_trip(self):
+        boards = random_boards(50, seed=1)
+        batch = BatchGameBoard.from_boards(boards)
+        for i, board in enumerate(boards):
+            self.assertSameGame(batch.board(i), board)
+
+    def test_roll_dice(self):
+        batch = BatchGameBoard.from_boards(random_boards(200, seed=2))
+        dice = batch.roll_dice()
+        self.assertEqual(dice.shape, (200, 6))
+        for i in range(200):
+            red, blue = batch.board(i).dice_counts.values()
+            self.assertTrue((dice[i, red:3] == BLANK).all())
+            self.assertTrue((dice[i, 3 + blue:] == BLANK).all())
+            self.assertEqual(len(batch.roll_outcome(dice, i)), red + blue)
+
+    def test_kraken_turns_match_game_board(self):
+        boards = random_boards(300, seed=3)
+        batch = BatchGameBoard.from_boards(boards, seed=3)
+        for _ in range(6):
+            dice = batch.roll_dice()
+            moves = batch.determine_kraken_moves(dice)
+            batch.determine_board_after_kraken_move(moves)
+            for i, board in enumerate(boards):
+                kraken_moves = board.determine_kraken_moves(batch.roll_outcome(dice, i))
+                self.assertListEqual(list(moves[i]), [kraken_moves.count(lane) for lane in range(8)])
+                board.determine_board_after_kraken_move(kraken_moves)
+                self.assertSameGame(batch.board(i), board)
+
+    def test_dice_match_counter_dice(self):
+        boards = random_boards(100, seed=5)
+        games = [3 * i + 1 for i in range(100)]
+        batch = BatchGameBoard.from_boards(boards, seed=5, games=games)
+        for board, game in zip(boards, games):
+            board.dice = CounterDice(5, game)
+        rng = np.random.default_rng(5)
+        for _ in range(8):
+            mask = rng.random(100) < 0.7
+            dice = batch.kraken_turn(mask)
+            for i, board in enumerate(boards):
+                if mask[i]:
+                    roll_outcome = board.roll_dice()
+                    self.assertListEqual(batch.roll_outcome(dice, i), roll_outcome)
+                    board.determine_board_after_kraken_move(board.determine_kraken_moves(roll_outcome))
+                else:
+                    self.assertTrue((dice[i] == BLANK).all())
+                self.assertSameGame(batch.board(i), board)
+                self.assertEqual(batch.board(i).dice.position(), board.dice.position())
+
+    def test_mask(self):
+        boards = random_boards(10, seed=4)
+        batch = BatchGameBoard.from_boards(boards)
+        mask = np.arange(10) % 2 == 0
+        batch.determine_board_after_kraken_move(np.full((10, 8), 2, dtype=np.int8), mask)
+        for i, board in enumerate(boards):
+            if i % 2 == 0:
+                board.determine_board_after_kraken_move([*range(8), *range(8)])
+            self.assertSameGame(batch.board(i), board)
+
+    def test_pirate_actions(self):
+        board = GameBoard({Astrid(): 2})
+        batch = BatchGameBoard(3, {Astrid(): 2})
+        [board.annoy_kraken(4) for _ in range(9)]
+        [batch.annoy_kraken(4) for _ in range(9)]
+        board.perform_pirate_attack(Astrid(), 'pistol', 4)
+        batch.perform_pirate_attack(Astrid(), 'pistol', 4)
+        board.perform_pirate_attack(Astrid(), 'sword', 5)
+        batch.perform_pirate_attack(Astrid(), 'sword', 5)
+        board.move_pirate(Astrid(), 3)
+        batch.move_pirate(Astrid(), 3)
+        board.determine_board_after_kraken_move([6, 6, 6])
+        batch.determine_board_after_kraken_move(np.array([[0, 0, 0, 0, 0, 0, 3, 0]] * 3, dtype=np.int8))
+        board.perform_repair(Astrid(), 6)
+        batch.perform_repair(Astrid(), 6)
+        for i in range(3):
+            self.assertSameGame(batch.board(i), board)
+
+        with self.assertRaises(IllegalMove):
+            batch.perform_pirate_attack(Astrid(), 'pistol', 0)
+        with self.assertRaises(IllegalMove):
+            batch.move_pirate(Astrid(), 0)
+        with self.assertRaises(IllegalMove):
+            batch.move_pirate(Billy(), 0)
+
+    def test_game_outcome(self):
+        batch = BatchGameBoard(3, {Elena(): 0})
+        batch.ship_holes[0] = (1, 1, 2, 0)
+        batch.kraken_damage[1] = 3
+        self.assertListEqual([OUTCOMES[o] for o in batch.game_outcome()],
+                             ['Kraken drowns ship', 'Kraken retreats', None])
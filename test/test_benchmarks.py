@@ -0,0 +1,52 @@
+import json
+import os
+from contextlib import redirect_stdout
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from benchmarks.suite import *
+
+
+class TestBenchmarkSuite(TestCase):
+
+    def test_names_are_unique(self):
+        names = [bench.name for bench in BENCHMARKS]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertSetEqual({bench.kind for bench in BENCHMARKS}, {'micro', 'macro', 'memory'})
+
+    def test_run(self):
+        results = run(number=20, repeat=1, select=['micro.draw', 'memory.board'])
+        self.assertListEqual(list(results['benchmarks']),
+                             ['micro.draw', 'micro.draw_uncached', 'memory.board', 'memory.board_after_game'])
+        for result in results['benchmarks'].values():
+            self.assertGreater(result['value'], 0)
+        self.assertEqual(results['benchmarks']['memory.board']['unit'], 'bytes')
+        self.assertEqual(json.loads(json.dumps(results)), results)
+
+    def test_compare(self):
+        baseline = {'benchmarks': {
+            'micro.a': {'value': 1.0}, 'micro.b': {'value': 1.0}, 'micro.c': {'value': 1.0}
+            }}
+        results = {'benchmarks': {
+            'micro.a': {'value': 1.05}, 'micro.b': {'value': 1.5}, 'micro.d': {'value': 9.0}
+            }}
+        self.assertListEqual(compare(results, baseline, threshold=0.1), [Regression('micro.b', 1.0, 1.5)])
+        self.assertListEqual(compare(results, baseline, threshold=1.0), [])
+
+    def test_main_fails_on_regressions(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            with redirect_stdout(StringIO()):
+                self.assertEqual(main(['--number', '10', '--repeat', '1', '-k', 'micro.game_outcome',
+                                       '--output', path]), 0)
+            with open(path) as f:
+                baseline = json.load(f)
+            baseline['benchmarks']['micro.game_outcome']['value'] /= 1000
+            with open(path, 'w') as f:
+                json.dump(baseline, f)
+            output = StringIO()
+            with redirect_stdout(output):
+                self.assertEqual(main(['--number', '10', '--repeat', '1', '-k', 'micro.game_outcome',
+                                       '--baseline', path]), 1)
+            self.assertIn('regression: micro.game_outcome', output.getvalue())
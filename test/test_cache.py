@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.cache import *
+
+
+class TestCache(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'evaluations.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_state_key(self):
+        board = GameBoard({Elena(): 0}, seed=1)
+        other = GameBoard({Elena(): 0}, seed=2)
+        other.roll_dice()
+        other.annoy_kraken()
+        other.undo()
+        self.assertEqual(state_key(board), state_key(other))
+        self.assertEqual(state_key(PackedBoard.from_board(board)), state_key(board))
+        other.annoy_kraken()
+        self.assertNotEqual(state_key(board), state_key(other))
+
+    def test_lru(self):
+        cache = EvaluationCache(max_size=2)
+        for key in range(3):
+            cache.put(key, key / 10)
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.get(2), 0.2)
+        cache.put(None, None)
+        self.assertDictEqual(cache.stats(), {
+            'lookups': 2, 'memory_hits': 1, 'disk_hits': 0, 'misses': 1, 'evictions': 1, 'size': 2
+            })
+
+    def test_disk_tier_survives_restarts(self):
+        with EvaluationCache(max_size=2, path=self.path, commit_every=1000) as cache:
+            for key in range(5):
+                cache.put(key, {'value': key})
+            self.assertEqual(cache.get(0), {'value': 0})
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+        with EvaluationCache(path=self.path) as cache:
+            self.assertEqual(len(cache.disk), 5)
+            self.assertEqual(cache.get(3), {'value': 3})
+            self.assertEqual(cache.get(3), {'value': 3})
+            self.assertIsNone(cache.get(7))
+            self.assertDictEqual(cache.stats(), {
+                'lookups': 3, 'memory_hits': 1, 'disk_hits': 1, 'misses': 1, 'evictions': 0, 'size': 1
+                })
+        with EvaluationCache(path=self.path, namespace='other') as cache:
+            self.assertIsNone(cache.get(3))
+
+    def test_memoize(self):
+        calls = []
+
+        def hole_count(board):
+            calls.append(board)
+            return len(PackedBoard(state_key(board)).ship_hole_positions)
+
+        memoized = memoize(path=self.path)(hole_count)
+        board = GameBoard({Elena(): 0})
+        board.ship_hole_positions = (1, 2)
+        self.assertEqual(memoized(board), 2)
+        self.assertEqual(memoized(board.clone()), 2)
+        self.assertEqual(memoized(PackedBoard.from_board(board)), 2)
+        self.assertEqual(len(calls), 1)
+        memoized.cache.close()
+
+        # another worker sharing the disk tier
+        worker = memoize(path=self.path)(hole_count)
+        self.assertEqual(worker(board), 2)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(worker.cache.stats()['disk_hits'], 1)
+        worker.cache.close()
+
+    def test_forked_workers(self):
+        def hole_count(board):
+            return len(PackedBoard(state_key(board)).ship_hole_positions)
+
+        memoized = memoize(path=self.path)(hole_count)
+        board = GameBoard({Elena(): 0})
+        # a put that is not written yet
+        self.assertEqual(memoized(board), 0)
+
+        def work(holes):
+            # uses the cache made before the fork and exits without closing it
+            worker_board = board.clone()
+            worker_board.ship_hole_positions = holes
+            memoized(worker_board)
+
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=work, args=(holes,)) for holes in ((0,), (0, 1), (0, 1, 2))]
+        [worker.start() for worker in workers]
+        [worker.join() for worker in workers]
+        self.assertListEqual([worker.exitcode for worker in workers], [0, 0, 0])
+        self.assertEqual(len(memoized.cache.disk), 4)
+        memoized.cache.close()
+
+    def test_pending_puts_do_not_lock_the_file(self):
+        cache = DiskCache(self.path, commit_every=32)
+        cache.put(1, 'pending')
+
+        def write():
+            other = DiskCache(self.path, commit_every=1, timeout=1.0)
+            other.put(2, 'written')
+            os._exit(0 if other.get(1) is None and DiskCache(self.path).get(2) == 'written' else 1)
+
+        process = multiprocessing.get_context('fork').Process(target=write)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(cache.get(1), 'pending')
+        self.assertEqual(len(cache), 2)
+        cache.close()
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.dice import *
+
+
+class TestDice(TestCase):
+
+    def test_random_dice_match_random(self):
+        dice = RandomDice(seed=3)
+        rng = Random(3)
+        for dice_counts in ({'red': 1, 'blue': 1}, {'red': 3, 'blue': 2}):
+            expected = [(color, rng.randint(0, 5)) for color, num in dice_counts.items() for _ in range(num)]
+            self.assertListEqual(dice.roll(dice_counts), expected)
+        self.assertEqual(dice.position(), ('random', 3, 7))
+
+    def test_counter_dice(self):
+        dice_counts = {'red': 3, 'blue': 3}
+        dice = CounterDice(seed=1, game=2)
+        rolls = [dice.roll(dice_counts) for _ in range(50)]
+        self.assertEqual(dice.position(), ('counter', 1, 2, 50))
+        self.assertListEqual(CounterDice(seed=1, game=2).roll_turn(37, dice_counts), rolls[37])
+        self.assertListEqual(CounterDice(seed=1, game=2, turn=37).roll(dice_counts), rolls[37])
+        self.assertNotEqual([CounterDice(seed=1, game=3).roll(dice_counts) for _ in range(50)], rolls)
+
+        counts = Counter(d for _ in range(2000) for _, d in dice.roll(dice_counts))
+        self.assertSetEqual(set(counts), set(range(6)))
+        self.assertTrue(all(1800 < c < 2200 for c in counts.values()))
+
+    def test_buffered_dice(self):
+        dice = BufferedDice([0, 1, 2, 3, 4, 5, 0])
+        self.assertListEqual(dice.roll({'red': 2, 'blue': 1}), [('red', 0), ('red', 1), ('blue', 2)])
+        copied = dice.copy()
+        self.assertListEqual(dice.roll({'red': 2, 'blue': 2}), [('red', 3), ('red', 4), ('blue', 5), ('blue', 0)])
+        self.assertEqual(copied.position(), ('buffer', id(dice.dice), 3))
+        with self.assertRaises(IndexError):
+            dice.roll({'red': 1, 'blue': 1})
+        self.assertEqual(len(BufferedDice.draw(100).dice), 100)
+
+
+class TestGameBoardDice(TestCase):
+
+    def test_dice_sources(self):
+        for dice in (CounterDice(seed=5), BufferedDice.draw(1000, seed=5)):
+            board = GameBoard({Elena(): 0}, dice=dice)
+            self.assertIsNone(board.rng)
+            clone = board.clone()
+            self.assertEqual(clone, board)
+            rolls = [board.roll_dice() for _ in range(10)]
+            self.assertNotEqual(clone, board)
+            self.assertListEqual([clone.roll_dice() for _ in range(10)], rolls)
+            self.assertEqual(clone, board)
+
+    def test_equality_compares_dice_positions(self):
+        board = GameBoard({Elena(): 0}, seed=1)
+        other = GameBoard({Elena(): 0}, seed=1)
+        self.assertEqual(board, other)
+        board.roll_dice()
+        self.assertNotEqual(board, other)
+        other.roll_dice()
+        self.assertEqual(board, other)
+        self.assertNotEqual(board, GameBoard({Elena(): 0}, seed=2))
+        other.determine_board_after_kraken_move([0, 0, 0, 0, 0])
+        board.determine_board_after_kraken_move([2, 2, 2, 2, 2, 2, 2])
+        self.assertNotEqual(board.ship_hole_positions, other.ship_hole_positions)
+        board.determine_board_after_kraken_move([0, 0, 0, 0, 0])
+        other.determine_board_after_kraken_move([2, 2, 2, 2, 2, 2, 2])
+        self.assertNotEqual(board, other)
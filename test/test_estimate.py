@@ -0,0 +1,81 @@
+from random import Random
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.estimate import *
+from kraken_attack.play import random_strategy
+
+
+def attacking_strategy(board: GameBoard, rng: Random) -> Action:
+    """attacks whenever it can, otherwise plays a random useful action"""
+    actions = [action for pirate in board.pirates for action in board.legal_actions(pirate, useful_only=True)]
+    attacks = [action for action in actions if action.kind == 'attack']
+    return rng.choice(attacks or actions)
+
+
+class TestEstimate(TestCase):
+
+    def setUp(self):
+        self.board = GameBoard({Astrid(): 2, Elena(): 0})
+        [self.board.annoy_kraken(4) for _ in range(9)]
+        self.board.kraken_damage = 1
+
+    def test_rollout(self):
+        packed = self.board.to_packed()
+        results = [rollout(self.board, random_strategy, 1, game) for game in range(30)]
+        self.assertEqual(results, [rollout(self.board, random_strategy, 1, game) for game in range(30)])
+        self.assertTrue(set(results) <= {0.0, 1.0})
+        self.assertEqual(self.board.to_packed(), packed)
+
+        won = self.board.clone()
+        won.kraken_damage = 3
+        self.assertEqual(rollout(won, random_strategy, 1, 0), 1.0)
+
+    def test_estimate_stops_early(self):
+        # samples that are all equal do not make the interval collapse
+        result = estimate(lambda i: 0.0, width=0.1, batch_size=10, min_samples=30)
+        self.assertEqual((result.value, result.low, result.samples), (0.0, 0.0, 40))
+        self.assertTrue(0.0 < result.high <= 0.1)
+        self.assertEqual(estimate(lambda i: 1.0, width=0.0, max_samples=300).samples, 300)
+
+        rng = Random(0)
+        result = estimate(lambda i: float(rng.random() < 0.3), width=0.1, batch_size=50)
+        self.assertLessEqual(result.width, 0.1)
+        self.assertLess(result.samples, 1000)
+        self.assertTrue(result.low < 0.3 < result.high)
+
+        result = estimate(lambda i: float(i % 2), width=0.0001, batch_size=64, max_samples=200)
+        self.assertEqual(result.samples, 200)
+        self.assertGreater(result.width, 0.0001)
+
+        result = estimate(lambda i: 0.0, width=0.05, batch_size=64, min_samples=20, paired=True)
+        self.assertEqual((result.value, result.samples), (0.0, 128))
+        self.assertAlmostEqual(result.low, -result.high)
+        self.assertTrue(0.0 < result.high <= 0.025)
+
+    def test_win_rate(self):
+        result = win_rate(self.board, random_strategy, width=0.1, seed=3)
+        self.assertEqual(result, win_rate(self.board, random_strategy, width=0.1, seed=3))
+        self.assertLessEqual(result.width, 0.1)
+        self.assertTrue(result.low <= result.value <= result.high)
+        self.assertEqual(result.rollouts, result.samples)
+
+    def test_win_rate_of_an_almost_lost_position(self):
+        board = GameBoard({Astrid(): 2, Elena(): 0})
+        [board.annoy_kraken(4) for _ in range(9)]
+        # every rollout of this seed is lost, the interval still allows some wins
+        result = win_rate(board, random_strategy, width=0.05, seed=1)
+        self.assertEqual((result.value, result.low, result.samples), (0.0, 0.0, 128))
+        self.assertTrue(0.02 < result.high <= 0.05)
+        self.assertEqual(win_rate(board, random_strategy, width=0.0, seed=1, max_samples=256).samples, 256)
+
+    def test_common_random_numbers(self):
+        same = win_rate_difference(self.board, random_strategy, random_strategy, width=0.05, min_samples=20)
+        self.assertEqual((same.value, same.samples, same.rollouts), (0.0, 128, 256))
+        self.assertAlmostEqual(same.low, -same.high)
+
+        difference = win_rate_difference(self.board, attacking_strategy, random_strategy, width=0.1)
+        self.assertLessEqual(difference.width, 0.1)
+        attacking = win_rate(self.board, attacking_strategy, width=0, max_samples=difference.samples)
+        random = win_rate(self.board, random_strategy, width=0, max_samples=difference.samples)
+        self.assertAlmostEqual(difference.value, attacking.value - random.value, places=9)
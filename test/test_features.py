@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+import numpy as np
+
+from kraken_attack.batch import BatchGameBoard
+from kraken_attack.game import *
+from kraken_attack.features import *
+from test.boards import random_boards
+
+
+class TestEncoding(TestCase):
+
+    def test_layout(self):
+        self.assertEqual(N_FEATURES, 32 + 8 + 4 + 10 + 8 + 1 + 5 + 16)
+        self.assertEqual(len(DICE_TIERS), 5)
+        self.assertListEqual(DICE_TIER.tolist(), [0, 0, 1, 1, 2, 2, 3, 3, 4, 4])
+
+    def test_encode_board(self):
+        board = GameBoard({Elena(): 0, Billy(): 3})
+        [board.annoy_kraken(5) for _ in range(9)]
+        board.determine_board_after_kraken_move([0, 0, 0, 1])
+        board.kraken_damage = 2
+        features = encode_boards([board])[0]
+        self.assertEqual(features.dtype, np.float32)
+        self.assertListEqual(features[FEATURES['arm_locations']].reshape(8, 4).argmax(axis=1).tolist(),
+                             [3, 2, 1, 0, 2, 1, 1, 0])
+        self.assertListEqual(features[FEATURES['shield_status']].tolist(), [0, 1, 1, 1, 1, 1, 1, 1])
+        self.assertListEqual(features[FEATURES['ship_holes']].tolist(), [1, 0, 0, 0])
+        self.assertEqual(features[FEATURES['kraken_location']].argmax(), 9)
+        self.assertEqual(features[FEATURES['kraken_lane']].argmax(), 5)
+        self.assertEqual(features[FEATURES['kraken_damage']][0], 2)
+        self.assertEqual(features[FEATURES['dice_tier']].argmax(), 4)
+        self.assertListEqual(features[FEATURES['pirate_quadrants']].reshape(4, 4).tolist(), [
+            [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 1], [1, 0, 0, 0]
+            ])
+        self.assertEqual(features.sum(), 8 + 7 + 1 + 1 + 1 + 2 + 1 + 2)
+
+    def test_encode_into_preallocated_array(self):
+        boards = random_boards(40, seed=3)
+        out = np.full((40, N_FEATURES), 7, dtype=np.float32)
+        self.assertIs(encode_boards(boards, out), out)
+        np.testing.assert_array_equal(out, encode_boards(boards))
+        np.testing.assert_array_equal(encode_batch(BatchGameBoard.from_boards(boards)), out)
+
+    def test_action_masks(self):
+        boards = random_boards(20, seed=5)
+        masks = legal_action_masks(boards)
+        self.assertEqual(masks.shape, (20, N_ACTIONS))
+        for board, mask in zip(boards, masks):
+            legal = {action_index(a) for p in board.pirates for a in board.legal_actions(p)}
+            self.assertSetEqual(set(np.flatnonzero(mask)), legal)
+            for index in np.flatnonzero(mask):
+                action = index_action(board, index)
+                self.assertEqual(action_index(action), index)
+                board.clone().apply(action)
+
+
+class TestVectorEnv(TestCase):
+
+    def test_step(self):
+        env = VectorEnv([{Elena(): 0}, {Astrid(): 2, Billy(): 1}, {Samuel(): 3}], seed=1, max_turns=30)
+        observations = env.reset()
+        self.assertEqual(observations.shape, (3, N_FEATURES))
+        rng = np.random.default_rng(0)
+        ended = []
+        for _ in range(100):
+            masks = env.action_masks()
+            actions = [rng.choice(np.flatnonzero(mask)) for mask in masks]
+            observations, rewards, dones, infos = env.step(actions)
+            np.testing.assert_array_equal(observations, encode_boards(env.boards))
+            for reward, done, info in zip(rewards, dones, infos):
+                if done:
+                    ended.append(info)
+                    self.assertEqual(reward, REWARDS[info['outcome']])
+                    self.assertEqual(info['truncated'], info['outcome'] is None)
+                else:
+                    self.assertEqual(reward, 0)
+        self.assertGreater(len(ended), 0)
+        self.assertTrue(all(info['turns'] <= 30 for info in ended))
@@ -2,6 +2,11 @@ from unittest import TestCase
 
 from kraken_attack.game import *
 from collections import Counter
+from copy import copy, deepcopy
+from fractions import Fraction
+from itertools import product
+from random import Random
+import pickle
 
 class TestPirate(TestCase):
 
@@ -19,6 +24,21 @@ class TestPirate(TestCase):
         d = {Elena(): 1, Elena(): 2}
         self.assertEqual(len(d), 1)
 
+    def test_interned(self):
+        self.assertIs(Elena(), Elena())
+        self.assertIsNot(Elena(), Billy())
+        self.assertNotEqual(Elena(), Billy())
+        self.assertListEqual([pirate_class().id for pirate_class in PIRATES], [0, 1, 2, 3])
+        self.assertIs(copy(Elena()), Elena())
+        self.assertIs(deepcopy({Elena(): 0}).popitem()[0], Elena())
+        self.assertIs(pickle.loads(pickle.dumps(Astrid())), Astrid())
+
+    def test_pirate_quadrant_array(self):
+        board = GameBoard([None, 2, None, 0])
+        self.assertDictEqual(board.pirate_quadrants, {Astrid(): 2, Elena(): 0})
+        self.assertListEqual(board.pirate_quadrant_array, [None, 2, None, 0])
+        self.assertDictEqual(pirate_quadrants_from_array([-1, -1, 3, -1]), {Billy(): 3})
+
 class TestGameBoard(TestCase):
 
     def test_annoy_kraken(self):
@@ -71,6 +91,10 @@ class TestGameBoard(TestCase):
             board.annoy_kraken()
         self.assertEqual(board.kraken_location, 8)
         self.assertEqual(str(cm.exception), 'must specify to which lane the Kraken will go')
+        for lane in (8, 42, -1, 'x'):
+            with self.assertRaises(IllegalMove):
+                board.annoy_kraken(lane)
+        self.assertEqual((board.kraken_location, board.kraken_lane), (8, None))
 
         board.annoy_kraken(0)
         self.assertEqual(board.kraken_location, 9)
@@ -272,4 +296,273 @@ Pirates: Elena""", result)
         
         
 
-        
\ No newline at end of file
+        
+class TestPackedBoard(TestCase):
+
+    def test_round_trip(self):
+        board = GameBoard({Elena(): 0, Astrid(): 3})
+        packed = board.to_packed()
+        restored = GameBoard.from_packed(packed)
+        self.assertDictEqual(restored.pirate_quadrants, board.pirate_quadrants)
+        self.assertDictEqual(restored.shield_status, board.shield_status)
+        self.assertDictEqual(restored.arm_locations, board.arm_locations)
+        self.assertEqual(restored.to_packed(), packed)
+
+        [board.annoy_kraken(5) for _ in range(9)]
+        board.perform_pirate_attack(Astrid(), 'cannon', 7)
+        board.determine_board_after_kraken_move([0, 0, 0, 0, 1, 1, 1, 1, 7, 7])
+        board.move_pirate(Elena(), 2)
+        self.assertEqual(board.ship_hole_positions, (0, 0, 0))
+        packed = board.to_packed()
+        restored = GameBoard.from_packed(packed)
+        self.assertDictEqual(restored.pirate_quadrants, {Astrid(): 3, Elena(): 2})
+        self.assertDictEqual(restored.shield_status, board.shield_status)
+        self.assertDictEqual(restored.arm_locations, board.arm_locations)
+        self.assertEqual(restored.kraken_location, 9)
+        self.assertEqual(restored.kraken_lane, 5)
+        self.assertEqual(restored.kraken_damage, board.kraken_damage)
+        self.assertEqual(restored.ship_hole_positions, (0, 0, 0))
+        self.assertEqual(restored.draw(), board.draw().replace('Elena, Astrid', 'Astrid, Elena'))
+
+    def test_packed_board(self):
+        board = GameBoard({Billy(): 1})
+        board.determine_board_after_kraken_move([3, 3, 3, 3, 3, 3, 2])
+        state = PackedBoard.from_board(board)
+        self.assertEqual(state.arm_locations, (2, 1, 2, 3, 2, 1, 1, 0))
+        self.assertEqual(state.shield_mask, 0b11110111)
+        self.assertFalse(state.shield_status(3))
+        self.assertEqual(state.ship_hole_positions, (1, 1))
+        self.assertEqual(state.hole_count, 2)
+        self.assertIsNone(state.kraken_lane)
+        self.assertIsNone(state.game_outcome())
+
+        self.assertEqual(state, state.copy())
+        self.assertEqual(len({state, state.copy(), PackedBoard.from_board(GameBoard({Billy(): 1}))}), 2)
+        self.assertEqual(state.to_board().to_packed(), state.state)
+
+    def test_after_kraken_moves(self):
+        board = GameBoard({Billy(): 1})
+        board.determine_board_after_kraken_move([3, 3, 3])
+        state = PackedBoard.from_board(board)
+        moves = [2, 0, 0, 5, 1, 0, 0, 4]
+        board.determine_board_after_kraken_move([lane for lane, n in enumerate(moves) for _ in range(n)])
+        self.assertEqual(state.after_kraken_moves(moves), PackedBoard.from_board(board))
+        self.assertEqual(state.after_kraken_moves([0]*8), state)
+
+
+class TestKrakenTurnDistribution(TestCase):
+
+    def test_kraken_move_distribution(self):
+        for red, blue in [(1, 1), (2, 1), (2, 2), (3, 2), (3, 3)]:
+            distribution = kraken_move_distribution(red, blue)
+            self.assertEqual(sum(p for _, p in distribution), 1)
+            self.assertEqual(len(distribution), len({moves for moves, _ in distribution}))
+        self.assertIn(((1, 0, 0, 0, 0, 0, 0, 0), Fraction(1, 36)), kraken_move_distribution(1, 1))
+        self.assertIn(((1, 1, 1, 1, 1, 1, 1, 1), Fraction(1, 36)), kraken_move_distribution(1, 1))
+
+    def test_matches_all_rolls(self):
+        def key(state: PackedBoard):
+            return state.arm_locations, state.shield_mask, state.ship_hole_positions
+
+        for kraken_location in (0, 5):
+            board = GameBoard({Elena(): 0})
+            [board.annoy_kraken() for _ in range(kraken_location)]
+            board.determine_board_after_kraken_move([0, 0, 0, 3, 3, 3, 3, 4, 4, 4])
+            dice_counts = board.dice_counts
+            colors = ['red'] * dice_counts['red'] + ['blue'] * dice_counts['blue']
+            expected = Counter()
+            for roll in product(range(6), repeat=len(colors)):
+                after = GameBoard.from_packed(board.to_packed())
+                after.determine_board_after_kraken_move(after.determine_kraken_moves(list(zip(colors, roll))))
+                expected[key(PackedBoard.from_board(after))] += Fraction(1, 6 ** len(colors))
+
+            distribution = board.kraken_turn_distribution()
+            self.assertEqual(len(distribution), len({state for state, _ in distribution}))
+            result = Counter()
+            for state, probability in distribution:
+                result[key(state)] += probability
+            self.assertDictEqual(dict(result), dict(expected))
+            self.assertIs(distribution, board.kraken_turn_distribution())
+
+    def test_reaches_the_packed_board(self):
+        # lanes 0 and 4 are past their shields, the red die makes the first hole
+        board = GameBoard({Elena(): 0})
+        board.arm_locations.update({0: 3, 4: 3})
+        board.shield_status.update({0: False, 4: False})
+        distribution = dict(board.kraken_turn_distribution())
+        board.determine_board_after_kraken_move(board.determine_kraken_moves([('red', 0), ('blue', 0)]))
+        self.assertEqual(board.ship_hole_positions, (2, 0))
+        self.assertEqual(PackedBoard.from_board(board).ship_hole_positions, (0, 2))
+        self.assertIn(PackedBoard.from_board(board), distribution)
+
+
+class TestLegalActions(TestCase):
+
+    def test_legal_actions(self):
+        board = GameBoard({Astrid(): 2, Elena(): 0})
+        actions = list(board.legal_actions(Astrid()))
+        self.assertEqual(len(actions), 2 + 2*(3 + 1) + 1)
+        self.assertListEqual(list(board.legal_actions(Billy())), [])
+
+        for _ in range(8):
+            board.annoy_kraken()
+        self.assertEqual(len([a for a in board.legal_actions(Elena()) if a.kind == 'annoy']), 8)
+        board.annoy_kraken(1)
+        self.assertIn(Action('annoy', Elena()), board.legal_actions(Elena()))
+        self.assertNotIn('annoy', [a.kind for a in board.legal_actions(Elena(), useful_only=True)])
+
+    def test_every_legal_action_is_legal(self):
+        board = GameBoard({Astrid(): 2, Elena(): 1})
+        board.determine_board_after_kraken_move([2, 2, 3, 3, 5, 5])
+        for pirate in board.pirates:
+            for action in board.legal_actions(pirate):
+                after = GameBoard.from_packed(board.to_packed())
+                if action.kind == 'move':
+                    after.move_pirate(pirate, action.target)
+                elif action.kind == 'attack':
+                    after.perform_pirate_attack(pirate, action.attack, action.target)
+                elif action.kind == 'repair':
+                    after.perform_repair(pirate, action.target)
+                else:
+                    after.annoy_kraken(action.target)
+
+    def test_useful_actions(self):
+        board = GameBoard({Astrid(): 2})
+        board.determine_board_after_kraken_move([4, 4])
+        self.assertListEqual(list(board.legal_actions(Astrid(), useful_only=True)), [
+            Action('move', Astrid(), 0),
+            Action('move', Astrid(), 3),
+            Action('attack', Astrid(), 4, 'sword'),
+            Action('repair', Astrid(), 4),
+            Action('attack', Astrid(), 5, 'cannon'),
+            Action('annoy', Astrid()),
+            ])
+        for quadrant, lanes in QUADRANT_LANES.items():
+            for lane in lanes:
+                self.assertEqual(lane // 2, quadrant)
+        for attack, arm_location in ATTACK_HITS.items():
+            self.assertEqual(HITTING_ATTACK[arm_location], attack)
+
+
+class TestUndo(TestCase):
+
+    def snapshot(self, board: GameBoard):
+        return (board.to_packed(), board.ship_hole_positions, dict(board.pirate_quadrants))
+
+    def test_undo_redo(self):
+        board = GameBoard({Astrid(): 2, Elena(): 0})
+        snapshots = [self.snapshot(board)]
+        board.determine_board_after_kraken_move([4, 4, 4, 4, 4, 0, 0])
+        snapshots.append(self.snapshot(board))
+        [board.annoy_kraken(4) for _ in range(9)]
+        snapshots.extend([None] * 8 + [self.snapshot(board)])
+        board.apply(Action('attack', Astrid(), 4, 'sword'))
+        snapshots.append(self.snapshot(board))
+        board.apply(Action('repair', Astrid(), 4))
+        snapshots.append(self.snapshot(board))
+        board.apply(Action('move', Elena(), 1))
+        snapshots.append(self.snapshot(board))
+        board.apply(Action('attack', Elena(), 2, 'cannon'))
+        snapshots.append(self.snapshot(board))
+        self.assertEqual(board.kraken_damage, 1)
+        self.assertEqual(board.ship_hole_positions, (2, 2, 2))
+
+        for expected in reversed(snapshots[:-1]):
+            board.undo()
+            if expected is not None:
+                self.assertEqual(self.snapshot(board), expected)
+        with self.assertRaises(IndexError):
+            board.undo()
+
+        for expected in snapshots[1:]:
+            board.redo()
+            if expected is not None:
+                self.assertEqual(self.snapshot(board), expected)
+        with self.assertRaises(IndexError):
+            board.redo()
+
+        board.undo()
+        board.apply(Action('move', Elena(), 0))
+        self.assertListEqual(board.redo_stack, [])
+
+    def test_illegal_moves_are_not_recorded(self):
+        board = GameBoard({Astrid(): 2})
+        with self.assertRaises(IllegalMove):
+            board.apply(Action('attack', Astrid(), 0, 'sword'))
+        with self.assertRaises(IllegalMove):
+            board.move_pirate(Astrid(), 1)
+        self.assertListEqual(board.undo_stack, [])
+
+    def test_clone(self):
+        board = GameBoard({Astrid(): 2})
+        board.determine_board_after_kraken_move([4, 4])
+        clone = board.clone()
+        clone.apply(Action('attack', Astrid(), 4, 'sword'))
+        clone.move_pirate(Astrid(), 0)
+        self.assertEqual(board.arm_locations[4], 3)
+        self.assertEqual(board.pirate_quadrants[Astrid()], 2)
+        self.assertEqual(len(clone.undo_stack), 2)
+        self.assertEqual(len(board.undo_stack), 1)
+        self.assertListEqual(clone.roll_dice(), board.roll_dice())
+
+        shared = board.clone(share_rng=True)
+        self.assertIs(shared.rng, board.rng)
+        self.assertEqual(shared, board)
+
+
+def reference_draw(board: GameBoard) -> str:
+    """the drawing code before rows were cached"""
+    def draw_lane(lane):
+        result = "| | | | |"
+        arm_index = board.arm_locations[lane]*2 + 1
+        if board.kraken_lane is not None:
+            if board.kraken_lane == lane:
+                result = result[:arm_index] + '🐙' + result[arm_index+1:]
+        else:
+            result = result[:arm_index] + '𝛿' + result[arm_index+1:]
+        return result[::-1] if lane >= 4 else result
+
+    def draw_ship_lane(lane):
+        result = ('🛡️' if board.shield_status[lane] else '.') + "|__"
+        return result[::-1] if lane >= 4 else result
+
+    track = "| | |🟥| |🟦| |🟥| |🟦|"
+    if board.kraken_location <= 8:
+        track = track[:board.kraken_location*2 + 1] + '🐙' + track[board.kraken_location*2 + 2:]
+    for i in range(board.kraken_location):
+        track = track[:i*2 + 1] + ' ' + track[i*2 + 2:]
+    result = '      KRAKEN ATTACK\n\n' + track + '\n\n'
+    for left, right in [(0,4),(1,5),(2,6),(3,7)]:
+        result += draw_lane(left) + draw_ship_lane(left) + draw_ship_lane(right) + draw_lane(right) + '\n'
+    result += '\n'
+    result += f'Ship damage: {len(board.ship_hole_positions)}\n'
+    result += f'Kraken damage: {board.kraken_damage}\n'
+    result += f'Pirates: {', '.join([str(_) for _ in board.pirates])}'
+    return result
+
+
+class TestCachedDrawing(TestCase):
+
+    def test_draw_matches_reference(self):
+        rng = Random(7)
+        board = GameBoard({Astrid(): 2, Elena(): 1}, seed=7)
+        for step in range(400):
+            choice = rng.random()
+            if choice < 0.3:
+                board.determine_board_after_kraken_move(board.determine_kraken_moves(board.roll_dice()))
+            elif choice < 0.45 and board.undo_stack:
+                board.undo()
+            elif choice < 0.5 and board.redo_stack:
+                board.redo()
+            else:
+                pirate = rng.choice(board.pirates)
+                board.apply(rng.choice(list(board.legal_actions(pirate))))
+            self.assertEqual(board.draw().encode(), reference_draw(board).encode())
+            self.assertEqual(board.clone().draw(), board.draw())
+
+    def test_invalidate_drawing(self):
+        board = GameBoard({Elena(): 0})
+        board.draw()
+        board.arm_locations[0] = 3
+        board.invalidate_drawing([0])
+        self.assertEqual(board.draw(), reference_draw(board))
@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.instrumentation import *
+from kraken_attack.play import kraken_turn
+
+
+class TestInstrumentation(TestCase):
+
+    def test_counts(self):
+        instrumentation = Instrumentation()
+        board = instrumentation.attach(GameBoard({Astrid(): 2}))
+        [board.annoy_kraken(4) for _ in range(9)]
+        board.determine_board_after_kraken_move([0, 0, 0, 4])
+        board.perform_pirate_attack(Astrid(), 'sword', 4)
+        board.perform_pirate_attack(Astrid(), 'sword', 4)
+        board.perform_repair(Astrid(), 4)
+        with self.assertRaises(IllegalMove):
+            board.move_pirate(Astrid(), 1)
+        board.undo()
+        board.roll_dice()
+
+        snapshot = instrumentation.snapshot()
+        self.assertDictEqual(snapshot['calls'], {
+            'roll_dice': 1, 'determine_kraken_moves': 0, 'determine_board_after_kraken_move': 1,
+            'apply_kraken_kernel': 0, 'move_pirate': 1, 'perform_pirate_attack': 2, 'perform_repair': 1, 'annoy_kraken': 9, 'undo': 1
+            })
+        self.assertDictEqual(snapshot['events'], {
+            'shields_broken': 1, 'holes_created': 1, 'kraken_hits': 1, 'illegal_moves': 1
+            })
+        self.assertTrue(all(seconds > 0 for method, seconds in snapshot['seconds'].items()
+                            if snapshot['calls'][method]))
+
+        # the board plays exactly like an uninstrumented one
+        expected = GameBoard({Astrid(): 2})
+        [expected.annoy_kraken(4) for _ in range(9)]
+        expected.determine_board_after_kraken_move([0, 0, 0, 4])
+        expected.perform_pirate_attack(Astrid(), 'sword', 4)
+        expected.perform_pirate_attack(Astrid(), 'sword', 4)
+        expected.roll_dice()
+        self.assertEqual(board, expected)
+
+    def test_counts_kraken_turns(self):
+        instrumentation = Instrumentation()
+        board = instrumentation.attach(GameBoard({Astrid(): 2}, seed=5))
+        for _ in range(30):
+            kraken_turn(board)
+        snapshot = instrumentation.snapshot()
+        self.assertEqual(snapshot['calls']['roll_dice'], 30)
+        self.assertEqual(snapshot['calls']['apply_kraken_kernel'], 30)
+        self.assertEqual(snapshot['events']['shields_broken'], 8 - sum(board.shield_status.values()))
+        self.assertEqual(snapshot['events']['holes_created'], len(board.ship_hole_positions))
+        self.assertGreater(snapshot['events']['holes_created'], 0)
+
+    def test_detach(self):
+        with Instrumentation() as instrumentation:
+            board = instrumentation.attach(GameBoard({Astrid(): 2}))
+            self.assertNotIn('roll_dice', vars(board.clone()))
+        for method in METHODS:
+            self.assertNotIn(method, vars(board))
+            self.assertIs(getattr(board, method).__func__, getattr(GameBoard, method))
+        board.roll_dice()
+        self.assertEqual(instrumentation.snapshot()['calls']['roll_dice'], 0)
+
+    def test_prometheus(self):
+        instrumentation = Instrumentation()
+        board = instrumentation.attach(GameBoard({Astrid(): 2}))
+        board.roll_dice()
+        board.roll_dice()
+        lines = instrumentation.prometheus().splitlines()
+        self.assertIn('# TYPE kraken_calls_total counter', lines)
+        self.assertIn('kraken_calls_total{method="roll_dice"} 2', lines)
+        self.assertIn('kraken_events_total{event="holes_created"} 0', lines)
+        samples = [line for line in lines if not line.startswith('#')]
+        self.assertEqual(len(samples), 2 * len(METHODS) + len(EVENTS))
+        for line in samples:
+            float(line.rsplit(' ', 1)[1])
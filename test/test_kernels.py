@@ -0,0 +1,70 @@
+from itertools import product
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.kernels import *
+
+
+def tier_board(kraken_location: int) -> GameBoard:
+    """a board with every lane state, so rolls break shields and add holes"""
+    board = GameBoard({Elena(): 0, Billy(): 3})
+    board.arm_locations = {0: 3, 1: 3, 2: 2, 3: 0, 4: 3, 5: 3, 6: 1, 7: 2}
+    board.shield_status = {0: False, 1: True, 2: False, 3: True, 4: False, 5: True, 6: True, 7: False}
+    board.ship_hole_positions = (1,)
+    board.kraken_location = kraken_location
+    return board
+
+
+class TestKernels(TestCase):
+
+    def test_lane_transition(self):
+        for arm_location, shield in product(range(4), (True, False)):
+            for moves in range(MAX_LANE_MOVES + 1):
+                board = GameBoard({Elena(): 0})
+                board.arm_locations[0] = arm_location
+                board.shield_status[0] = shield
+                board.determine_board_after_kraken_move([0] * moves)
+                after, holes = LANE_TRANSITION[lane_state(arm_location, shield)][moves]
+                self.assertEqual(after, lane_state(board.arm_locations[0], board.shield_status[0]))
+                self.assertEqual(holes, len(board.ship_hole_positions))
+
+    def test_every_roll_of_every_tier(self):
+        for kraken_location in range(0, 10, 2):
+            board = tier_board(kraken_location)
+            dice_counts = board.dice_counts
+            kernel = tier_kernel(dice_counts['red'], dice_counts['blue'])
+            colors = ['red'] * dice_counts['red'] + ['blue'] * dice_counts['blue']
+            start = board.to_packed()
+            for index, roll in enumerate(product(range(6), repeat=len(colors))):
+                roll_outcome = list(zip(colors, roll))
+                self.assertEqual(roll_index(roll_outcome), (kernel.red, kernel.blue, index))
+                kraken_moves = board.determine_kraken_moves(roll_outcome)
+                self.assertEqual(tuple(kraken_moves), kernel.moves[index])
+                board.determine_board_after_kraken_move(kraken_moves)
+                expected = board.to_packed(), board.ship_hole_positions, board.undo_stack[-1]
+                board.undo()
+                self.assertListEqual(board.apply_kraken_kernel(index), kraken_moves)
+                self.assertEqual((board.to_packed(), board.ship_hole_positions, board.undo_stack[-1]), expected)
+                board.undo()
+                self.assertListEqual(kraken_turn(board, roll_outcome), kraken_moves)
+                self.assertEqual((board.to_packed(), board.ship_hole_positions, board.undo_stack[-1]), expected)
+                board.undo()
+                self.assertEqual(board.to_packed(), start)
+
+    def test_kraken_turn_rolls_the_board_dice(self):
+        board = tier_board(4)
+        expected = tier_board(4)
+        for _ in range(20):
+            kraken_turn(board)
+            expected.determine_board_after_kraken_move(expected.determine_kraken_moves(expected.roll_dice()))
+            self.assertEqual(board, expected)
+            self.assertEqual(board.draw(), expected.draw())
+
+    def test_rolls_in_other_orders(self):
+        board = tier_board(2)
+        roll_outcome = [('blue', 4), ('red', 0), ('red', 4)]
+        self.assertIsNone(roll_index(roll_outcome))
+        expected = tier_board(2)
+        expected.determine_board_after_kraken_move(expected.determine_kraken_moves(roll_outcome))
+        self.assertListEqual(kraken_turn(board, roll_outcome), [0, 1, 2, 3, 4, 4, 5, 6, 7])
+        self.assertEqual(board, expected)
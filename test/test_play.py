@@ -0,0 +1,34 @@
+from unittest import TestCase
+from random import Random
+
+from kraken_attack.game import *
+from kraken_attack.play import *
+
+
+class TestPlay(TestCase):
+
+    def test_random_strategy(self):
+        board = GameBoard({Astrid(): 2, Elena(): 0})
+        rng = Random(1)
+        for _ in range(20):
+            action = random_strategy(board, rng)
+            self.assertIn(action, list(board.legal_actions(action.pirate, useful_only=True)))
+
+    def test_kraken_turn(self):
+        board = GameBoard({Elena(): 0}, seed=3)
+        expected = GameBoard({Elena(): 0}, seed=3)
+        kraken_moves = kraken_turn(board)
+        expected.determine_board_after_kraken_move(expected.determine_kraken_moves(expected.roll_dice()))
+        self.assertEqual(board.to_packed(), expected.to_packed())
+        self.assertEqual(len(board.undo_stack), 1)
+        self.assertListEqual(board.undo_stack[0][1][0], kraken_moves)
+
+    def test_play_game(self):
+        outcomes = [play_game(random_strategy, {Astrid(): 2, Elena(): 0}, seed) for seed in range(20)]
+        self.assertEqual(outcomes, [play_game(random_strategy, {Astrid(): 2, Elena(): 0}, seed) for seed in range(20)])
+        for outcome, turns in outcomes:
+            self.assertIn(outcome, ('Kraken drowns ship', 'Kraken retreats'))
+            self.assertGreater(turns, 0)
+
+        outcome, turns = play_game(random_strategy, {Astrid(): 2}, max_turns=1)
+        self.assertEqual(turns, 1)
@@ -0,0 +1,136 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from random import Random
+
+from kraken_attack.game import *
+from kraken_attack.play import kraken_turn, random_strategy
+from kraken_attack.recording import *
+
+
+class TestRecording(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record_games(self, seeds, snapshot_every=3):
+        """plays the games turn by turn side by side, returns the packed board of every game after every turn"""
+        boards = [GameBoard({Astrid(): 2, Elena(): 0}, seed=seed) for seed in seeds]
+        rng = Random(0)
+        history = [[board.to_packed()] for board in boards]
+        with GameRecorder(self.path, snapshot_every=snapshot_every) as recorder:
+            games = [recorder.attach(board, seed) for board, seed in zip(boards, seeds)]
+            for _ in range(40):
+                for board, turns in zip(boards, history):
+                    if board.game_outcome() is not None:
+                        continue
+                    board.apply(random_strategy(board, rng))
+                    if rng.random() < 0.2:
+                        board.undo()
+                        if rng.random() < 0.5:
+                            board.redo()
+                    kraken_turn(board)
+                    turns.append(board.to_packed())
+            for board in boards:
+                recorder.detach(board)
+                self.assertIsNone(board.recorder)
+        return games, boards, history
+
+    def test_board_at(self):
+        games, boards, history = self.record_games([1, 2, 3])
+        with GameLog(self.path) as log:
+            for game, board, turns in zip(games, boards, history):
+                for turn, packed in enumerate(turns):
+                    self.assertEqual(log.board_at(game, turn).to_packed(), packed)
+                self.assertEqual(log.outcome(game), board.game_outcome())
+
+    def test_board_at_after_undoing_turns(self):
+        board = GameBoard({Astrid(): 2, Elena(): 0}, seed=6)
+        rng = Random(1)
+        history = [board.to_packed()]
+        undone = 0
+        with GameRecorder(self.path, snapshot_every=4) as recorder:
+            game = recorder.attach(board, 6)
+            while len(history) < 30 and board.game_outcome() is None:
+                board.apply(random_strategy(board, rng))
+                kraken_turn(board)
+                history.append(board.to_packed())
+                if len(history) > 3 and rng.random() < 0.5:
+                    # take back the last turn, sometimes the one before it too
+                    turns = 1 if rng.random() < 0.5 else 2
+                    for _ in range(2 * turns):
+                        board.undo()
+                    del history[-turns:]
+                    undone += turns
+            recorder.detach(board)
+        self.assertGreater(undone, 3)
+        with GameLog(self.path) as log:
+            for turn, packed in enumerate(history):
+                self.assertEqual(log.board_at(game, turn).to_packed(), packed)
+
+    def test_undone_kraken_move(self):
+        board = GameBoard({Astrid(): 2})
+        with GameRecorder(self.path, snapshot_every=100) as recorder:
+            game = recorder.attach(board)
+            board.determine_board_after_kraken_move([0])
+            board.undo()
+            board.determine_board_after_kraken_move([3])
+            recorder.detach(board)
+        with GameLog(self.path) as log:
+            self.assertEqual(log.board_at(game, 0), GameBoard({Astrid(): 2}))
+            self.assertEqual(log.board_at(game, 1).to_packed(), board.to_packed())
+
+    def test_games(self):
+        games, boards, history = self.record_games([4, 5])
+        with GameLog(self.path) as log:
+            streamed = dict(log.games())
+            self.assertSetEqual(set(streamed), set(games))
+            for game, board in zip(games, boards):
+                records = streamed[game]
+                self.assertEqual(records[0].kind, GAME)
+                self.assertEqual(records[-1].kind, END)
+                self.assertListEqual(list(log.game_records(game)), records)
+                rolls = [roll_outcome(record) for record in records if record.kind == ROLL]
+                moves = [record for record in records if record.kind == KRAKEN_MOVE]
+                self.assertEqual(len(rolls), len(moves))
+
+    def test_index(self):
+        games, _, _ = self.record_games([6, 7, 8])
+        with GameLog(self.path) as log:
+            index = log.index
+        os.remove(index_path(self.path))
+        with GameLog(self.path) as log:
+            self.assertDictEqual(log.index, index)
+            self.assertEqual(len(log) * RECORD.size, os.path.getsize(self.path))
+        self.assertEqual(RECORD.size, 28)
+
+    def test_appending_to_a_log(self):
+        self.record_games([9])
+        with GameRecorder(self.path) as recorder:
+            board = GameBoard({Billy(): 1})
+            game = recorder.attach(board, game=5)
+            board.perform_pirate_attack(Billy(), 'spoon', 2)
+            board.perform_pirate_attack(Billy(), 'cannon', 2)
+            recorder.detach(board)
+        with GameLog(self.path) as log:
+            self.assertSetEqual(set(log.index), {0, 5})
+            self.assertEqual(log.board_at(game, 0).to_packed(), GameBoard({Billy(): 1}).to_packed())
+            kinds = [record.kind for record in log.game_records(game)]
+            self.assertListEqual(kinds, [GAME, SNAPSHOT, ATTACK, ATTACK, END])
+
+    def test_game_ids_continue_in_an_existing_log(self):
+        self.record_games([10, 11])
+        with GameRecorder(self.path) as recorder:
+            board = GameBoard({Billy(): 1})
+            self.assertEqual(recorder.attach(board), 2)
+            recorder.detach(board)
+
+    def test_empty_log(self):
+        open(self.path, 'wb').close()
+        with GameLog(self.path) as log:
+            self.assertEqual(len(log), 0)
+            self.assertListEqual(list(log.games()), [])
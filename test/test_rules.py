@@ -0,0 +1,100 @@
+import pickle
+from copy import deepcopy
+from random import Random
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.play import kraken_turn, random_strategy
+from kraken_attack.rules import *
+
+
+def three_color_rules() -> RuleSet:
+    """a variant with a green side between the blue and red ones, 12 lanes in 6 quadrants"""
+    return rule_set(
+        quadrant_lanes=((0, 1), (2, 3), (4, 5), (6, 7), (8, 9), (10, 11)),
+        pirate_moves=((1, 3), (0, 2, 4), (1, 5), (0, 4), (1, 3, 5), (2, 4)),
+        color_lanes=(('blue', (0, 1, 2, 3)), ('green', (4, 5, 6, 7)), ('red', (8, 9, 10, 11))),
+        initial_arm_locations=(2, 1, 1, 0) * 3,
+        location_dice=(
+            *((('red', 1), ('green', 1), ('blue', 1)),) * 3,
+            *((('red', 2), ('green', 1), ('blue', 1)),) * 3,
+            *((('red', 2), ('green', 2), ('blue', 2)),) * 6,
+            ),
+        holes_to_sink=6,
+        )
+
+
+class TestRules(TestCase):
+
+    def test_standard_rules(self):
+        rules = STANDARD_RULES
+        self.assertEqual((rules.lanes, rules.quadrants, rules.rows), (8, 4, 4))
+        self.assertDictEqual(dict(enumerate(rules.quadrant_lanes)), QUADRANT_LANES)
+        self.assertDictEqual(dict(enumerate(rules.pirate_moves)), LEGAL_PIRATE_MOVES)
+        self.assertDictEqual(dict(rules.attack_hits), ATTACK_HITS)
+        self.assertTupleEqual(rules.hitting_attack, (None, 'cannon', 'pistol', 'sword'))
+        self.assertTupleEqual(rules.lane_quadrant, tuple(lane // 2 for lane in range(8)))
+        self.assertTupleEqual(rules.lane_row, tuple(lane % 4 for lane in range(8)))
+        self.assertTupleEqual(rules.lane_color, ('blue',) * 4 + ('red',) * 4)
+        self.assertEqual((rules.entry_location, rules.board_location), (8, 9))
+        self.assertEqual((rules.holes_to_sink, rules.damage_to_retreat), (4, 3))
+        self.assertListEqual([list(rules.dice_counts[_].items()) for _ in (0, 3, 9)],
+                             [[('red', 1), ('blue', 1)], [('red', 2), ('blue', 1)], [('red', 3), ('blue', 3)]])
+        self.assertTupleEqual(rules.roll_moves['red', 2], (6,))
+        self.assertTupleEqual(rules.roll_moves['blue', 4], (0, 1, 2, 3))
+        self.assertTupleEqual(rules.roll_moves['red', 5], ())
+        self.assertIs(GameBoard({Elena(): 0}).rules, STANDARD_RULES)
+
+    def test_shared_and_immutable(self):
+        self.assertIs(three_color_rules(), three_color_rules())
+        rules = three_color_rules()
+        self.assertIs(pickle.loads(pickle.dumps(rules)), rules)
+        self.assertIs(deepcopy(rules), rules)
+        with self.assertRaises(AttributeError):
+            rules.lanes = 10
+        with self.assertRaises(TypeError):
+            rules.attack_hits['sword'] = 2
+        board = GameBoard({Elena(): 0}, rules=rules)
+        with self.assertRaises(TypeError):
+            rules.dice_counts[0]['red'] = 3
+        # the board's counts are a copy
+        board.dice_counts['red'] = 3
+        self.assertEqual(board.dice_counts['red'], 1)
+        self.assertIs(board.clone().rules, rules)
+        self.assertNotEqual(board, GameBoard({Elena(): 0}))
+
+    def test_three_colors(self):
+        rules = three_color_rules()
+        self.assertEqual((rules.lanes, rules.rows, rules.entry_location), (12, 6, 10))
+        board = GameBoard({Elena(): 0, Billy(): 4}, seed=3, rules=rules)
+        start = board.clone()
+        self.assertListEqual(board.determine_kraken_moves([('red', 1), ('green', 4), ('blue', 5)]),
+                             [9, 4, 5, 6, 7])
+        board.perform_pirate_attack(Billy(), 'pistol', 8)
+        self.assertEqual(board.arm_locations[8], 1)
+        with self.assertRaises(IllegalMove):
+            board.perform_repair(Billy(), 7)
+        with self.assertRaises(IllegalMove):
+            board.move_pirate(Elena(), 2)
+        self.assertIn('|🟩|', board.draw())
+        self.assertEqual(len(board.draw().splitlines()), 14)
+        with self.assertRaises(AssertionError):
+            board.to_packed()
+
+        # random games end by the variant's thresholds and undo back to the start
+        rng = Random(5)
+        outcome = None
+        for _ in range(300):
+            board.apply(random_strategy(board, rng))
+            self.assertEqual(len(board.roll_dice()), sum(board.dice_counts.values()))
+            kraken_turn(board)
+            outcome = board.game_outcome()
+            if outcome is not None:
+                break
+        self.assertIsNotNone(outcome)
+        self.assertTrue(len(board.ship_hole_positions) >= 6 or board.kraken_damage == 3)
+        while board.undo_stack:
+            board.undo()
+        board.dice = start.dice
+        self.assertEqual(board, start)
+        self.assertEqual(board.draw(), start.draw())
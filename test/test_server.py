@@ -0,0 +1,103 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from kraken_attack.dice import BufferedDice
+from kraken_attack.game import *
+from kraken_attack.server import *
+
+
+class TestStateDiff(TestCase):
+
+    def test_diff(self):
+        board = GameBoard({Elena(): 0, Billy(): 3})
+        old = PackedBoard.from_board(board)
+        board.determine_board_after_kraken_move([0, 0, 0, 5])
+        board.move_pirate(Elena(), 1)
+        changes = state_diff(old, PackedBoard.from_board(board))
+        self.assertDictEqual(changes, {
+            'pirates': {'Billy': 3, 'Elena': 1}, 'shields': {0: False}, 'arms': {0: 3, 5: 2},
+            'ship_holes': (0,)
+            })
+        self.assertDictEqual(state_diff(old, old), {})
+
+    def test_apply_diff(self):
+        board = GameBoard({Elena(): 0, Billy(): 3})
+        [board.annoy_kraken(6) for _ in range(9)]
+        board.determine_board_after_kraken_move([2, 2, 2, 2, 2, 7])
+        client = GameBoard({Samuel(): 1})
+        apply_diff(client, state_diff(None, PackedBoard.from_board(board)))
+        self.assertEqual(client.to_packed(), board.to_packed())
+        self.assertDictEqual(client.pirate_quadrants, board.pirate_quadrants)
+
+
+class TestSessionManager(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.transport = LoopbackTransport()
+        self.manager = SessionManager(self.transport)
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+
+    async def test_session_plays_like_a_board(self):
+        session = await self.manager.open_session({Elena(): 0}, seed=7)
+        client = GameBoard({Elena(): 0})
+        message = await self.transport.receive(session)
+        self.assertEqual(message['type'], 'state')
+        apply_diff(client, message['changes'])
+
+        expected = GameBoard({Elena(): 0}, seed=7)
+        for turn in range(1, 6):
+            action = Action('annoy', Elena()) if turn % 2 else Action('repair', Elena(), 0)
+            self.manager.submit(session, action)
+            message = await self.transport.receive(session)
+            self.assertEqual(message['type'], 'diff')
+            self.assertEqual(message['turn'], turn)
+            apply_diff(client, message['changes'])
+
+            expected.apply(action)
+            kraken_moves = expected.determine_kraken_moves(expected.roll_dice())
+            expected.determine_board_after_kraken_move(kraken_moves)
+            self.assertListEqual(message['kraken_moves'], kraken_moves)
+            self.assertEqual(client.to_packed(), expected.to_packed())
+
+    async def test_queued_actions(self):
+        sessions = [await self.manager.open_session({Astrid(): 2}, seed=i) for i in range(3)]
+        for session in sessions:
+            await self.transport.receive(session)
+            for to in (0, 2, 1):
+                self.manager.submit(session, Action('move', Astrid(), to))
+        for session in sessions:
+            messages = [await self.transport.receive(session) for _ in range(3)]
+            self.assertListEqual([m['type'] for m in messages], ['diff', 'diff', 'error'])
+            self.assertListEqual([m['turn'] for m in messages], [1, 2, 2])
+            self.assertEqual(self.manager.sessions[session].board.pirate_quadrants, {Astrid(): 2})
+
+    async def test_malformed_actions(self):
+        session = await self.manager.open_session({Astrid(): 2})
+        await self.transport.receive(session)
+        for action in (Action('bogus', Astrid(), 0), Action('repair', Astrid(), [4]), ('move', Astrid(), 0)):
+            self.manager.submit(session, action)
+        self.manager.submit(session, Action('move', Astrid(), 0))
+        messages = [await asyncio.wait_for(self.transport.receive(session), 1) for _ in range(4)]
+        self.assertListEqual([m['type'] for m in messages], ['error', 'error', 'error', 'diff'])
+        self.assertEqual(messages[0]['error'], f"{Action('bogus', Astrid(), 0)} is not a legal action")
+        self.assertFalse(self.manager.sessions[session].task.done())
+
+    async def test_annoying_onto_a_lane_that_does_not_exist(self):
+        session = await self.manager.open_session({Astrid(): 2}, dice=BufferedDice([5] * 100))
+        await self.transport.receive(session)
+        for _ in range(8):
+            self.manager.submit(session, Action('annoy', Astrid()))
+        for action in (Action('annoy', Astrid(), 42), Action('annoy', Astrid(), 'x'), Action('annoy', Astrid(), 3)):
+            self.manager.submit(session, action)
+        messages = [await asyncio.wait_for(self.transport.receive(session), 1) for _ in range(11)]
+        self.assertListEqual([m['type'] for m in messages[8:]], ['error', 'error', 'diff'])
+        self.assertDictEqual(messages[-1]['changes'], {'kraken_location': 9, 'kraken_lane': 3})
+        self.assertFalse(self.manager.sessions[session].task.done())
+
+    async def test_load_test(self):
+        report = await load_test(sessions=30, actions=5)
+        self.assertEqual(report.sessions, 30)
+        self.assertTrue(30 <= report.actions <= 150)
+        self.assertTrue(0 < report.p50 <= report.p99)
@@ -0,0 +1,106 @@
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.solver import *
+
+
+def kraken_on_board(lane: int, damage: int, pirate_quadrants: Dict[Pirate, int]) -> GameBoard:
+    board = GameBoard(pirate_quadrants)
+    [board.annoy_kraken(lane) for _ in range(9)]
+    board.kraken_damage = damage
+    return board
+
+
+class TestCandidateActions(TestCase):
+
+    def test_candidate_actions(self):
+        board = GameBoard({Astrid(): 2})
+        board.determine_board_after_kraken_move([4, 4])
+        actions = candidate_actions(board)
+        self.assertListEqual(actions, [
+            Action('move', Astrid(), 0),
+            Action('move', Astrid(), 3),
+            Action('attack', Astrid(), 4, 'sword'),
+            Action('repair', Astrid(), 4),
+            Action('attack', Astrid(), 5, 'cannon'),
+            Action('annoy', Astrid()),
+            ])
+
+    def test_every_candidate_action_is_legal(self):
+        board = kraken_on_board(3, 0, {Astrid(): 2, Elena(): 1})
+        board.determine_board_after_kraken_move([2, 2, 3, 3, 5, 5])
+        for action in candidate_actions(board):
+            GameBoard.from_packed(board.to_packed()).apply(action)
+
+
+class TestSolver(TestCase):
+
+    def test_evaluate(self):
+        board = GameBoard({Elena(): 0})
+        self.assertTrue(LOSS < evaluate(PackedBoard.from_board(board)) < WIN)
+        board.kraken_damage = 3
+        self.assertEqual(evaluate(PackedBoard.from_board(board)), WIN)
+        board.kraken_damage = 0
+        board.ship_hole_positions = (0, 1, 1, 2, 3)
+        self.assertEqual(evaluate(PackedBoard.from_board(board)), LOSS)
+
+    def test_best_action_finishes_the_kraken(self):
+        board = kraken_on_board(4, 2, {Astrid(): 2})
+        solver = Solver(depth=1)
+        self.assertEqual(solver.best_action(board), Action('attack', Astrid(), 4, 'pistol'))
+        self.assertGreater(solver.stats.nodes, 0)
+
+    def test_best_action_defends_a_sinking_ship(self):
+        board = GameBoard({Billy(): 0})
+        board.determine_board_after_kraken_move([0, 0, 1, 1, 1, 1, 1, 1])
+        self.assertEqual(board.ship_hole_positions, (0, 0, 0))
+        action = Solver(depth=1).best_action(board)
+        self.assertIn(action.kind, ('attack', 'repair'))
+
+    def test_transposition_table(self):
+        board = GameBoard({Elena(): 0, Billy(): 3})
+        solver = Solver(depth=2, table_size=1000)
+        first = solver.best_action(board)
+        self.assertEqual(solver.best_action(board), first)
+        self.assertLessEqual(len(solver.table), 1000)
+        self.assertGreater(solver.stats.hit_rate, 0)
+        self.assertGreater(solver.stats.nodes_per_second, 0)
+
+    def test_transposition_key_ignores_hole_order(self):
+        board = GameBoard({Elena(): 0, Billy(): 3})
+        board.ship_hole_positions = (1, 0)
+        packed = PackedBoard.from_board(board)
+        unsorted = PackedBoard((packed.state & ((1 << HOLES_SHIFT) - 1)) | (0b1_00_01 << HOLES_SHIFT))
+        self.assertEqual(unsorted.ship_hole_positions, (1, 0))
+        solver = Solver(depth=1)
+        value = solver.value(packed, 1)
+        self.assertEqual(solver.value(unsorted, 1), value)
+        self.assertEqual(len(solver.table), 1)
+        self.assertEqual(solver.table.hits, 1)
+
+    def test_search_boards_do_not_roll(self):
+        board = search_board(PackedBoard.from_board(GameBoard({Elena(): 0})))
+        self.assertIsNone(board.rng)
+        with self.assertRaises(IndexError):
+            board.roll_dice()
+
+    def test_transposition_table_is_bounded(self):
+        table = TranspositionTable(2)
+        table.put(1, 'a')
+        table.put(2, 'b')
+        table.get(1)
+        table.put(3, 'c')
+        self.assertEqual(table.get(2), None)
+        self.assertEqual(table.get(1), 'a')
+        self.assertEqual(table.hits, 2)
+        self.assertEqual(table.lookups, 3)
+
+    def test_mcts(self):
+        board = kraken_on_board(4, 2, {Astrid(): 2})
+        solver = Solver(seed=1)
+        action = solver.mcts(board, time_budget=10, max_iterations=60)
+        self.assertEqual(action, Action('attack', Astrid(), 4, 'pistol'))
+        self.assertGreater(solver.stats.nodes, 0)
+
+        action = Solver().mcts(GameBoard({Elena(): 0}), time_budget=0.05)
+        self.assertIn(action, candidate_actions(GameBoard({Elena(): 0})))
@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.solver import Solver, after_action, candidate_actions
+from kraken_attack.symmetry import *
+
+
+def sample_state() -> PackedBoard:
+    board = GameBoard({Elena(): 0, Billy(): 3})
+    board.determine_board_after_kraken_move([0, 0, 4, 6, 6, 6])
+    board.perform_repair(Elena(), 0)
+    board.annoy_kraken(5)
+    return PackedBoard.from_board(board)
+
+
+class TestSymmetry(TestCase):
+
+    def test_transforms_are_distinct(self):
+        permutations = {tuple(t.lane(lane) for lane in range(8)) for t in LANE_TRANSFORMS}
+        self.assertEqual(len(permutations), 32)
+        for permutation in permutations:
+            # colors are kept
+            self.assertTrue(all((lane < 4) == (permutation[lane] < 4) for lane in range(8)))
+
+    def test_transforms_keep_pirate_moves(self):
+        for t in LANE_TRANSFORMS:
+            for quadrant, moves in LEGAL_PIRATE_MOVES.items():
+                self.assertSetEqual({t.quadrant(q) for q in moves}, set(LEGAL_PIRATE_MOVES[t.quadrant(quadrant)]))
+                self.assertSetEqual({t.lane(lane) for lane in QUADRANT_LANES[quadrant]},
+                                    set(QUADRANT_LANES[t.quadrant(quadrant)]))
+
+    def test_inverse(self):
+        state = sample_state()
+        for t in LANE_TRANSFORMS:
+            t = t._replace(pirates=(3, 2, 0, 1))
+            self.assertEqual(transform_state(transform_state(state, t), t.inverse()), transform_state(state, IDENTITY))
+
+    def test_symmetric_states_canonicalize_identically(self):
+        state = sample_state()
+        canonical, transform = canonicalize(state)
+        self.assertEqual(transform_state(state, transform), canonical)
+        for t in LANE_TRANSFORMS:
+            for pirates in ((0, 1, 2, 3), (2, 3, 1, 0)):
+                other = transform_state(state, t._replace(pirates=pirates))
+                self.assertEqual(canonicalize(other)[0], canonical)
+                self.assertEqual(canonicalize(other.to_board())[0], canonical)
+
+    def test_symmetric_states_have_equal_values(self):
+        state = sample_state()
+        solver = Solver(depth=1)
+        value = solver.value(state, 1)
+        for t in LANE_TRANSFORMS[::5]:
+            other = transform_state(state, t._replace(pirates=(2, 3, 0, 1)))
+            self.assertAlmostEqual(solver.value(other, 1), value, places=9)
+
+    def test_actions_map_back(self):
+        state = sample_state()
+        canonical, transform = canonicalize(state)
+        actions = candidate_actions(state.to_board())
+        canonical_actions = candidate_actions(canonical.to_board())
+        self.assertEqual(len(actions), len(canonical_actions))
+        for action in canonical_actions:
+            original = original_action(action, transform)
+            # annoy is offered once, by whichever pirate comes first
+            if action.kind != 'annoy':
+                self.assertIn(original, actions)
+            self.assertEqual(transform_action(original, transform), action)
+            self.assertEqual(canonicalize(after_action(state, original))[0],
+                             canonicalize(after_action(canonical, action))[0])
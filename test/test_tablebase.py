@@ -0,0 +1,74 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.solver import LOSS, WIN, evaluate, terminal_value
+from kraken_attack.tablebase import *
+
+
+class TestTablebase(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'table.kts')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_normalize(self):
+        board = GameBoard({Elena(): 0})
+        board.ship_hole_positions = (3, 0, 2)
+        packed = PackedBoard.from_board(board)
+        self.assertEqual(packed.ship_hole_positions, (0, 2, 3))
+        self.assertIs(normalize(packed), packed)
+        # holes packed in another order
+        unsorted = PackedBoard((packed.state & ((1 << HOLES_SHIFT) - 1)) | (0b1_10_00_11 << HOLES_SHIFT))
+        self.assertEqual(unsorted.ship_hole_positions, (3, 0, 2))
+        self.assertEqual(normalize(unsorted), packed)
+
+    def test_enumerate_states(self):
+        start = PackedBoard.from_board(GameBoard({Elena(): 0, Billy(): 3}))
+        index = enumerate_states(start, max_states=150)
+        self.assertEqual(len(index), 150)
+        self.assertEqual(index[start.state], 0)
+        self.assertListEqual(sorted(index.values()), list(range(150)))
+        for packed in index:
+            self.assertIsNone(terminal_value(PackedBoard(packed)))
+
+    def test_solve_is_a_fixed_point(self):
+        index = enumerate_states(PackedBoard.from_board(GameBoard({Astrid(): 2})), max_states=60)
+        values = solve(index, tolerance=1e-9)
+        for packed, i in index.items():
+            self.assertTrue(LOSS <= values[i] <= WIN)
+            expected = max(
+                sum(p * (values[index[s.state]] if s.state in index else
+                         (terminal_value(s) if terminal_value(s) is not None else evaluate(s)))
+                    for s, p in outcomes)
+                for outcomes in successors(PackedBoard(packed)))
+            self.assertAlmostEqual(values[i], expected, places=6)
+
+    def test_solved_table(self):
+        start = GameBoard({Astrid(): 2})
+        index = enumerate_states(PackedBoard.from_board(start), max_states=80)
+        values = solve(index)
+        write_table(self.path, index, values)
+        with SolvedTable(self.path) as table:
+            self.assertEqual(len(table), 80)
+            for packed, i in index.items():
+                self.assertAlmostEqual(table.value(PackedBoard(packed)), values[i], places=6)
+            self.assertAlmostEqual(start.lookup_value(table), values[0], places=6)
+
+            won = start.clone()
+            won.kraken_damage = 3
+            self.assertEqual(won.lookup_value(table), WIN)
+            unknown = start.clone()
+            unknown.move_pirate(Astrid(), 3)
+            unknown.determine_board_after_kraken_move([0, 0, 1, 1, 2, 2, 3, 3])
+            self.assertIsNone(unknown.lookup_value(table))
+
+    def test_cli(self):
+        main([self.path, 'Elena=0', 'Astrid=2', '--max-states', '20'])
+        with SolvedTable(self.path) as table:
+            self.assertEqual(len(table), 20)
+            self.assertIsNotNone(GameBoard({Elena(): 0, Astrid(): 2}).lookup_value(table))
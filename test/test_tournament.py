@@ -0,0 +1,39 @@
+from unittest import TestCase
+from random import Random
+
+from kraken_attack.game import *
+from kraken_attack.play import random_strategy
+from kraken_attack.tournament import *
+
+
+def attack_first(board: GameBoard, rng: Random) -> Action:
+    actions = [action for pirate in board.pirates for action in board.legal_actions(pirate, useful_only=True)]
+    attacks = [action for action in actions if action.kind == 'attack']
+    return rng.choice(attacks or actions)
+
+
+STRATEGIES = {'random': random_strategy, 'attack first': attack_first}
+CONFIGS = [{Astrid(): 2, Elena(): 0}, {Billy(): 1}]
+
+
+class TestTournament(TestCase):
+
+    def test_game_seed(self):
+        self.assertEqual(game_seed(1, 'random', 0, 3), game_seed(1, 'random', 0, 3))
+        self.assertNotEqual(game_seed(1, 'random', 0, 3), game_seed(1, 'random', 0, 4))
+        self.assertNotEqual(game_seed(1, 'random', 0, 3), game_seed(2, 'random', 0, 3))
+        specs = game_specs(STRATEGIES, len(CONFIGS), 5)
+        self.assertEqual(len(specs), 2 * 2 * 5)
+        self.assertEqual(len({spec.seed for spec in specs}), len(specs))
+
+    def test_results_do_not_depend_on_workers(self):
+        serial = sorted(run_tournament(STRATEGIES, CONFIGS, games=12, max_workers=0))
+        self.assertEqual(len(serial), 2 * 2 * 12)
+        for max_workers, chunk_size in [(1, 64), (3, 5)]:
+            parallel = sorted(run_tournament(STRATEGIES, CONFIGS, games=12, max_workers=max_workers,
+                                             chunk_size=chunk_size))
+            self.assertListEqual(parallel, serial)
+
+        table = tally(serial)
+        self.assertSetEqual(set(table), set(STRATEGIES))
+        self.assertEqual(sum(table['random'].values()), 24)
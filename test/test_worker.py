@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+from io import StringIO
+from unittest import TestCase
+
+from kraken_attack.game import *
+from kraken_attack.play import play_game, random_strategy
+from kraken_attack.worker import *
+
+# modules a bare game does not need
+HEAVY_MODULES = ('numpy', 'sqlite3', 'asyncio', 'concurrent.futures', 'fractions', 'kraken_attack.solver')
+
+
+def python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, '-c', code], capture_output=True, text=True, check=True)
+
+
+class TestWorker(TestCase):
+
+    def test_serve(self):
+        jobs = [
+            {'id': 'a', 'pirates': {'Elena': 0, 'Billy': 3}, 'seed': 7},
+            {'id': 'b', 'pirates': [None, 2, None, None], 'seed': 8, 'max_turns': 3,
+             'strategy': 'kraken_attack.play:random_strategy'},
+            {'id': 'c', 'pirates': {'Jack': 0}},
+            ]
+        output = StringIO()
+        self.assertEqual(serve(StringIO('\n'.join(json.dumps(job) for job in jobs) + '\n\nnot json\n'), output), 4)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        outcome, turns = play_game(random_strategy, {Elena(): 0, Billy(): 3}, seed=7)
+        self.assertDictEqual(results[0], {'id': 'a', 'outcome': outcome, 'turns': turns})
+        outcome, turns = play_game(random_strategy, {Astrid(): 2}, seed=8, max_turns=3)
+        self.assertDictEqual(results[1], {'id': 'b', 'outcome': outcome, 'turns': turns})
+        self.assertDictEqual(results[2], {'id': 'c', 'error': "KeyError: 'Jack'"})
+        self.assertIsNone(results[3]['id'])
+        self.assertTrue(results[3]['error'].startswith('JSONDecodeError'))
+
+    def test_worker_process(self):
+        jobs = [{'id': i, 'pirates': {'Astrid': i % 4}, 'seed': i} for i in range(20)]
+        with Worker() as worker:
+            self.assertDictEqual(worker.play(jobs[0]), play_job(jobs[0]))
+            self.assertListEqual(list(worker.map(jobs, window=8)), [play_job(job) for job in jobs])
+        self.assertEqual(worker.process.returncode, 0)
+
+    def test_lazy_package(self):
+        loaded = python('import sys, kraken_attack; print(sorted(m for m in sys.modules if "kraken" in m))')
+        self.assertEqual(loaded.stdout.split(), ["['kraken_attack']"])
+        loaded = python('import sys, kraken_attack.game; print(" ".join(sys.modules))').stdout.split()
+        self.assertListEqual([m for m in HEAVY_MODULES if m in loaded], [])
+
+        import kraken_attack
+        self.assertIs(kraken_attack.GameBoard, GameBoard)
+        self.assertIs(kraken_attack.serve, serve)
+        self.assertIn('VectorEnv', dir(kraken_attack))
+        with self.assertRaises(AttributeError):
+            kraken_attack.Jack
+
+    def test_import_time(self):
+        # -X importtime reports "import time: self [us] | cumulative [us] | module" on stderr,
+        # the fastest of a few runs is compared with generous bounds
+        def cumulative_import_times():
+            report = python('import kraken_attack.game', '-X', 'importtime').stderr
+            return {
+                line.split('|')[2].strip(): int(line.split('|')[1])
+                for line in report.splitlines()[1:] if line.startswith('import time:')
+                }
+        runs = [cumulative_import_times() for _ in range(3)]
+        self.assertLess(min(run['kraken_attack'] for run in runs), 20_000)
+        self.assertLess(min(run['kraken_attack.game'] for run in runs), 250_000)